@@ -46,6 +46,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ProfileMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -84,10 +85,46 @@ DATABASES = {
         "OPTIONS": {
             "init_command": "SET sql_mode='STRICT_TRANS_TABLES'",
         },
+        # Keep connections open between requests (and in the dashboards' query
+        # threads) instead of reconnecting each time; checked before reuse
+        "CONN_MAX_AGE": 60,
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# Local memory is per process; point this at Redis/Memcached when running
+# several workers so signal-based invalidation reaches all of them.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+# Seconds a user's profile/role lookup stays cached (saves invalidate it earlier)
+PROFILE_CACHE_TIMEOUT = 300
+
+# Seconds a rendered dashboard team card stays cached (changes to the team invalidate it earlier)
+TEAM_CARD_CACHE_TIMEOUT = 3600
+
+# Run the async dashboards' independent queries concurrently, one thread and
+# connection each (core.parallel); only done while CONN_MAX_AGE keeps the
+# connections open. Compare with the benchmark_dashboards command
+DASHBOARD_PARALLEL_QUERIES = True
+
+# Processes that hash initial passwords during a roster import (None = one per CPU)
+PASSWORD_HASH_WORKERS = None
+
+# Proposal documents are served by core.views.proposal_document after an access
+# check. Set to "x-accel-redirect" (nginx) or "x-sendfile" (Apache/lighttpd) to let
+# the web server send the bytes; nginx needs an internal location at
+# DOCUMENT_ACCEL_REDIRECT_PREFIX aliased to MEDIA_ROOT.
+DOCUMENT_SENDFILE_BACKEND = None
+DOCUMENT_ACCEL_REDIRECT_PREFIX = "/protected-media/"
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -131,3 +168,12 @@ LOGIN_URL = "/login/"
 
 # Allow students from different sections within same dept+batch?
 ALLOW_CROSS_SECTION_TEAMS = True
+
+# Days after which the expire_invitations command expires an unanswered invitation
+INVITATION_MAX_AGE_DAYS = 14
+
+# Teams a mentor takes in the mentor assignment solver unless their profile sets mentor_capacity
+MENTOR_CAPACITY = 4
+
+# Weight of each review in a team's overall leaderboard score (see core.scoring)
+REVIEW_WEIGHTS = {"FIRST": 25, "SECOND": 25, "FINAL": 50}
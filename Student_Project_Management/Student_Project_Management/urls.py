@@ -46,6 +46,20 @@ urlpatterns = [
         staff_views.coordinator_proposal_detail,
         name="coordinator_proposal_detail",
     ),
+    path(
+        "coordinator/mentors/assign/",
+        staff_views.coordinator_mentor_assignment,
+        name="coordinator_mentor_assignment",
+    ),
+    path(
+        "coordinator/reviews/schedule/",
+        staff_views.coordinator_schedule_reviews,
+        name="coordinator_schedule_reviews",
+    ),
+    path("coordinator/teams/form/", staff_views.coordinator_form_teams, name="coordinator_form_teams"),
+    path("reviews/leaderboard/", staff_views.review_leaderboard, name="review_leaderboard"),
+    path("faculty/panels/", staff_views.panel_reviews, name="panel_reviews"),
+    path("faculty/panels/<int:review_id>/score/", staff_views.panel_score_review, name="panel_score_review"),
     path(
         "hod/proposals/",
         staff_views.hod_proposal_list,
@@ -60,6 +74,10 @@ urlpatterns = [
     path("mentor/dashboard/", staff_views.mentor_dashboard, name="mentor_dashboard"),
     path("advisor/dashboard/", staff_views.advisor_dashboard, name="advisor_dashboard"),
     path("hod/faculty/", staff_views.hod_faculty_list, name="hod_faculty_list"),
+    path("hod/export/<str:dataset>/", staff_views.hod_export, name="hod_export"),
+    path("api/<str:resource>/", staff_views.api, name="api"),
+    path("documents/<int:document_id>/", core_views.proposal_document, name="proposal_document"),
+    path("documents/<int:document_id>/thumbnail/", core_views.proposal_document_thumbnail, name="proposal_document_thumbnail"),
 
         # Coordinator review management
     path(
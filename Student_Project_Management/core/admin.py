@@ -1,10 +1,67 @@
 from django.contrib import admin
 
 # Register your models here.
-from django.contrib import admin
+import io
+
+from django import forms
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
+from django.core.exceptions import PermissionDenied
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
 from .models import Department, Batch, ClassSection, FacultyProfile, StudentProfile
 from .models import User,Team, Invitation, ProjectProposal, ProposalDocument
+from .roster import RosterError, import_roster
+
+
+class RosterImportForm(forms.Form):
+    csv_file = forms.FileField(label="CSV file")
+    default_password = forms.CharField(
+        required=False,
+        widget=forms.PasswordInput,
+        help_text="Initial password for new users without a password column value.",
+    )
+
+
+class RosterImportMixin:
+    """Adds an "Import CSV" page (core.roster.import_roster) to the change list."""
+
+    change_list_template = "admin/core/roster_change_list.html"
+
+    def get_urls(self):
+        opts = self.model._meta
+        return [
+            path(
+                "import/",
+                self.admin_site.admin_view(self.import_roster_view),
+                name=f"{opts.app_label}_{opts.model_name}_import_roster",
+            ),
+        ] + super().get_urls()
+
+    def import_roster_view(self, request):
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        form = RosterImportForm(request.POST or None, request.FILES or None)
+        errors = []
+        if request.method == "POST" and form.is_valid():
+            csvfile = io.TextIOWrapper(form.cleaned_data["csv_file"].file, encoding="utf-8-sig", newline="")
+            try:
+                result = import_roster(csvfile, default_password=form.cleaned_data["default_password"])
+            except (RosterError, UnicodeDecodeError) as exc:
+                errors = getattr(exc, "errors", [f"The file is not UTF-8 text: {exc}"])
+            else:
+                self.message_user(request, f"Imported {result}.", messages.SUCCESS)
+                return redirect(f"admin:{self.model._meta.app_label}_{self.model._meta.model_name}_changelist")
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": f"Import {self.model._meta.verbose_name_plural}",
+            "form": form,
+            "errors": errors,
+        }
+        return TemplateResponse(request, "admin/core/roster_import.html", context)
 
 
 @admin.register(User)
@@ -36,19 +93,37 @@ class ClassSectionAdmin(admin.ModelAdmin):
 
 
 @admin.register(FacultyProfile)
-class FacultyProfileAdmin(admin.ModelAdmin):
-    list_display = ("user", "employee_id", "department", "is_hod")
+class FacultyProfileAdmin(RosterImportMixin, admin.ModelAdmin):
+    list_display = ("user", "employee_id", "department", "is_hod", "expertise", "mentor_capacity")
     list_filter = ("department", "is_hod")
 
 
 @admin.register(StudentProfile)
-class StudentProfileAdmin(admin.ModelAdmin):
+class StudentProfileAdmin(RosterImportMixin, admin.ModelAdmin):
     list_display = ("user", "roll_number", "department", "class_section", "batch", "semester")
     list_filter = ("department", "class_section", "batch", "semester")
 
 
+class TeamAdminForm(forms.ModelForm):
+    class Meta:
+        model = Team
+        fields = "__all__"
+
+    def clean_members(self):
+        # Team.members refuses students of other teams (core.teams); say which ones here
+        members = self.cleaned_data["members"]
+        taken = [m for m in members if m.current_team_id not in (None, self.instance.pk)]
+        if taken:
+            raise forms.ValidationError(
+                "Already in another team: %(students)s.",
+                params={"students": ", ".join(str(m) for m in taken)},
+            )
+        return members
+
+
 @admin.register(Team)
 class TeamAdmin(admin.ModelAdmin):
+    form = TeamAdminForm
     list_display = ("name", "department", "class_section", "batch", "team_leader", "mentor", "coordinator", "is_approved")
     list_filter = ("department", "class_section", "batch", "is_approved")
 
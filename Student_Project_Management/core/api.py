@@ -0,0 +1,225 @@
+"""
+Read-only JSON API for integrations (LMS sync, reporting scripts).
+
+    GET /api/<resource>/?fields=id,name&ids=1,2,3&cursor=...&limit=100
+
+Each resource is a model scoped to the caller's department (staff_views.api
+checks the user the way the coordinator and HOD pages do) and a fixed map of
+API field names to ORM paths. ?fields= picks some of them; the page is read
+with a single .values() query over just those columns (plus the joins they
+need), and list fields such as a team's members cost one more query for the
+whole page. Pages are keyset-paginated on id (core.pagination), so the last
+page costs what the first does; ?ids= fetches up to MAX_PAGE_SIZE given rows
+in one query instead.
+
+The ETag is a hash of the body: an unchanged page is answered with 304 Not
+Modified, which spares the transfer and the client's parsing (the queries
+still run).
+"""
+import hashlib
+import json
+from dataclasses import dataclass, field
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+from .models import Department, ProjectProposal, ProposalDocument, Review, StudentProfile, Team
+from .pagination import PAGE_SIZE, cursor_values, keyset_page, page_querystring
+
+MAX_PAGE_SIZE = 500
+
+
+class ApiError(Exception):
+    """A bad request; str() is the message returned to the client."""
+
+
+@dataclass(frozen=True)
+class Resource:
+    model: type
+    department: str  # lookup from the model to its department
+    fields: dict  # API name -> ORM path, or (ORM path, function applied to the value)
+    many: dict = field(default_factory=dict)  # API name -> (m2m through model, parent column, value column)
+
+
+def _document_url(document_id):
+    return reverse("proposal_document", args=[document_id])
+
+
+RESOURCES = {
+    "departments": Resource(Department, "id", {
+        "id": "id",
+        "name": "name",
+        "full_name": "full_name",
+    }),
+    "students": Resource(StudentProfile, "department", {
+        "id": "id",
+        "roll_number": "roll_number",
+        "username": "user__username",
+        "first_name": "user__first_name",
+        "last_name": "user__last_name",
+        "email": "user__email",
+        "batch": "batch__name",
+        "section": "class_section__name",
+        "semester": "semester",
+        "team": "current_team_id",
+    }),
+    "teams": Resource(
+        Team, "department",
+        {
+            "id": "id",
+            "name": "name",
+            "team_id_code": "team_id_code",
+            "batch": "batch__name",
+            "section": "class_section__name",
+            "leader": "team_leader_id",
+            "mentor": "mentor_id",
+            "mentor_username": "mentor__user__username",
+            "is_approved": "is_approved",
+            "created_at": "created_at",
+            "updated_at": "updated_at",
+        },
+        many={"members": (Team.members.through, "team_id", "studentprofile_id")},
+    ),
+    "proposals": Resource(ProjectProposal, "team__department", {
+        "id": "id",
+        "team": "team_id",
+        "title": "title",
+        "problem_statement": "problem_statement",
+        "objectives": "objectives",
+        "domain": "domain",
+        "expected_outcomes": "expected_outcomes",
+        "estimated_duration_weeks": "estimated_duration_weeks",
+        "preferred_mentor": "preferred_mentor_id",
+        "status": "status",
+        "coordinator_comment": "coordinator_comment",
+        "created_at": "created_at",
+        "updated_at": "updated_at",
+    }),
+    "documents": Resource(ProposalDocument, "proposal__team__department", {
+        "id": "id",
+        "proposal": "proposal_id",
+        "original_name": "original_name",
+        "uploaded_by": "uploaded_by_id",
+        "uploaded_at": "uploaded_at",
+        "processing_status": "processing_status",
+        "page_count": "page_count",
+        "url": ("id", _document_url),
+    }),
+    "reviews": Resource(
+        Review, "team__department",
+        {
+            "id": "id",
+            "team": "team_id",
+            "review_type": "review_type",
+            "date": "date",
+            "session": "session",
+            "requirements": "requirements",
+            "score": "result__score",
+            "complete": "result__complete",
+        },
+        many={"panel": (Review.panel_members.through, "review_id", "facultyprofile_id")},
+    ),
+}
+
+
+def _selected_fields(resource, param):
+    """API field names asked for with ?fields= (all of them by default), id always included."""
+    if not param:
+        return [*resource.fields, *resource.many]
+    names = [name.strip() for name in param.split(",") if name.strip()]
+    unknown = [name for name in names if name not in resource.fields and name not in resource.many]
+    if unknown:
+        raise ApiError(f"Unknown field(s): {', '.join(unknown)}.")
+    return ["id", *dict.fromkeys(name for name in names if name != "id")]
+
+
+def _ids(param):
+    try:
+        ids = {int(i) for i in param.split(",") if i.strip()}
+    except ValueError:
+        raise ApiError("ids must be a comma-separated list of integers.")
+    if len(ids) > MAX_PAGE_SIZE:
+        raise ApiError(f"At most {MAX_PAGE_SIZE} ids per request.")
+    return ids
+
+
+def _limit(param):
+    if not param:
+        return PAGE_SIZE
+    if not param.isdigit() or not 1 <= int(param) <= MAX_PAGE_SIZE:
+        raise ApiError(f"limit must be between 1 and {MAX_PAGE_SIZE}.")
+    return int(param)
+
+
+def fetch(resource, department, params):
+    """(rows as dicts, next cursor or None) for the request parameters. Raises ApiError."""
+    names = _selected_fields(resource, params.get("fields"))
+    columns = [name for name in names if name in resource.fields]
+    paths = {}
+    for name in columns:
+        spec = resource.fields[name]
+        paths[name] = spec[0] if isinstance(spec, tuple) else spec
+
+    queryset = resource.model.objects.filter(**{resource.department: department})
+    if params.get("ids"):
+        queryset = queryset.filter(id__in=_ids(params["ids"]))
+        page_size = MAX_PAGE_SIZE
+    else:
+        page_size = _limit(params.get("limit"))
+    if params.get("cursor") and cursor_values(queryset, ("id",), params["cursor"]) is None:
+        raise ApiError("Invalid cursor.")
+    rows, next_cursor = keyset_page(
+        queryset.values(*dict.fromkeys(paths.values())), ("id",),
+        cursor=params.get("cursor"), page_size=page_size,
+    )
+
+    results = []
+    for row in rows:
+        item = {}
+        for name in columns:
+            spec = resource.fields[name]
+            value = row[paths[name]]
+            item[name] = spec[1](value) if isinstance(spec, tuple) else value
+        results.append(item)
+
+    for name in names:
+        if name in resource.many and results:
+            through, parent, column = resource.many[name]
+            values = {item["id"]: [] for item in results}
+            for parent_id, value in through.objects.filter(
+                    **{f"{parent}__in": values}).order_by("pk").values_list(parent, column):
+                values[parent_id].append(value)
+            for item in results:
+                item[name] = values[item["id"]]
+    return results, next_cursor
+
+
+def api_response(request, resource, department):
+    """The JSON page for a GET on the resource (or 304 / 400)."""
+    try:
+        results, next_cursor = fetch(resource, department, request.GET)
+    except ApiError as exc:
+        return json_error(str(exc), status=400)
+
+    next_url = None
+    if next_cursor:
+        query = page_querystring(request)
+        next_url = f"{request.path}?{query + '&' if query else ''}cursor={next_cursor}"
+    body = json.dumps({"results": results, "next": next_url}, cls=DjangoJSONEncoder).encode()
+
+    etag = quote_etag(hashlib.md5(body, usedforsecurity=False).hexdigest())
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def json_error(message, status):
+    return HttpResponse(
+        json.dumps({"error": message}), content_type="application/json", status=status,
+    )
@@ -0,0 +1,220 @@
+"""
+Department-wide mentor assignment.
+
+Every team with an APPROVED proposal is matched with one mentor at once,
+instead of one proposal at a time. The cost of giving team t to mentor m is
+lowered when m is the team's preferred mentor, when the proposal's domain
+matches m's expertise and when m already mentors t (so re-running the solver
+does not reshuffle settled teams). Each mentor offers capacity "slots" whose
+cost grows with the number of teams taken, which spreads the teams evenly
+unless a preference outweighs the extra load. Teams that cannot be placed
+(not enough capacity) take an "unassigned" column.
+
+The resulting teams x slots matrix is solved exactly with the Hungarian
+algorithm (shortest augmenting paths, O(teams^2 x slots)) with the inner
+loop vectorised in NumPy, so a few hundred teams take about a second.
+"""
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .cards import bump_team_versions
+from .models import FacultyProfile, ProjectProposal, Team
+from .stats import add_deltas
+
+PREFERRED_BONUS = 10
+DOMAIN_BONUS = 5
+CURRENT_BONUS = 2
+LOAD_COST = 2  # per team the mentor already has, so every extra team costs more
+UNASSIGNED_COST = 1000
+
+
+def default_capacity():
+    return getattr(settings, "MENTOR_CAPACITY", 4)
+
+
+def _words(text):
+    return set(re.findall(r"\w+", (text or "").lower()))
+
+
+@dataclass
+class Placement:
+    team: Team
+    mentor: FacultyProfile = None  # None: no capacity left
+    preferred: bool = False
+    domain_match: bool = False
+
+    @property
+    def changed(self):
+        return self.team.mentor_id != (self.mentor.id if self.mentor else None)
+
+
+@dataclass
+class AssignmentPlan:
+    placements: list
+    loads: list = field(default_factory=list)  # (mentor, teams before, teams after, capacity)
+
+    @property
+    def changes(self):
+        return [p for p in self.placements if p.changed and p.mentor is not None]
+
+    @property
+    def unassigned(self):
+        return [p for p in self.placements if p.mentor is None]
+
+
+def plan_assignment(department, batch=None):
+    """Best assignment of mentors to the department's approved teams (nothing is saved)."""
+    teams = Team.objects.filter(
+        department=department,
+        proposal__status=ProjectProposal.Status.APPROVED,
+    ).select_related("proposal", "batch", "mentor__user").order_by("id")
+    if batch is not None:
+        teams = teams.filter(batch=batch)
+    teams = list(teams)
+    if not teams:
+        return AssignmentPlan([])
+    team_ids = [t.id for t in teams]
+
+    # teams outside this problem (other batches, not yet approved) still count towards the load
+    mentors = list(
+        FacultyProfile.objects.filter(department=department).select_related("user").annotate(
+            other_teams=Count("mentored_teams", filter=~Q(mentored_teams__id__in=team_ids)),
+        ).order_by("id")
+    )
+    capacity = {m.id: default_capacity() if m.mentor_capacity is None else m.mentor_capacity for m in mentors}
+    expertise = {m.id: _words(m.expertise.replace(",", " ")) for m in mentors}
+
+    slots = []  # (mentor, cost of taking one more team)
+    for mentor in mentors:
+        for k in range(max(capacity[mentor.id] - mentor.other_teams, 0)):
+            slots.append((mentor, LOAD_COST * (mentor.other_teams + k)))
+
+    cost = []
+    for team in teams:
+        domain = _words(team.proposal.domain)
+        row = []
+        for mentor, load_cost in slots:
+            value = load_cost
+            if team.proposal.preferred_mentor_id == mentor.id:
+                value -= PREFERRED_BONUS
+            if domain & expertise[mentor.id]:
+                value -= DOMAIN_BONUS
+            if team.mentor_id == mentor.id:
+                value -= CURRENT_BONUS
+            row.append(value)
+        cost.append(row + [UNASSIGNED_COST] * len(teams))
+
+    columns = solve_assignment(cost)
+    placements = []
+    for team, column in zip(teams, columns):
+        if column >= len(slots):
+            placements.append(Placement(team))
+            continue
+        mentor = slots[column][0]
+        placements.append(Placement(
+            team,
+            mentor,
+            preferred=team.proposal.preferred_mentor_id == mentor.id,
+            domain_match=bool(_words(team.proposal.domain) & expertise[mentor.id]),
+        ))
+
+    before = {m.id: m.other_teams for m in mentors}
+    after = dict(before)
+    for team in teams:
+        if team.mentor_id in before:
+            before[team.mentor_id] += 1
+    for placement in placements:
+        if placement.mentor is not None:
+            after[placement.mentor.id] += 1
+    loads = [(m, before[m.id], after[m.id], capacity[m.id]) for m in mentors]
+    return AssignmentPlan(placements, loads)
+
+
+def apply_assignment(department, assignments):
+    """
+    Save {team_id: mentor_id} for approved teams of the department with one
+    bulk_update. Unknown teams and mentors from other departments are ignored.
+    Returns the number of teams whose mentor changed.
+    """
+    mentor_ids = set(FacultyProfile.objects.filter(
+        department=department, id__in=assignments.values(),
+    ).values_list("id", flat=True))
+    with transaction.atomic():
+        teams = list(Team.objects.select_for_update().filter(
+            department=department,
+            proposal__status=ProjectProposal.Status.APPROVED,
+            id__in=assignments,
+        ).only("id", "batch", "mentor"))
+        changed = []
+        loads = Counter()  # mentor counters of core.stats
+        now = timezone.now()
+        for team in teams:
+            mentor_id = assignments[team.id]
+            if mentor_id in mentor_ids and team.mentor_id != mentor_id:
+                if team.mentor_id is not None:
+                    loads[department.id, team.batch_id, f"mentor.{team.mentor_id}"] -= 1
+                loads[department.id, team.batch_id, f"mentor.{mentor_id}"] += 1
+                team.mentor_id = mentor_id
+                team.updated_at = now  # bulk_update does not apply auto_now
+                changed.append(team)
+        Team.objects.bulk_update(changed, ["mentor", "updated_at"])
+        # bulk_update skips post_save
+        bump_team_versions(team.id for team in changed)
+        add_deltas(loads)
+    return len(changed)
+
+
+# ----- Hungarian algorithm -----
+
+def solve_assignment(cost):
+    """
+    Column chosen for each row of a rows x columns cost matrix (rows <= columns)
+    so that the total cost is minimal and no column is used twice.
+    """
+    if not cost:
+        return []
+    cost = np.asarray(cost, dtype=float)
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    owner = np.zeros(m + 1, dtype=int)  # owner[j]: row (1-based) using column j, 0 = free
+    way = np.zeros(m + 1, dtype=int)
+    for i in range(1, n + 1):
+        owner[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = owner[j0]
+            free = ~used[1:]
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            better = free & (reduced < minv[1:])
+            minv[1:][better] = reduced[better]
+            way[1:][better] = j0
+            candidates = np.where(free, minv[1:], np.inf)
+            j1 = int(candidates.argmin()) + 1
+            delta = candidates[j1 - 1]
+            done = np.flatnonzero(used)
+            u[owner[done]] += delta
+            v[done] -= delta
+            minv[1:][free] -= delta
+            j0 = j1
+            if owner[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            owner[j0] = owner[j1]
+            j0 = j1
+    result = [0] * n
+    for j in np.flatnonzero(owner[1:]):
+        result[owner[j + 1] - 1] = int(j)
+    return result
+
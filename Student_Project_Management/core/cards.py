@@ -0,0 +1,108 @@
+"""
+Cached team cards for the mentor and student dashboards.
+
+Every team has a version number in the cache. core.signals bumps it when the
+team, its members, its proposal, the proposal's documents or its reviews are
+saved (bulk writes call bump_team_versions themselves). A rendered card is
+cached under (template, team, version, viewer), so a changed team simply
+misses and its old cards age out; on a hit the view does not query the team
+at all. Names of people are not tracked: a renamed member shows up once the
+card expires (TEAM_CARD_CACHE_TIMEOUT).
+
+A version starts from the clock rather than 1, so a version lost to eviction
+never comes back to match an old card. Hits and misses are counted in the
+cache as well; see card_cache_stats() and the card_cache_stats command.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+STATS = ("hits", "misses")
+
+
+def _version_key(team_id):
+    return f"core:team-version:{team_id}"
+
+
+def _card_key(template_name, team_id, version, viewer):
+    return f"core:card:{template_name}:{team_id}:{version}:{viewer}"
+
+
+def _stats_key(name):
+    return f"core:cards:{name}"
+
+
+def team_versions(team_ids):
+    """{team id: version}, starting a version for teams that have none."""
+    keys = {_version_key(t): t for t in team_ids}
+    found = cache.get_many(keys)
+    versions = {keys[k]: v for k, v in found.items()}
+    missing = {k: time.time_ns() for k in keys if k not in found}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update({keys[k]: v for k, v in missing.items()})
+    return versions
+
+
+def bump_team_versions(team_ids):
+    """Invalidate the cached cards of the teams (now and again when the transaction commits)."""
+    team_ids = {t for t in team_ids if t is not None}
+    if not team_ids:
+        return
+    _bump(team_ids)
+    # a request that read the old rows before the commit may have cached them under the new version
+    transaction.on_commit(lambda: _bump(team_ids))
+
+
+def _bump(team_ids):
+    for team_id in team_ids:
+        try:
+            cache.incr(_version_key(team_id))
+        except ValueError:  # not cached (yet, or any more)
+            cache.set(_version_key(team_id), time.time_ns(), None)
+
+
+def render_team_cards(request, template_name, team_ids, load_teams, context=None, viewer=""):
+    """
+    Rendered cards for team_ids, in order. load_teams(ids) returns the teams
+    whose cards are not cached; each is rendered with template_name and
+    context plus "team". Pass viewer when the card differs per user.
+    """
+    team_ids = list(team_ids)
+    versions = team_versions(team_ids)
+    keys = {t: _card_key(template_name, t, versions[t], viewer) for t in team_ids}
+    html = cache.get_many(keys.values())
+    missing = [t for t in team_ids if keys[t] not in html]
+    if missing:
+        fresh = {
+            keys[team.id]: render_to_string(template_name, {**(context or {}), "team": team}, request)
+            for team in load_teams(missing)
+        }
+        cache.set_many(fresh, getattr(settings, "TEAM_CARD_CACHE_TIMEOUT", 3600))
+        html.update(fresh)
+    _count("hits", len(team_ids) - len(missing))
+    _count("misses", len(missing))
+    return [mark_safe(html[keys[t]]) for t in team_ids if keys[t] in html]
+
+
+def _count(name, n):
+    if not n:
+        return
+    try:
+        cache.incr(_stats_key(name), n)
+    except ValueError:
+        if not cache.add(_stats_key(name), n, None):
+            cache.incr(_stats_key(name), n)
+
+
+def card_cache_stats(reset=False):
+    """{"hits": n, "misses": n} since the last reset."""
+    keys = {_stats_key(name): name for name in STATS}
+    found = cache.get_many(keys)
+    if reset:
+        cache.delete_many(keys)
+    return {name: found.get(key, 0) for key, name in keys.items()}
@@ -0,0 +1,63 @@
+"""
+Conditional GET for the proposal list pages.
+
+Before running the page's queries, a list view computes a validator with one
+aggregate over the same filtered proposals: their count and the latest
+ProjectProposal.updated_at / Team.updated_at (the latter changes with the
+team's name or mentor). The ETag hashes that together with the user and the
+query string, so a browser that revalidates an unchanged list gets 304 Not
+Modified without the list query or the template render.
+
+There is no Last-Modified: the latest updated_at does not move when a listed
+proposal is deleted or leaves the filter, so If-Modified-Since would call a
+shorter list unchanged. The count in the ETag catches those.
+
+Flash messages are only shown by a full render, so a request with queued
+messages is always answered in full.
+"""
+import hashlib
+
+from django.contrib import messages
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+
+def list_validators(request, queryset):
+    """The ETag for a page listing queryset."""
+    state = queryset.order_by().aggregate(
+        count=Count("id"),
+        proposals=Max("updated_at"),
+        teams=Max("team__updated_at"),
+    )
+    key = "|".join(str(part) for part in (
+        request.user.pk,
+        request.get_full_path(),
+        state["count"],
+        state["proposals"] and state["proposals"].isoformat(),
+        state["teams"] and state["teams"].isoformat(),
+    ))
+    return quote_etag(hashlib.md5(key.encode(), usedforsecurity=False).hexdigest())
+
+
+def not_modified(request, etag):
+    """The 304 response when the browser's copy is current, else None."""
+    if request.method not in ("GET", "HEAD") or len(messages.get_messages(request)):
+        return None
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        _set_validators(response, etag)
+    return response
+
+
+def with_validators(response, etag):
+    """Attach the validators to a full response."""
+    if response.status_code == 200:
+        _set_validators(response, etag)
+    return response
+
+
+def _set_validators(response, etag):
+    response["ETag"] = etag
+    # per user, and always revalidated so changes show up on the next refresh
+    patch_cache_control(response, private=True, no_cache=True)
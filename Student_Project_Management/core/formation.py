@@ -0,0 +1,181 @@
+"""
+Automatic team formation for students who are still without a team.
+
+Unteamed students of a department and batch are split into pools of students
+who may be teammates (one pool, or one per section when
+ALLOW_CROSS_SECTION_TEAMS is off; see views.can_be_teammates). Each pool of n
+students becomes ceil(n / 4) teams of 3 or 4. Pools of 1, 2 or 5 students
+cannot be split that way and their leftover students are reported instead.
+
+Accepted invitations between unteamed students are soft preferences: students
+linked by them form groups that are kept together when they fit. Groups are
+placed largest first into the team with the least room that still fits them
+(best fit decreasing); a group that fits nowhere is split over the teams with
+the most room. Everything is created with bulk inserts in one transaction.
+"""
+import math
+from collections import Counter
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from .invitations import expire_pending
+from .models import Invitation, StudentProfile, Team
+from .stats import add_deltas, team_deltas
+from .teams import assign_students
+
+MIN_TEAM_SIZE = 3
+MAX_TEAM_SIZE = 4
+
+
+@dataclass
+class FormationPlan:
+    teams: list = field(default_factory=list)  # [[StudentProfile]], leader first
+    leftover: list = field(default_factory=list)  # students who could not be placed
+    kept: int = 0  # accepted invitations whose two students share a team
+    preferences: int = 0  # accepted invitations between unteamed students
+
+
+def team_sizes(n):
+    """Sizes (4s first) of ceil(n/4) teams of 3-4 for n students; [] if that is impossible."""
+    teams = math.ceil(n / MAX_TEAM_SIZE)
+    if n < MIN_TEAM_SIZE * teams:
+        return []
+    fours = n - MIN_TEAM_SIZE * teams
+    return [MAX_TEAM_SIZE] * fours + [MIN_TEAM_SIZE] * (teams - fours)
+
+
+def preference_groups(student_ids, links):
+    """Connected components of the invitation graph, each in a stable order."""
+    parent = {s: s for s in student_ids}
+
+    def find(s):
+        while parent[s] != s:
+            parent[s] = parent[parent[s]]
+            s = parent[s]
+        return s
+
+    for a, b in links:
+        if a in parent and b in parent:
+            parent[find(a)] = find(b)
+    groups = {}
+    for s in student_ids:
+        groups.setdefault(find(s), []).append(s)
+    return list(groups.values())
+
+
+def pack(groups, sizes):
+    """Place groups into bins of the given sizes (sum of sizes == number of students)."""
+    bins = [[] for _ in sizes]
+    room = list(sizes)
+    for group in sorted(groups, key=len, reverse=True):
+        fitting = [i for i in range(len(bins)) if room[i] >= len(group)]
+        if fitting:
+            i = min(fitting, key=lambda i: (room[i], i))
+            bins[i].extend(group)
+            room[i] -= len(group)
+            continue
+        rest = list(group)
+        while rest:  # split over the emptiest teams
+            i = max(range(len(bins)), key=lambda i: (room[i], -i))
+            take, rest = rest[:room[i]], rest[room[i]:]
+            bins[i].extend(take)
+            room[i] -= len(take)
+    return bins
+
+
+def unteamed(department, batch):
+    # a student still recorded as some team's leader cannot lead a new one; leave them to the coordinator
+    return StudentProfile.objects.filter(
+        department=department, batch=batch, current_team__isnull=True, leading_team__isnull=True,
+    )
+
+
+def plan_formation(department, batch):
+    """Teams for the unteamed students of a department and batch (nothing is saved)."""
+    students = list(
+        unteamed(department, batch).select_related("user", "class_section")
+        .order_by("class_section_id", "roll_number")
+    )
+    by_id = {s.id: s for s in students}
+    links = list(
+        Invitation.objects.filter(
+            status="ACCEPTED", from_student_id__in=by_id, to_student_id__in=by_id,
+        ).values_list("from_student_id", "to_student_id")
+    )
+    inviters = {a for a, _ in links}
+
+    if getattr(settings, "ALLOW_CROSS_SECTION_TEAMS", True):
+        pools = [students]
+    else:
+        sections = {}
+        for s in students:
+            sections.setdefault(s.class_section_id, []).append(s)
+        pools = list(sections.values())
+
+    plan = FormationPlan(preferences=len(links))
+    for pool in pools:
+        sizes = team_sizes(len(pool))
+        if not sizes:
+            plan.leftover.extend(pool)
+            continue
+        for members in pack(preference_groups([s.id for s in pool], links), sizes):
+            # an inviter leads the team when there is one (they started forming it)
+            members.sort(key=lambda s: (s not in inviters, by_id[s].roll_number))
+            plan.teams.append([by_id[s] for s in members])
+
+    team_of = {s.id: i for i, members in enumerate(plan.teams) for s in members}
+    plan.kept = sum(1 for a, b in links if a in team_of and team_of.get(a) == team_of.get(b))
+    return plan
+
+
+def create_teams(department, batch, coordinator=None):
+    """
+    Form and save the teams of plan_formation() in one transaction.
+    Returns the plan that was saved.
+    """
+    with transaction.atomic():
+        # lock the students; anyone who joins a team first is no longer unteamed
+        list(unteamed(department, batch).select_for_update(of=("self",)).values_list("id", flat=True))
+        plan = plan_formation(department, batch)
+        if not plan.teams:
+            return plan
+
+        first_number = Team.objects.filter(department=department, batch=batch).count() + 1
+        teams = [
+            Team(
+                name=f"{department.name} Team {first_number + i}",
+                department=department,
+                batch=batch,
+                # the section most members come from
+                class_section_id=Counter(s.class_section_id for s in members).most_common(1)[0][0],
+                team_leader=members[0],
+                coordinator=coordinator,
+            )
+            for i, members in enumerate(plan.teams)
+        ]
+        Team.objects.bulk_create(teams, batch_size=500)
+        # bulk_create does not return ids on MySQL; team_leader is unique
+        team_ids = dict(
+            Team.objects.filter(team_leader_id__in=[m[0].id for m in plan.teams])
+            .values_list("team_leader_id", "id")
+        )
+        assignments = {s.id: team_ids[members[0].id] for members in plan.teams for s in members}
+        # bulk_create skips m2m_changed, so current_team is set by assign_students
+        Team.members.through.objects.bulk_create(
+            [Team.members.through(team_id=t, studentprofile_id=s) for s, t in assignments.items()],
+            batch_size=1000,
+        )
+        assign_students(assignments)
+        # bulk_create skips the signals core.stats counts with
+        deltas = Counter({(department.id, batch.id, "members"): len(assignments)})
+        for team in teams:
+            deltas.update(team_deltas(department.id, batch.id, team.class_section_id, None))
+        add_deltas(deltas)
+        # what is left of their invitations is moot now
+        expire_pending(Invitation.objects.filter(
+            Q(from_student_id__in=assignments) | Q(to_student_id__in=assignments)
+        ))
+    return plan
@@ -0,0 +1,33 @@
+"""
+Password hashing spread over a process pool.
+
+PBKDF2 is deliberately slow (~tens of ms per hash), so hashing the initial
+passwords of a few thousand new users dominates a roster import. This module
+imports no models, so pool workers can load it under any multiprocessing start
+method; they only need DJANGO_SETTINGS_MODULE, which they inherit.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+
+# below this many passwords, starting the workers costs more than it saves
+PARALLEL_HASH_THRESHOLD = 32
+
+
+def _hash_chunk(passwords):
+    return [make_password(p) for p in passwords]
+
+
+def hash_passwords(passwords, workers=None):
+    """Return make_password(p) for every password, in order (None -> unusable)."""
+    passwords = list(passwords)
+    workers = workers or getattr(settings, "PASSWORD_HASH_WORKERS", None) or os.cpu_count() or 1
+    if workers <= 1 or len(passwords) < PARALLEL_HASH_THRESHOLD:
+        return _hash_chunk(passwords)
+
+    size = -(-len(passwords) // (workers * 4))  # a few chunks per worker evens out the load
+    chunks = [passwords[i:i + size] for i in range(0, len(passwords), size)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [hashed for chunk in pool.map(_hash_chunk, chunks) for hashed in chunk]
@@ -0,0 +1,136 @@
+"""
+Invitation state transitions.
+
+An invitation leaves PENDING through a single conditional UPDATE
+(... WHERE status = 'PENDING'), so when two requests race exactly one of
+them moves it and the other sees a row count of 0 instead of acting on a
+stale read.
+
+The rules that span several rows are serialized on the recipient's
+StudentProfile row (SELECT ... FOR UPDATE): a student holds at most
+MAX_PENDING_INVITATIONS pending invitations, and accepting one expires the
+others. A sender can have only one pending invitation to the same student;
+the invite_one_pending_pair unique constraint enforces that in the database.
+
+Invitations nobody answers are expired by expire_stale_invitations() (the
+expire_invitations command, run from cron), which walks the table in short
+primary key ranges so it never holds many row locks at once.
+
+Every transition out of PENDING goes through these functions (or
+expire_pending) so the pending count on the HOD dashboard (core.stats) moves
+with it.
+"""
+import datetime
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Invitation, StudentProfile
+from .stats import add_deltas
+
+MAX_PENDING_INVITATIONS = 5
+SWEEP_BATCH_SIZE = 1000
+
+
+class InvitationError(Exception):
+    """The invitation cannot be sent; str() is the message for the user."""
+
+
+def lock_student(student_id):
+    StudentProfile.objects.select_for_update(of=("self",)).filter(id=student_id).values_list("id").first()
+
+
+def send_invitation(sender, target):
+    """
+    Invite target from sender. Returns False if sender already has a pending
+    invitation to target; raises InvitationError if target has too many.
+    Call it inside transaction.atomic() with target locked (lock_student or
+    select_for_update on the lookup).
+    """
+    pending = list(
+        Invitation.objects.filter(to_student=target, status="PENDING").values_list("from_student_id", flat=True)
+    )
+    if sender.id in pending:
+        return False
+    if len(pending) >= MAX_PENDING_INVITATIONS:
+        raise InvitationError(f"This student already has {MAX_PENDING_INVITATIONS} pending invitations.")
+    Invitation.objects.create(from_student=sender, to_student=target)
+    return True
+
+
+def accept_invitation(invite_id, student):
+    """Accept a pending invitation to student and expire their others. Returns False if it was not pending."""
+    with transaction.atomic():
+        lock_student(student.id)
+        accepted = Invitation.objects.filter(
+            id=invite_id, to_student=student, status="PENDING",
+        ).update(status="ACCEPTED")
+        if accepted:
+            add_deltas({(student.department_id, student.batch_id, "invitations.pending"): -1})
+            expire_pending(Invitation.objects.filter(to_student=student))
+    return bool(accepted)
+
+
+def reject_invitation(invite_id, student):
+    """Reject a pending invitation to student. Returns False if it was not pending."""
+    with transaction.atomic():
+        rejected = Invitation.objects.filter(
+            id=invite_id, to_student=student, status="PENDING",
+        ).update(status="REJECTED")
+        if rejected:
+            add_deltas({(student.department_id, student.batch_id, "invitations.pending"): -1})
+    return bool(rejected)
+
+
+def expire_pending(invitations):
+    """Expire the pending invitations among `invitations`. Returns how many."""
+    with transaction.atomic():
+        rows = list(
+            invitations.filter(status="PENDING").select_for_update(of=("self",))
+            .values_list("id", "to_student__department_id", "to_student__batch_id")
+        )
+        if not rows:
+            return 0
+        # locked, so every row is still pending
+        Invitation.objects.filter(id__in=[r[0] for r in rows]).update(status="EXPIRED")
+        deltas = Counter()
+        for _, department_id, batch_id in rows:
+            deltas[department_id, batch_id, "invitations.pending"] -= 1
+        add_deltas(deltas)
+    return len(rows)
+
+
+def stale_invitations(max_age=None):
+    """Pending invitations older than max_age (INVITATION_MAX_AGE_DAYS) or between students already in a team."""
+    if max_age is None:
+        max_age = datetime.timedelta(days=getattr(settings, "INVITATION_MAX_AGE_DAYS", 14))
+    return Invitation.objects.filter(status="PENDING").filter(
+        Q(created_at__lt=timezone.now() - max_age)
+        | Q(from_student__current_team__isnull=False)
+        | Q(to_student__current_team__isnull=False)
+    )
+
+
+def expire_stale_invitations(max_age=None, batch_size=SWEEP_BATCH_SIZE, pause=0, dry_run=False):
+    """
+    Expire stale_invitations() one primary key range of at most batch_size
+    pending rows at a time, each range in its own short statement, sleeping
+    `pause` seconds in between. Returns the number expired (or that would be).
+    """
+    stale = stale_invitations(max_age)
+    pending = Invitation.objects.filter(status="PENDING").order_by("id").values_list("id", flat=True)
+    expired = 0
+    last = 0
+    while True:
+        ids = list(pending.filter(id__gt=last)[:batch_size])
+        if not ids:
+            return expired
+        in_range = stale.filter(id__gte=ids[0], id__lte=ids[-1])
+        expired += in_range.count() if dry_run else expire_pending(in_range)
+        last = ids[-1]
+        if pause and len(ids) == batch_size:
+            time.sleep(pause)
@@ -0,0 +1,95 @@
+import asyncio
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core.models import FacultyProfile, Team
+
+# (url name, role of the user requesting it)
+VIEWS = [
+    ("student_dashboard", "student"),
+    ("advisor_dashboard", "advisor"),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the async dashboards as a sample user, served the WSGI way (test Client) and the "
+        "ASGI way (AsyncClient), with their independent queries run one after another and "
+        "concurrently (DASHBOARD_PARALLEL_QUERIES). Logs the sample users in, so it writes sessions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50, help="Timed requests per combination.")
+        parser.add_argument("--view", action="append", help="Only time these url names.")
+
+    def handle(self, *args, **options):
+        if options["requests"] < 2:
+            raise CommandError("--requests must be at least 2.")
+        users = self.sample_users()
+        with override_settings(ALLOWED_HOSTS=["testserver"]):
+            for url_name, role in VIEWS:
+                if options["view"] and url_name not in options["view"]:
+                    continue
+                if users[role] is None:
+                    self.stdout.write(self.style.WARNING(f"{url_name}: skipped, no sample {role} in the database"))
+                    continue
+                self.stdout.write(self.style.MIGRATE_HEADING(url_name))
+                for parallel in (False, True):
+                    with override_settings(DASHBOARD_PARALLEL_QUERIES=parallel):
+                        queries = "concurrent" if parallel else "sequential"
+                        self.report("WSGI", queries, self.time_wsgi(url_name, users[role], options["requests"]))
+                        self.report("ASGI", queries, asyncio.run(
+                            self.time_asgi(url_name, users[role], options["requests"])
+                        ))
+
+    def sample_users(self):
+        team = Team.objects.select_related("team_leader__user").first()
+        advisor = FacultyProfile.objects.select_related("user").filter(is_advisor=True).first()
+        return {
+            "student": team.team_leader.user if team else None,
+            "advisor": advisor.user if advisor else None,
+        }
+
+    def time_wsgi(self, url_name, user, requests):
+        client = Client()
+        client.force_login(user)
+        url = reverse(url_name)
+        client.get(url)  # warm the caches
+        timings = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            response = client.get(url)
+            timings.append(time.perf_counter() - started)
+            self.check_status(url_name, response)
+        client.logout()
+        return timings
+
+    async def time_asgi(self, url_name, user, requests):
+        client = AsyncClient()
+        await client.aforce_login(user)
+        url = reverse(url_name)
+        await client.get(url)
+        timings = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            response = await client.get(url)
+            timings.append(time.perf_counter() - started)
+            self.check_status(url_name, response)
+        await client.alogout()
+        return timings
+
+    def check_status(self, url_name, response):
+        if response.status_code != 200:
+            raise CommandError(f"{url_name} returned {response.status_code}.")
+
+    def report(self, server, queries, timings):
+        ms = [t * 1000 for t in timings]
+        self.stdout.write(
+            f"  {server} {queries:<10}  mean {statistics.mean(ms):7.1f} ms"
+            f"  p50 {statistics.median(ms):7.1f} ms  p95 {statistics.quantiles(ms, n=20)[18]:7.1f} ms"
+        )
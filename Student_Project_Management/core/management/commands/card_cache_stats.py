@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from core.cards import card_cache_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Show how often dashboard team cards were served from the cache. Counters live in the "
+        "cache, so with the default local-memory cache they only cover this process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Start counting from zero again.")
+
+    def handle(self, *args, **options):
+        stats = card_cache_stats(reset=options["reset"])
+        total = stats["hits"] + stats["misses"]
+        ratio = f"{stats['hits'] / total:.1%}" if total else "n/a"
+        self.stdout.write(f"Team cards: {stats['hits']} hits, {stats['misses']} misses (hit ratio {ratio}).")
@@ -0,0 +1,34 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.invitations import SWEEP_BATCH_SIZE, expire_stale_invitations
+
+
+class Command(BaseCommand):
+    help = (
+        "Expire pending invitations older than INVITATION_MAX_AGE_DAYS, or whose sender or recipient "
+        "is already in a team. Works in small primary key ranges; safe to run from cron at any time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=float,
+            default=getattr(settings, "INVITATION_MAX_AGE_DAYS", 14),
+            help="Age after which a pending invitation expires.",
+        )
+        parser.add_argument("--batch-size", type=int, default=SWEEP_BATCH_SIZE)
+        parser.add_argument("--sleep", type=float, default=0, help="Seconds to pause between batches.")
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would be expired.")
+
+    def handle(self, *args, **options):
+        count = expire_stale_invitations(
+            max_age=datetime.timedelta(days=options["days"]),
+            batch_size=options["batch_size"],
+            pause=options["sleep"],
+            dry_run=options["dry_run"],
+        )
+        verb = "Would expire" if options["dry_run"] else "Expired"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {count} stale invitation(s)."))
@@ -0,0 +1,150 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from core.models import User, FacultyProfile, Team
+
+
+# (url name, role of the user requesting it, needs a team_id)
+VIEWS = [
+    ("student_dashboard", "student", False),
+    ("create_team", "student", False),
+    ("proposal", "student", False),
+    ("mentor_dashboard", "mentor", False),
+    ("advisor_dashboard", "advisor", False),
+    ("coordinator_proposals", "coordinator", False),
+    ("coordinator_team_reviews", "coordinator", True),
+    ("hod_proposal_list", "hod", False),
+    ("hod_faculty_list", "hod", False),
+]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Request every dashboard/list view as a sample user, run EXPLAIN on each "
+        "SELECT it issues and report full scans, filesorts and temporary tables. "
+        "Nothing is written: the whole run is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--view", action="append", help="Only check these url names.")
+        parser.add_argument("--verbose-plans", action="store_true", help="Print every plan, not only flagged ones.")
+        parser.add_argument(
+            "--fail-on-issues",
+            action="store_true",
+            help="Exit with an error if any flagged plan is found (for CI / pre-deploy checks).",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ("mysql", "sqlite"):
+            raise CommandError(f"Plan analysis is not implemented for {connection.vendor}.")
+
+        self.issues = 0
+        try:
+            with transaction.atomic(), override_settings(ALLOWED_HOSTS=["testserver"]):
+                self.check_views(options)
+                raise Rollback  # force_login writes sessions/last_login
+        except Rollback:
+            pass
+
+        if self.issues:
+            message = f"{self.issues} flagged query plan(s)."
+            if options["fail_on_issues"]:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS("No full scans, filesorts or temporary tables found."))
+
+    # ----- sample users -----
+
+    def sample_users(self):
+        team = Team.objects.select_related("team_leader__user", "mentor__user").filter(
+            mentor__isnull=False
+        ).first() or Team.objects.select_related("team_leader__user").first()
+        faculty = FacultyProfile.objects.select_related("user")
+        users = {
+            "student": team.team_leader.user if team else None,
+            "mentor": team.mentor.user if team and team.mentor else None,
+            "advisor": getattr(faculty.filter(is_advisor=True).first(), "user", None),
+            "coordinator": getattr(faculty.filter(is_coordinator=True).first(), "user", None),
+            "hod": getattr(faculty.filter(is_hod=True, user__user_type=User.UserType.HOD).first(), "user", None),
+        }
+        coordinator = faculty.filter(is_coordinator=True).first()
+        review_team = coordinator and Team.objects.filter(department_id=coordinator.department_id).first()
+        return users, review_team
+
+    # ----- plans -----
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}")
+            columns = [c[0] for c in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def flags(self, plan):
+        found = set()
+        for row in plan:
+            if connection.vendor == "mysql":
+                extra = row.get("Extra") or ""
+                if row.get("type") == "ALL":
+                    found.add(f"full scan of {row.get('table')} (~{row.get('rows')} rows)")
+                if "Using filesort" in extra:
+                    found.add("filesort")
+                if "Using temporary" in extra:
+                    found.add("temporary table")
+            else:
+                detail = row.get("detail", "")
+                if detail.startswith("SCAN ") and " USING " not in detail:
+                    found.add(f"full scan: {detail}")
+                if "TEMP B-TREE FOR ORDER BY" in detail:
+                    found.add("filesort (temp b-tree for ORDER BY)")
+                if "TEMP B-TREE FOR DISTINCT" in detail or "TEMP B-TREE FOR GROUP BY" in detail:
+                    found.add("temporary table")
+        return sorted(found)
+
+    def format_plan(self, plan):
+        if connection.vendor == "mysql":
+            return [
+                f"{r.get('table')}: type={r.get('type')} key={r.get('key')} rows={r.get('rows')} {r.get('Extra') or ''}"
+                for r in plan
+            ]
+        return [r.get("detail", "") for r in plan]
+
+    def check_views(self, options):
+        users, review_team = self.sample_users()
+        client = Client()
+
+        for url_name, role, needs_team in VIEWS:
+            if options["view"] and url_name not in options["view"]:
+                continue
+            user = users.get(role)
+            if user is None or (needs_team and review_team is None):
+                self.stdout.write(self.style.WARNING(f"{url_name}: skipped, no sample {role} in the database"))
+                continue
+
+            client.force_login(user)
+            url = reverse(url_name, kwargs={"team_id": review_team.id} if needs_team else None)
+            with CaptureQueriesContext(connection) as ctx:
+                response = client.get(url)
+
+            selects = [q["sql"] for q in ctx.captured_queries if q["sql"].lstrip().upper().startswith("SELECT")]
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{url_name} ({url}) -> {response.status_code}, {len(ctx.captured_queries)} queries"
+            ))
+            for sql in selects:
+                plan = self.explain(sql)
+                flags = self.flags(plan)
+                if not flags and not options["verbose_plans"]:
+                    continue
+                if flags:
+                    self.issues += 1
+                    self.stdout.write(self.style.WARNING(f"  ! {', '.join(flags)}"))
+                self.stdout.write(f"    {sql[:300]}{'…' if len(sql) > 300 else ''}")
+                for line in self.format_plan(plan):
+                    self.stdout.write(f"      {line}")
@@ -0,0 +1,91 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.models import ProposalDocument
+from core.storage import blob_digest, document_storage
+
+BATCH_SIZE = 1000
+
+
+def batched(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete proposal document blobs (files and thumbnails) that no ProposalDocument references. "
+        "Blobs written or re-used within the grace period are kept, so uploads "
+        "in progress are never affected."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--grace-hours", type=float, default=24)
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would be deleted.")
+        parser.add_argument(
+            "--migrate-legacy",
+            action="store_true",
+            help="First move documents stored under the old proposals/<team>/ layout into the blob store.",
+        )
+
+    def handle(self, *args, **options):
+        if options["migrate_legacy"]:
+            self.migrate_legacy(options["dry_run"])
+
+        cutoff = time.time() - options["grace_hours"] * 3600
+        removed = kept = freed = 0
+        candidates = (name for name, mtime in document_storage.iter_blobs() if mtime < cutoff)
+        for names in batched(candidates, BATCH_SIZE):
+            referenced = set(
+                ProposalDocument.objects.filter(file__in=names).values_list("file", flat=True)
+            ) | set(
+                ProposalDocument.objects.filter(thumbnail__in=names).values_list("thumbnail", flat=True)
+            )
+            for name in names:
+                if name in referenced:
+                    kept += 1
+                    continue
+                removed += 1
+                freed += document_storage.size(name)
+                if not options["dry_run"]:
+                    document_storage.delete(name)
+
+        verb = "Would delete" if options["dry_run"] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {removed} unreferenced blob(s), {freed / 1024 / 1024:.1f} MiB; {kept} past the grace period still in use."
+        ))
+
+    def migrate_legacy(self, dry_run):
+        legacy = [
+            (doc_id, name)
+            for doc_id, name in ProposalDocument.objects.values_list("id", "file").iterator()
+            if not blob_digest(name)
+        ]
+        moved = missing = 0
+        old_names = set()
+        for doc_id, name in legacy:
+            if not document_storage.exists(name):
+                missing += 1
+                continue
+            if not dry_run:
+                with document_storage.open(name) as old:
+                    new_name = document_storage.save(name, old)
+                ProposalDocument.objects.filter(id=doc_id).update(file=new_name)
+            old_names.add(name)
+            moved += 1
+
+        if not dry_run:
+            still_used = set(ProposalDocument.objects.filter(file__in=old_names).values_list("file", flat=True))
+            for name in old_names - still_used:
+                document_storage.delete(name)
+
+        self.stdout.write(
+            f"Legacy documents: {moved} moved into the blob store, {missing} missing on disk."
+        )
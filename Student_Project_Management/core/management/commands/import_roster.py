@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.roster import RosterError, import_roster
+
+
+class Command(BaseCommand):
+    help = (
+        "Create or update students (CSV with roll_number) or faculty (CSV with "
+        "employee_id), plus any departments, batches and sections they reference. "
+        "Re-importing a file only writes the rows that changed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("files", nargs="+", help="CSV files; faculty files should come before student files.")
+        parser.add_argument(
+            "--default-password",
+            help="Initial password for new users without a password column value "
+                 "(without one they get an unusable password).",
+        )
+        parser.add_argument("--workers", type=int, help="Processes used to hash passwords (default: CPU count).")
+        parser.add_argument("--dry-run", action="store_true", help="Validate and report, then roll back.")
+
+    def handle(self, *args, **options):
+        for path in options["files"]:
+            started = time.monotonic()
+            try:
+                with open(path, newline="", encoding="utf-8-sig") as csvfile:
+                    result = import_roster(
+                        csvfile,
+                        default_password=options["default_password"],
+                        workers=options["workers"],
+                        dry_run=options["dry_run"],
+                    )
+            except OSError as exc:
+                raise CommandError(f"{path}: {exc}")
+            except RosterError as exc:
+                for error in exc.errors:
+                    self.stderr.write(f"{path}: {error}")
+                raise CommandError(f"{path}: nothing imported ({len(exc.errors)} problem(s)).")
+
+            suffix = " (dry run, rolled back)" if options["dry_run"] else ""
+            self.stdout.write(self.style.SUCCESS(
+                f"{path}: {result} in {time.monotonic() - started:.1f}s{suffix}"
+            ))
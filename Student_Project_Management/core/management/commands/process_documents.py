@@ -0,0 +1,91 @@
+import os
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.pdf import inspect_pdf
+from core.processing import claim_documents, reuse_result, save_failure, save_result
+from core.storage import document_storage
+
+
+class Command(BaseCommand):
+    help = (
+        "Validate uploaded proposal PDFs, extract their page count and text and "
+        "render a thumbnail, on a local process pool. Runs until stopped; use "
+        "--once to drain the queue and exit (e.g. from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Worker processes (default: CPU count; 0 processes in this process).",
+        )
+        parser.add_argument("--batch-size", type=int, help="Documents claimed at a time (default: 4 per worker).")
+        parser.add_argument("--once", action="store_true", help="Exit when no documents are waiting.")
+        parser.add_argument("--poll-interval", type=float, default=5.0, help="Seconds between checks when idle.")
+
+    def handle(self, *args, **options):
+        workers = options["workers"]
+        batch_size = options["batch_size"] or max(workers, 1) * 4
+        if workers > 0:
+            # forked workers must not inherit (and later close) the parent's database connections
+            connections.close_all()
+            pool = ProcessPoolExecutor(max_workers=workers)
+        else:
+            pool = InlineExecutor()
+
+        processed = 0
+        with pool:
+            while True:
+                documents = claim_documents(batch_size)
+                if not documents:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+                    continue
+                processed += self.process_batch(pool, documents)
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} document(s)."))
+
+    def process_batch(self, pool, documents):
+        futures = {}
+        for document in documents:
+            if reuse_result(document):
+                self.report(document, "reused")
+                continue
+            path = document_storage.path(document.file.name)
+            futures[pool.submit(inspect_pdf, path)] = document
+
+        for future in as_completed(futures):
+            document = futures[future]
+            try:
+                result = future.result()
+            except Exception as exc:  # anything raised while inspecting marks the document FAILED
+                save_failure(document, exc)
+            else:
+                save_result(document, result)
+            self.report(document)
+        return len(documents)
+
+    def report(self, document, note=""):
+        detail = document.processing_error or note
+        self.stdout.write(
+            f"  document {document.id}: {document.get_processing_status_display()}"
+            f"{f' ({detail})' if detail else ''}"
+        )
+
+
+class InlineExecutor(Executor):
+    """--workers 0: run in this process (debugging, tests)."""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
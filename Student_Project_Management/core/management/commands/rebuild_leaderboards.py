@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Review
+from core.scoring import refresh_results
+
+
+class Command(BaseCommand):
+    help = "Recompute every review's weighted score (after bulk loads, restores or direct score edits)."
+
+    def handle(self, *args, **options):
+        count = refresh_results(Review.objects.all())
+        self.stdout.write(self.style.SUCCESS(f"Refreshed results of {count} reviews."))
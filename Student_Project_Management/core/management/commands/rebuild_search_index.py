@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from core.models import ProjectProposal
+from core.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the proposal full-text search index (after bulk loads or restores)."
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"{type(backend).__name__}: indexed {ProjectProposal.objects.count()} proposals."
+        ))
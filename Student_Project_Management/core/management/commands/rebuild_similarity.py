@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.similarity import rebuild_similarity
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the near-duplicate signatures and similar-proposal pairs of all "
+        "proposals (after bulk loads, restores or a change to core.similarity's parameters)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Rows read and written at a time.")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        proposals, pairs = rebuild_similarity(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Signed {proposals} proposals, found {pairs} similar pair(s) in {time.monotonic() - started:.1f}s."
+        ))
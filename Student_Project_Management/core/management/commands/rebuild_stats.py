@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the HOD dashboard statistics (after migrating, bulk loads, restores or direct edits)."
+
+    def handle(self, *args, **options):
+        count = rebuild_stats()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} department statistics."))
@@ -0,0 +1,386 @@
+import datetime
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core import stats
+from core.models import (
+    User,
+    Department,
+    Batch,
+    ClassSection,
+    FacultyProfile,
+    StudentProfile,
+    Team,
+    Invitation,
+    ProjectProposal,
+    ProposalDocument,
+    Review,
+    ReviewRubric,
+)
+from core.search import get_search_backend
+from core.similarity import rebuild_similarity
+from core.storage import document_storage
+
+
+FIRST_NAMES = [
+    "Aarav", "Aditi", "Arjun", "Bhavya", "Deepak", "Divya", "Gokul", "Harini",
+    "Ishaan", "Janani", "Karthik", "Kavya", "Lakshmi", "Manoj", "Meera", "Naveen",
+    "Nisha", "Pranav", "Priya", "Rahul", "Revathi", "Sanjay", "Sneha", "Tarun",
+    "Uma", "Varun", "Vidya", "Yamini",
+]
+LAST_NAMES = [
+    "Anand", "Balaji", "Chandran", "Devaraj", "Ganesh", "Iyer", "Krishnan",
+    "Kumar", "Mohan", "Nair", "Pillai", "Raman", "Reddy", "Sharma", "Subramani",
+    "Venkat",
+]
+DOMAINS = [
+    "Machine Learning", "Web Development", "IoT", "Cyber Security", "Cloud Computing",
+    "Embedded Systems", "Data Analytics", "Blockchain", "Computer Vision", "NLP",
+]
+WORDS = [
+    "smart", "secure", "adaptive", "real-time", "distributed", "low-cost", "automated",
+    "campus", "health", "traffic", "energy", "water", "attendance", "library", "crop",
+    "monitoring", "prediction", "detection", "platform", "assistant", "system",
+]
+RUBRICS = [("Presentation", 30), ("Implementation", 40), ("Documentation", 30)]
+PANEL_SIZE = 3
+SESSIONS_PER_DAY = 4  # review sittings per day (Review.session)
+
+PLACEHOLDER_PDF = b"%PDF-1.4\n% synthetic placeholder\n%%EOF\n"
+PLACEHOLDER_NAME = "placeholder.pdf"
+
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with a deterministic synthetic college "
+        "(departments, batches, sections, faculty, students, teams, proposals, "
+        "documents, invitations and reviews) for load and scale testing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--departments", type=int, default=3)
+        parser.add_argument("--batches", type=int, default=2)
+        parser.add_argument("--sections", type=int, default=3, help="Sections per department and batch.")
+        parser.add_argument("--students", type=int, default=60, help="Students per section.")
+        parser.add_argument("--faculty", type=int, default=25, help="Faculty per department.")
+        parser.add_argument("--team-size", type=int, default=4)
+        parser.add_argument(
+            "--teamed",
+            type=float,
+            default=0.85,
+            help="Fraction of students placed in a team (the rest get pending invitations).",
+        )
+        parser.add_argument("--first-year", type=int, default=2024, help="Start year of the oldest batch.")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument("--password", default="password", help="Password set on every synthetic user.")
+        parser.add_argument("--prefix", default="SYN", help="Prefix for department names and usernames.")
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete previously generated data with the same prefix first.",
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.chunk_size = options["chunk_size"]
+        self.prefix = options["prefix"].upper()
+        self.user_prefix = f"{self.prefix.lower()}_"
+        self.password = make_password(options["password"])  # hashed once, shared by every user
+        self.booked = {}  # faculty id -> {(date, session)} they sit on a panel in
+
+        if options["clear"]:
+            self.clear()
+        elif Department.objects.filter(name__startswith=self.prefix).exists():
+            raise CommandError(
+                f"Departments with prefix {self.prefix!r} already exist; use --clear to regenerate."
+            )
+
+        started = time.monotonic()
+        with transaction.atomic():
+            departments = self.create_departments(options["departments"])
+            batches = self.create_batches(options["first_year"], options["batches"])
+            for department in departments:
+                faculty = self.create_faculty(department, options["faculty"])
+                for batch in batches:
+                    self.create_cohort(department, batch, faculty, options)
+            # bulk_create skips the post_save signals that maintain the search
+            # index, the near-duplicate signatures and the department statistics
+            get_search_backend().rebuild()
+            rebuild_similarity()
+            stats.rebuild_stats(departments)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Synthetic college generated in {time.monotonic() - started:.1f}s: "
+            f"{StudentProfile.objects.filter(department__name__startswith=self.prefix).count()} students, "
+            f"{Team.objects.filter(department__name__startswith=self.prefix).count()} teams."
+        ))
+
+    # ----- helpers -----
+
+    def bulk_create(self, model, objs):
+        for chunk in chunked(objs, self.chunk_size):
+            model.objects.bulk_create(chunk, batch_size=self.chunk_size)
+
+    def id_map(self, queryset, key):
+        """bulk_create does not return primary keys on MySQL, so read them back by a unique key."""
+        return dict(queryset.values_list(key, "id").iterator(chunk_size=self.chunk_size))
+
+    def book_panel(self, faculty, day, size):
+        """
+        ((date, session), panel ids) for the first slot from `day` on with
+        `size` free faculty; the panel is drawn from them, so nobody is
+        double-booked (core.scheduling's rule).
+        """
+        while True:
+            for session in range(1, SESSIONS_PER_DAY + 1):
+                slot = (day, session)
+                free = [f.id for f in faculty if slot not in self.booked.get(f.id, ())]
+                if len(free) >= size:
+                    panel = self.rng.sample(free, size)
+                    for faculty_id in panel:
+                        self.booked.setdefault(faculty_id, set()).add(slot)
+                    return slot, panel
+            day += datetime.timedelta(days=1)
+
+    def person_name(self):
+        return self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+
+    def clear(self):
+        self.stdout.write(f"Deleting synthetic data with prefix {self.prefix!r}...")
+        # the counters are deleted with the departments, so skip their per-row deltas
+        with transaction.atomic(), stats.paused():
+            # teams first: Team.team_leader protects the student profiles
+            Team.objects.filter(department__name__startswith=self.prefix).delete()
+            Department.objects.filter(name__startswith=self.prefix).delete()
+            Batch.objects.filter(name__startswith=self.prefix).delete()
+            User.objects.filter(username__startswith=self.user_prefix).delete()
+
+    def create_users(self, usernames, user_type):
+        users = []
+        for username in usernames:
+            first, last = self.person_name()
+            users.append(User(
+                username=username,
+                first_name=first,
+                last_name=last,
+                email=f"{username}@example.edu",
+                user_type=user_type,
+                password=self.password,
+            ))
+        self.bulk_create(User, users)
+        return self.id_map(User.objects.filter(username__in=usernames), "username")
+
+    # ----- generators -----
+
+    def create_departments(self, count):
+        self.bulk_create(Department, [
+            Department(name=f"{self.prefix}{i:02d}", full_name=f"Synthetic Department {i}")
+            for i in range(1, count + 1)
+        ])
+        return list(Department.objects.filter(name__startswith=self.prefix).order_by("name"))
+
+    def create_batches(self, first_year, count):
+        self.bulk_create(Batch, [
+            Batch(name=f"{self.prefix}-{year}-{year + 1}", start_year=year, end_year=year + 1)
+            for year in range(first_year, first_year + count)
+        ])
+        return list(Batch.objects.filter(name__startswith=self.prefix).order_by("start_year"))
+
+    def create_faculty(self, department, count):
+        usernames = [f"{self.user_prefix}{department.name.lower()}_f{i:04d}" for i in range(count)]
+        # first faculty is the HOD; the next few are coordinators and advisors
+        user_ids = self.create_users(usernames[:1], User.UserType.HOD)
+        user_ids.update(self.create_users(usernames[1:], User.UserType.FACULTY))
+
+        profiles = []
+        for i, username in enumerate(usernames):
+            profiles.append(FacultyProfile(
+                user_id=user_ids[username],
+                department=department,
+                employee_id=f"{department.name}-E{i:04d}",
+                is_hod=(i == 0),
+                is_coordinator=(1 <= i <= 2),
+                is_advisor=(3 <= i <= 5),
+            ))
+        self.bulk_create(FacultyProfile, profiles)
+        return list(FacultyProfile.objects.filter(department=department).order_by("employee_id"))
+
+    def create_cohort(self, department, batch, faculty, options):
+        """Sections, students, teams, invitations, proposals, documents and reviews for one dept+batch."""
+        sections = [
+            ClassSection(department=department, batch=batch, name=f"{department.name}-{chr(ord('A') + i)}")
+            for i in range(options["sections"])
+        ]
+        self.bulk_create(ClassSection, sections)
+        sections = list(ClassSection.objects.filter(department=department, batch=batch).order_by("name"))
+
+        # students
+        tag = f"{department.name}{batch.start_year % 100:02d}"
+        rolls_by_section = {}
+        usernames, rolls = [], []
+        for section in sections:
+            rolls_by_section[section.id] = []
+            for i in range(options["students"]):
+                roll = f"{tag}{section.name[-1]}{i:04d}"
+                rolls_by_section[section.id].append(roll)
+                rolls.append(roll)
+                usernames.append(f"{self.user_prefix}{roll.lower()}")
+
+        user_ids = self.create_users(usernames, User.UserType.STUDENT)
+        students = []
+        for section in sections:
+            for roll in rolls_by_section[section.id]:
+                students.append(StudentProfile(
+                    user_id=user_ids[f"{self.user_prefix}{roll.lower()}"],
+                    department=department,
+                    class_section=section,
+                    batch=batch,
+                    roll_number=roll,
+                    semester=7,
+                ))
+        self.bulk_create(StudentProfile, students)
+        student_ids = self.id_map(StudentProfile.objects.filter(department=department, batch=batch), "roll_number")
+
+        # teams: shuffle each section, group the teamed fraction into teams
+        team_size = options["team_size"]
+        mentors = [f for f in faculty if not f.is_hod]
+        groups, loose = [], []
+        for section in sections:
+            section_rolls = list(rolls_by_section[section.id])
+            self.rng.shuffle(section_rolls)
+            teamed = int(len(section_rolls) * options["teamed"]) // team_size * team_size
+            for start in range(0, teamed, team_size):
+                groups.append((section, section_rolls[start:start + team_size]))
+            loose.extend(section_rolls[teamed:])
+
+        teams = []
+        for n, (section, members) in enumerate(groups, start=1):
+            teams.append(Team(
+                name=f"{section.name} Team {n}",
+                department=department,
+                batch=batch,
+                class_section=section,
+                team_leader_id=student_ids[members[0]],
+                mentor=self.rng.choice(mentors) if self.rng.random() < 0.6 else None,
+                coordinator=faculty[1] if len(faculty) > 1 else None,
+                team_id_code=f"{tag}-T{n:04d}",
+            ))
+        self.bulk_create(Team, teams)
+        team_ids = self.id_map(Team.objects.filter(department=department, batch=batch), "team_leader_id")
+
+        memberships, invitations = [], []
+        for section, members in groups:
+            leader_id = student_ids[members[0]]
+            team_id = team_ids[leader_id]
+            for roll in members:
+                memberships.append(Team.members.through(team_id=team_id, studentprofile_id=student_ids[roll]))
+                if roll != members[0]:
+                    invitations.append(Invitation(
+                        from_student_id=leader_id,
+                        to_student_id=student_ids[roll],
+                        status="ACCEPTED",
+                    ))
+        for roll in loose:
+            for target in self.rng.sample(loose, min(2, len(loose))):
+                if target != roll:
+                    invitations.append(Invitation(
+                        from_student_id=student_ids[roll],
+                        to_student_id=student_ids[target],
+                        status="PENDING",
+                    ))
+        self.bulk_create(Team.members.through, memberships)
+        # through-table bulk inserts skip m2m_changed, so set current_team directly
+        StudentProfile.objects.bulk_update(
+            [StudentProfile(id=m.studentprofile_id, current_team_id=m.team_id) for m in memberships],
+            ["current_team"],
+            batch_size=self.chunk_size,
+        )
+        self.bulk_create(Invitation, invitations)
+
+        # proposals + placeholder documents
+        statuses = ProjectProposal.Status.values
+        proposals = []
+        for (section, members), team in zip(groups, teams):
+            domain = self.rng.choice(DOMAINS)
+            title = " ".join(self.rng.sample(WORDS, 4)).capitalize()
+            status = self.rng.choice(statuses)
+            proposals.append(ProjectProposal(
+                team_id=team_ids[student_ids[members[0]]],
+                title=title,
+                problem_statement=f"{title} for the {domain.lower()} domain. " * 5,
+                objectives="\n".join(" ".join(self.rng.sample(WORDS, 6)) for _ in range(3)),
+                domain=domain,
+                expected_outcomes=" ".join(self.rng.sample(WORDS, 10)),
+                estimated_duration_weeks=self.rng.randint(8, 20),
+                preferred_mentor=team.mentor or self.rng.choice(mentors),
+                status=status,
+                status_order=ProjectProposal.status_order_for(status),  # bulk_create skips save()
+            ))
+        self.bulk_create(ProjectProposal, proposals)
+        proposal_ids = self.id_map(
+            ProjectProposal.objects.filter(team__department=department, team__batch=batch), "team_id"
+        )
+
+        # content-addressed, so every run shares the one stored placeholder
+        placeholder = document_storage.save(PLACEHOLDER_NAME, ContentFile(PLACEHOLDER_PDF))
+        documents = []
+        for section, members in groups:
+            leader_id = student_ids[members[0]]
+            for _ in range(self.rng.randint(1, 3)):
+                documents.append(ProposalDocument(
+                    proposal_id=proposal_ids[team_ids[leader_id]],
+                    file=placeholder,
+                    original_name="proposal.pdf",
+                    uploaded_by_id=leader_id,
+                ))
+        self.bulk_create(ProposalDocument, documents)
+
+        # reviews for approved teams, with panels and rubrics
+        approved_team_ids = [
+            p.team_id for p in proposals if p.status == ProjectProposal.Status.APPROVED
+        ]
+        review_date = datetime.date(batch.end_year, 1, 10)
+        reviews, panels = [], {}
+        for team_id in approved_team_ids:
+            for offset, review_type in enumerate(Review.Type.values):
+                day = review_date + datetime.timedelta(weeks=6 * offset, days=self.rng.randint(0, 4))
+                (date, session), panels[team_id, review_type] = self.book_panel(
+                    mentors, day, min(PANEL_SIZE, len(mentors))
+                )
+                reviews.append(Review(
+                    team_id=team_id,
+                    review_type=review_type,
+                    date=date,
+                    session=session,
+                    created_by=faculty[1] if len(faculty) > 1 else None,
+                    requirements=f"Bring the {review_type.lower()} review deliverables.",
+                ))
+        self.bulk_create(Review, reviews)
+
+        panel_rows, rubrics = [], []
+        review_rows = Review.objects.filter(
+            team_id__in=approved_team_ids
+        ).order_by("id").values_list("id", "team_id", "review_type")
+        for review_id, team_id, review_type in review_rows.iterator(chunk_size=self.chunk_size):
+            for member_id in panels[team_id, review_type]:
+                panel_rows.append(Review.panel_members.through(review_id=review_id, facultyprofile_id=member_id))
+            for name, weight in RUBRICS:
+                rubrics.append(ReviewRubric(review_id=review_id, name=name, weight=weight, max_score=10))
+        self.bulk_create(Review.panel_members.through, panel_rows)
+        self.bulk_create(ReviewRubric, rubrics)
+
+        self.stdout.write(
+            f"  {department.name} / {batch.name}: {len(students)} students, {len(teams)} teams, "
+            f"{len(invitations)} invitations, {len(documents)} documents, {len(reviews)} reviews"
+        )
@@ -0,0 +1,48 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from .profiles import get_profile
+
+
+class ProfileMiddleware:
+    """
+    Attach the logged-in user's profile and role flags to the request:
+    request.profile, request.is_hod, request.is_coordinator, request.is_advisor.
+
+    Works in both sync and async mode. The user it loads becomes request.user
+    and the result of request.auser() alike, so an async view and the
+    templates do not look it up again.
+
+    Must come after AuthenticationMiddleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        user = request.user
+        self.attach(request, user, get_profile(user))
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        user = await request.auser()
+        self.attach(request, user, await sync_to_async(get_profile)(user))
+        return await self.get_response(request)
+
+    @staticmethod
+    def attach(request, user, profile):
+        async def auser():
+            return user
+
+        request.user = user
+        request.auser = auser
+        request.profile = profile
+        request.is_hod = getattr(profile, "is_hod", False)
+        request.is_coordinator = getattr(profile, "is_coordinator", False)
+        request.is_advisor = getattr(profile, "is_advisor", False)
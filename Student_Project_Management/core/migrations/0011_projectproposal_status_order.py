@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-16 22:35
+
+from django.db import migrations, models
+
+
+def fill_status_order(apps, schema_editor):
+    ProjectProposal = apps.get_model('core', 'ProjectProposal')
+    ProjectProposal.objects.exclude(status='PENDING').update(status_order=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_team_team_id_code'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projectproposal',
+            name='status_order',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_status_order, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='projectproposal',
+            index=models.Index(fields=['status_order', '-updated_at', '-id'], name='proposal_queue_idx'),
+        ),
+    ]
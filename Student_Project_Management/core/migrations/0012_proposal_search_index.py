@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-16 23:05
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from core.search import get_search_backend
+
+    backend = get_search_backend(schema_editor.connection)
+    with schema_editor.connection.cursor() as cursor:
+        backend.create_index(cursor)
+
+
+def drop_search_index(apps, schema_editor):
+    from core.search import get_search_backend
+
+    backend = get_search_backend(schema_editor.connection)
+    with schema_editor.connection.cursor() as cursor:
+        backend.drop_index(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_projectproposal_status_order'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0 on 2026-10-16 23:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_proposal_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invitation',
+            index=models.Index(fields=['to_student', 'status'], name='invite_to_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invitation',
+            index=models.Index(fields=['from_student', 'status'], name='invite_from_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectproposal',
+            index=models.Index(fields=['status', 'updated_at'], name='proposal_status_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentprofile',
+            index=models.Index(fields=['department', 'class_section'], name='student_dept_section_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='team',
+            index=models.Index(fields=['department', 'batch'], name='team_dept_batch_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-16 23:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_current_team(apps, schema_editor):
+    StudentProfile = apps.get_model('core', 'StudentProfile')
+    Team = apps.get_model('core', 'Team')
+    # oldest team first, so a student listed in several ends up in the newest
+    for team in Team.objects.order_by('id').iterator():
+        student_ids = set(team.members.values_list('id', flat=True)) | {team.team_leader_id}
+        StudentProfile.objects.filter(id__in=student_ids).update(current_team=team)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentprofile',
+            name='current_team',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='current_members', to='core.team'),
+        ),
+        migrations.RunPython(fill_current_team, migrations.RunPython.noop),
+    ]
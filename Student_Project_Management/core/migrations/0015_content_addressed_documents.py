@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-16 23:45
+
+import core.models
+import core.storage
+from django.db import migrations, models
+
+
+def fill_original_name(apps, schema_editor):
+    ProposalDocument = apps.get_model('core', 'ProposalDocument')
+    # old names were proposals/<team>/<timestamp>_<filename>
+    for doc in ProposalDocument.objects.only('id', 'file').iterator():
+        name = doc.file.name.rsplit('/', 1)[-1]
+        prefix, _, rest = name.partition('_')
+        original = rest if prefix.isdigit() and rest else name
+        ProposalDocument.objects.filter(id=doc.id).update(original_name=original[:255])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_studentprofile_current_team'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='proposaldocument',
+            name='original_name',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='proposaldocument',
+            name='file',
+            field=models.FileField(storage=core.storage.ContentAddressedStorage(), upload_to=core.models.proposal_upload_path),
+        ),
+        migrations.RunPython(fill_original_name, migrations.RunPython.noop),
+    ]
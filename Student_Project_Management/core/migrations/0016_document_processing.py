@@ -0,0 +1,57 @@
+# Generated by Django 6.0 on 2026-10-16 23:50
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_content_addressed_documents'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='proposaldocument',
+            name='extracted_text',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='proposaldocument',
+            name='page_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='proposaldocument',
+            name='processed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='proposaldocument',
+            name='processing_error',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='proposaldocument',
+            name='processing_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='proposaldocument',
+            name='processing_status',
+            field=models.CharField(choices=[('PENDING', 'Waiting to be processed'), ('PROCESSING', 'Processing'), ('READY', 'Ready'), ('FAILED', 'Not a valid PDF')], default='PENDING', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='proposaldocument',
+            name='thumbnail',
+            field=models.FileField(blank=True, storage=core.storage.ContentAddressedStorage(), upload_to='thumbnails/'),
+        ),
+        migrations.AddIndex(
+            model_name='proposaldocument',
+            index=models.Index(fields=['processing_status', 'processing_started_at'], name='document_processing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proposaldocument',
+            index=models.Index(fields=['file'], name='document_file_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 6.0 on 2026-10-16 23:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_document_processing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProposalSignature',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text_hash', models.CharField(max_length=64)),
+                ('minhash', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('proposal', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='signature', to='core.projectproposal')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ProposalBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.BigIntegerField()),
+                ('proposal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.projectproposal')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['bucket'], name='proposal_bucket_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProposalSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('other', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.projectproposal')),
+                ('proposal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar', to='core.projectproposal')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['proposal', '-score'], name='proposal_similarity_idx')],
+            },
+        ),
+    ]
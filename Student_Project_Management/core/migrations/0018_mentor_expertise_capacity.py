@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-17 00:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_proposal_similarity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='facultyprofile',
+            name='expertise',
+            field=models.CharField(blank=True, help_text='Comma-separated domains, e.g. IoT, Machine Learning', max_length=200),
+        ),
+        migrations.AddField(
+            model_name='facultyprofile',
+            name='mentor_capacity',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='Maximum teams to mentor (blank: the MENTOR_CAPACITY setting).', null=True),
+        ),
+    ]
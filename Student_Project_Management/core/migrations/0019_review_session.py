@@ -0,0 +1,22 @@
+# Generated by Django 6.0 on 2026-10-17 00:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_mentor_expertise_capacity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='session',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['date', 'session'], name='review_slot_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 6.0 on 2026-10-17 00:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_review_session'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('review_type', models.CharField(choices=[('FIRST', 'First review'), ('SECOND', 'Second review'), ('FINAL', 'Final review')], max_length=10)),
+                ('score', models.FloatField()),
+                ('panelists', models.PositiveSmallIntegerField(default=0)),
+                ('complete', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.batch')),
+                ('department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.department')),
+                ('review', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='result', to='core.review')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='review_results', to='core.team')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['department', 'batch', 'review_type', '-score'], name='review_leaderboard_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='RubricScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('panelist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rubric_scores', to='core.facultyprofile')),
+                ('rubric', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scores', to='core.reviewrubric')),
+            ],
+            options={
+                'unique_together': {('rubric', 'panelist')},
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-17 00:50
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def expire_duplicate_invitations(apps, schema_editor):
+    # keep the first pending invitation of each pair so the constraint can be added
+    Invitation = apps.get_model('core', 'Invitation')
+    first = (
+        Invitation.objects.filter(status='PENDING')
+        .values('from_student', 'to_student')
+        .annotate(first_id=Min('id'))
+        .values_list('first_id', flat=True)
+    )
+    Invitation.objects.filter(status='PENDING').exclude(id__in=list(first)).update(status='EXPIRED')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_rubric_scores'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invitation',
+            name='pending',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(status='PENDING', then=models.Value(True)), output_field=models.BooleanField(null=True)), output_field=models.BooleanField(null=True)),
+        ),
+        migrations.RunPython(expire_duplicate_invitations, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='invitation',
+            constraint=models.UniqueConstraint(fields=('from_student', 'to_student', 'pending'), name='invite_one_pending_pair'),
+        ),
+    ]
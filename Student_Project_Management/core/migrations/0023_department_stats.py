@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-17 01:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_team_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DepartmentStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64)),
+                ('value', models.IntegerField(default=0)),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.batch')),
+                ('department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='core.department')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('department', 'batch', 'key'), name='department_stat_key')],
+            },
+        ),
+    ]
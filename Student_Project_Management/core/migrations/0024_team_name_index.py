@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-17 01:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_department_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='team',
+            index=models.Index(fields=['department', 'name'], name='team_dept_name_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-17 01:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_team_name_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='studentprofile',
+            index=models.Index(fields=['department', 'class_section', 'roll_number'], name='student_dept_section_roll_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='studentprofile',
+            name='student_dept_section_idx',
+        ),
+    ]
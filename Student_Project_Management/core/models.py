@@ -1,6 +1,8 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+from .storage import blob_digest, document_storage
+
 
 class User(AbstractUser):
     class UserType(models.TextChoices):
@@ -64,6 +66,14 @@ class FacultyProfile(models.Model):
     is_hod = models.BooleanField(default=False)
     is_coordinator = models.BooleanField(default=False)
     is_advisor = models.BooleanField(default=False)
+    # used by the mentor assignment solver (core.assignment)
+    expertise = models.CharField(max_length=200, blank=True, help_text="Comma-separated domains, e.g. IoT, Machine Learning")
+    mentor_capacity = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        help_text="Maximum teams to mentor (blank: the MENTOR_CAPACITY setting).",
+    )
+
     def __str__(self):
         return f"{self.user.get_full_name() or self.user.username} - {self.employee_id}"
 
@@ -76,6 +86,22 @@ class StudentProfile(models.Model):
     roll_number = models.CharField(max_length=50, unique=True)
     semester = models.IntegerField()
 
+    # the one team this student belongs to; maintained from Team.members
+    # (see core.teams) so "which team am I in" is a single indexed lookup
+    current_team = models.ForeignKey(
+        "Team",
+        related_name="current_members",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+    )
+
+    class Meta:
+        indexes = [
+            # also the advisor roster's keyset order (the primary key is implicitly last)
+            models.Index(fields=["department", "class_section", "roll_number"], name="student_dept_section_roll_idx"),
+        ]
+
     def __str__(self):
         return f"{self.roll_number} - {self.user.get_full_name() or self.user.username}"
 
@@ -126,6 +152,15 @@ class Team(models.Model):
 
     is_approved = models.BooleanField(default=False)   # proposal approved
     created_at = models.DateTimeField(auto_now_add=True)
+    # validator of the proposal list pages (core.conditional); bulk writes set it themselves
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["department", "batch"], name="team_dept_batch_idx"),
+            # team name lookups of the proposal search (core.search)
+            models.Index(fields=["department", "name"], name="team_dept_name_idx"),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.department.name} - {self.batch})"
@@ -167,17 +202,40 @@ class ProjectProposal(models.Model):
     )
     coordinator_comment = models.TextField(blank=True)
 
+    # stored queue sort key (0 = PENDING first, 1 = everything else), kept in
+    # sync by save() so the queues can be read straight from an index
+    status_order = models.PositiveSmallIntegerField(default=0, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["status_order", "-updated_at", "-id"],
+                name="proposal_queue_idx",
+            ),
+            models.Index(fields=["status", "updated_at"], name="proposal_status_updated_idx"),
+        ]
+
     def __str__(self):
         return f"{self.team.name} - {self.title}"
+
+    @classmethod
+    def status_order_for(cls, status):
+        return 0 if status == cls.Status.PENDING else 1
+
+    def save(self, *args, **kwargs):
+        self.status_order = self.status_order_for(self.status)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "status" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "status_order"}
+        super().save(*args, **kwargs)
     
 def proposal_upload_path(instance, filename):
-    # stored as: proposals/<team_name>/<timestamp>_<filename>
-    import time
-    safe_team = instance.proposal.team.name.replace(" ", "_")
-    return f"proposals/{safe_team}/{int(time.time())}_{filename}"
+    # document_storage renames the file after its content (blobs/ab/cd/<sha256>.pdf);
+    # only the extension of this name is kept
+    return f"proposals/{filename}"
 
 class ProposalDocument(models.Model):
     proposal = models.ForeignKey(
@@ -185,7 +243,8 @@ class ProposalDocument(models.Model):
         on_delete=models.CASCADE,
         related_name="documents",
     )
-    file = models.FileField(upload_to=proposal_upload_path)
+    file = models.FileField(upload_to=proposal_upload_path, storage=document_storage)
+    original_name = models.CharField(max_length=255, blank=True)  # name of the uploaded file
     uploaded_by = models.ForeignKey(
         StudentProfile,
         on_delete=models.SET_NULL,
@@ -194,8 +253,68 @@ class ProposalDocument(models.Model):
     )
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    # filled in by the process_documents worker (core.processing), never in the request
+    class ProcessingStatus(models.TextChoices):
+        PENDING = "PENDING", "Waiting to be processed"
+        PROCESSING = "PROCESSING", "Processing"
+        READY = "READY", "Ready"
+        FAILED = "FAILED", "Not a valid PDF"
+
+    processing_status = models.CharField(
+        max_length=10,
+        choices=ProcessingStatus.choices,
+        default=ProcessingStatus.PENDING,
+    )
+    processing_started_at = models.DateTimeField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    processing_error = models.CharField(max_length=255, blank=True)
+    page_count = models.PositiveIntegerField(null=True, blank=True)
+    extracted_text = models.TextField(blank=True)
+    thumbnail = models.FileField(upload_to="thumbnails/", storage=document_storage, blank=True)
+
+    class Meta:
+        indexes = [
+            # the worker's queue: PENDING rows, and PROCESSING rows whose worker died
+            models.Index(fields=["processing_status", "processing_started_at"], name="document_processing_idx"),
+            # content addressing: documents sharing a blob (result reuse, blob GC)
+            models.Index(fields=["file"], name="document_file_idx"),
+        ]
+
     def __str__(self):
-        return f"{self.proposal.team.name} - {self.file.name}"
+        return f"{self.proposal.team.name} - {self.original_name or self.file.name}"
+
+    @property
+    def digest(self):
+        """SHA-256 of the file contents (None for files uploaded before content addressing)."""
+        return blob_digest(self.file.name)
+
+
+# near-duplicate detection (core.similarity); derived data, rebuilt by the
+# rebuild_similarity command
+class ProposalSignature(models.Model):
+    proposal = models.OneToOneField(ProjectProposal, on_delete=models.CASCADE, related_name="signature")
+    text_hash = models.CharField(max_length=64)  # SHA-256 of the text the signature was computed from
+    minhash = models.BinaryField()  # NUM_PERM little-endian uint32 values
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class ProposalBucket(models.Model):
+    """One LSH band of a proposal's signature; proposals sharing a bucket are compared."""
+    proposal = models.ForeignKey(ProjectProposal, on_delete=models.CASCADE, related_name="+")
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        indexes = [models.Index(fields=["bucket"], name="proposal_bucket_idx")]
+
+
+class ProposalSimilarity(models.Model):
+    """Estimated Jaccard similarity of two proposals, stored once per direction."""
+    proposal = models.ForeignKey(ProjectProposal, on_delete=models.CASCADE, related_name="similar")
+    other = models.ForeignKey(ProjectProposal, on_delete=models.CASCADE, related_name="+")
+    score = models.FloatField()
+
+    class Meta:
+        indexes = [models.Index(fields=["proposal", "-score"], name="proposal_similarity_idx")]
 
 
 
@@ -222,6 +341,29 @@ class Invitation(models.Model):
         ("EXPIRED", "Expired"),
     ]
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="PENDING")
+    # True while pending, NULL afterwards: MySQL has no partial unique
+    # indexes, but NULLs never collide, so the constraint below only binds
+    # pending invitations
+    pending = models.GeneratedField(
+        expression=models.Case(
+            models.When(status="PENDING", then=models.Value(True)),
+            output_field=models.BooleanField(null=True),
+        ),
+        output_field=models.BooleanField(null=True),
+        db_persist=True,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["to_student", "status"], name="invite_to_status_idx"),
+            models.Index(fields=["from_student", "status"], name="invite_from_status_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["from_student", "to_student", "pending"],
+                name="invite_one_pending_pair",
+            ),
+        ]
 
     def __str__(self):
         return f"Invite {self.from_student} -> {self.to_student} ({self.status})"
@@ -235,6 +377,8 @@ class Review(models.Model):
     team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name="reviews")
     review_type = models.CharField(max_length=10, choices=Type.choices)
     date = models.DateField()
+    # sitting within the day (1 = first); blank means the panel is booked all day
+    session = models.PositiveSmallIntegerField(null=True, blank=True)
     created_by = models.ForeignKey(
         FacultyProfile, on_delete=models.SET_NULL, null=True, blank=True,
         related_name="created_reviews"
@@ -249,6 +393,10 @@ class Review(models.Model):
 
     class Meta:
         unique_together = ("team", "review_type")
+        indexes = [
+            # panel clash checks (core.scheduling)
+            models.Index(fields=["date", "session"], name="review_slot_idx"),
+        ]
 
     def __str__(self):
         return f"{self.team.name} - {self.get_review_type_display()}"
@@ -261,3 +409,62 @@ class ReviewRubric(models.Model):
 
     def __str__(self):
         return f"{self.name} ({self.weight}%)"
+
+
+class RubricScore(models.Model):
+    """One panelist's score for one rubric of a review."""
+    rubric = models.ForeignKey(ReviewRubric, on_delete=models.CASCADE, related_name="scores")
+    panelist = models.ForeignKey(FacultyProfile, on_delete=models.CASCADE, related_name="rubric_scores")
+    score = models.FloatField()  # 0..rubric.max_score
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("rubric", "panelist")
+
+    def __str__(self):
+        return f"{self.rubric} - {self.panelist}: {self.score}"
+
+
+class ReviewResult(models.Model):
+    """
+    Weighted total of a review's rubric scores, kept up to date by
+    core.scoring whenever its scores change, so leaderboards are one indexed
+    query. Team, department and batch are copied from the team for that index.
+    """
+    review = models.OneToOneField(Review, on_delete=models.CASCADE, related_name="result")
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name="review_results")
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name="+")
+    batch = models.ForeignKey(Batch, on_delete=models.CASCADE, related_name="+")
+    review_type = models.CharField(max_length=10, choices=Review.Type.choices)
+    score = models.FloatField()  # percentage, 0-100
+    panelists = models.PositiveSmallIntegerField(default=0)  # panel members who have scored
+    complete = models.BooleanField(default=False)  # every panel member scored every rubric
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["department", "batch", "review_type", "-score"], name="review_leaderboard_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.review}: {self.score:.1f}%"
+
+
+class DepartmentStat(models.Model):
+    """
+    One counter of the HOD dashboard statistics for a department and batch
+    (core.stats), e.g. "teams" or "proposals.PENDING". Kept current with
+    delta updates; the rebuild_stats command recomputes them from scratch.
+    """
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name="stats")
+    batch = models.ForeignKey(Batch, on_delete=models.CASCADE, related_name="+")
+    key = models.CharField(max_length=64)
+    value = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["department", "batch", "key"], name="department_stat_key"),
+        ]
+
+    def __str__(self):
+        return f"{self.department.name} / {self.batch.name}: {self.key} = {self.value}"
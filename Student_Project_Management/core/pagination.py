@@ -0,0 +1,126 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Instead of OFFSET, each page remembers the sort-key values of its last row and
+the next page asks for rows "after" them, so page N costs the same as page 1.
+The ordering must end with a unique column (usually "id") to break ties.
+"""
+import base64
+import datetime
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+PAGE_SIZE = 50
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+
+def encode_cursor(values):
+    raw = json.dumps(list(values), default=_json_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token, size):
+    """Return the list of values in the cursor, or None if it is missing/invalid."""
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    return values
+
+
+def _ordering_field(model, name):
+    """The model field an ordering name such as "team__updated_at" refers to (None if it is not one)."""
+    field = None
+    for part in name.split("__"):
+        if model is None:
+            return None
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return None
+        model = field.related_model
+    return field
+
+
+def cursor_values(queryset, ordering, token):
+    """
+    The values in a cursor for this ordering, converted to the fields' types;
+    None if the token is missing or was not made for it (e.g. edited by hand).
+    """
+    values = decode_cursor(token, len(ordering))
+    if values is None:
+        return None
+    cleaned = []
+    for name, value in zip(ordering, values):
+        if value is None or isinstance(value, (list, dict)):
+            return None
+        field = _ordering_field(queryset.model, name.lstrip("-"))
+        if field is not None:
+            try:
+                value = field.to_python(value)
+            except (ValidationError, TypeError, ValueError):
+                return None
+        cleaned.append(value)
+    return cleaned
+
+
+def keyset_filter(ordering, values):
+    """
+    Build the "row comes after (values)" condition for an ordering such as
+    ("status_order", "-updated_at", "-id"):
+        a > x OR (a = x AND b < y) OR (a = x AND b = y AND c < z)
+    """
+    condition = Q()
+    equal_so_far = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip("-")
+        op = "lt" if field.startswith("-") else "gt"
+        condition |= equal_so_far & Q(**{f"{name}__{op}": value})
+        equal_so_far &= Q(**{name: value})
+    return condition
+
+
+def _row_value(obj, field):
+    if isinstance(obj, dict):  # a .values() queryset
+        return obj[field.lstrip("-")]
+    value = obj
+    for part in field.lstrip("-").split("__"):
+        value = getattr(value, part)
+    return value
+
+
+def keyset_page(queryset, ordering, cursor=None, page_size=PAGE_SIZE):
+    """
+    Return (rows, next_cursor) for one page. next_cursor is None on the last page.
+    """
+    queryset = queryset.order_by(*ordering)
+    values = cursor_values(queryset, ordering, cursor)  # an invalid cursor gives the first page
+    if values is not None:
+        queryset = queryset.filter(keyset_filter(ordering, values))
+
+    rows = list(queryset[:page_size + 1])
+    if len(rows) <= page_size:
+        return rows, None
+
+    rows = rows[:page_size]
+    last = rows[-1]
+    return rows, encode_cursor(_row_value(last, field) for field in ordering)
+
+
+def page_querystring(request, param="cursor"):
+    """Current GET parameters without the cursor, for building next/first page links."""
+    query = request.GET.copy()
+    query.pop(param, None)
+    return query.urlencode()
@@ -0,0 +1,55 @@
+"""
+Running a page's independent queries at the same time (async dashboards).
+
+Django's async ORM methods (aget, acount, ...) still run every query on the
+one thread-sensitive worker, one after another, so gathering them saves
+nothing. gather_queries() instead runs each callable in its own worker thread
+(sync_to_async(thread_sensitive=False)); every thread has its own database
+connection, so the page waits for the slowest query instead of their sum.
+
+Worker connections follow the CONN_MAX_AGE rules a request does: with it at
+0 every thread would connect for every query, which costs more than running
+the queries in turn. So the callables only run in parallel when
+DASHBOARD_PARALLEL_QUERIES is on, the database keeps its connections
+(CONN_MAX_AGE is not 0) and no atomic block is open (a separate connection
+cannot see rows written by an open transaction, e.g. in a TestCase).
+Otherwise they run one after another in a single hop to the request's own
+connection, which costs what the sync view did.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+
+def _in_worker(func):
+    def run():
+        close_old_connections()
+        try:
+            return func()
+        finally:
+            close_old_connections()
+    return run
+
+
+def _can_run_in_parallel():
+    return connection.settings_dict["CONN_MAX_AGE"] != 0 and not connection.in_atomic_block
+
+
+def _run_in_turn(calls):
+    return {name: func() for name, func in calls.items()}
+
+
+async def gather_queries(**calls):
+    """
+    Await {name: callable()} for callables that run queries and return
+    evaluated results (lists, counts; not lazy querysets).
+    """
+    parallel = getattr(settings, "DASHBOARD_PARALLEL_QUERIES", True)
+    if parallel and await sync_to_async(_can_run_in_parallel)():
+        results = await asyncio.gather(*(
+            sync_to_async(_in_worker(func), thread_sensitive=False)() for func in calls.values()
+        ))
+        return dict(zip(calls, results))
+    return await sync_to_async(_run_in_turn)(calls)
@@ -0,0 +1,245 @@
+"""
+PDF inspection for uploaded proposal documents: validate, count pages,
+extract text and render a first-page thumbnail.
+
+Everything here works on a file path and imports no models, so it runs inside
+the process pool of the process_documents command (core.processing).
+
+pypdf is used for pages and text when it is installed; otherwise a small
+built-in parser reads uncompressed and Flate-compressed objects, which covers
+the PDFs produced by common word processors. Thumbnails need PyMuPDF or
+poppler's pdftoppm; without either, documents are processed without one.
+"""
+import re
+import shutil
+import subprocess
+import tempfile
+import zlib
+from pathlib import Path
+
+try:
+    import pypdf
+except ImportError:  # optional
+    pypdf = None
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:  # optional
+    fitz = None
+
+MAX_TEXT_LENGTH = 100_000
+MAX_STREAM_BYTES = 16 * 1024 * 1024  # per decompressed stream; a few KB of Flate can inflate to gigabytes
+THUMBNAIL_WIDTH = 300
+RENDER_TIMEOUT = 30  # seconds
+
+
+class InvalidPDF(Exception):
+    pass
+
+
+def inspect_pdf(path):
+    """
+    Return {"page_count", "text", "thumbnail"} (thumbnail: PNG bytes or None).
+    Raises InvalidPDF if the file is not a readable PDF.
+    """
+    data = Path(path).read_bytes()
+    if b"%PDF-" not in data[:1024]:
+        raise InvalidPDF("The file does not start with a PDF header.")
+    if b"%%EOF" not in data[-2048:]:
+        raise InvalidPDF("The file is truncated (no %%EOF marker).")
+
+    if pypdf is not None:
+        page_count, text = _read_with_pypdf(path)
+    else:
+        page_count, text = _read_builtin(data)
+    if not page_count:
+        raise InvalidPDF("The PDF has no pages.")
+
+    return {
+        "page_count": page_count,
+        "text": _normalize(text)[:MAX_TEXT_LENGTH],
+        "thumbnail": render_thumbnail(path),
+    }
+
+
+def _normalize(text):
+    text = re.sub(r"[^\S\n]+", " ", text)
+    return re.sub(r"\n\s*\n+", "\n\n", text).strip()
+
+
+# ----- pypdf -----
+
+def _read_with_pypdf(path):
+    try:
+        reader = pypdf.PdfReader(path)
+        pages = reader.pages
+        parts, length = [], 0
+        for page in pages:
+            if length >= MAX_TEXT_LENGTH:
+                break
+            part = page.extract_text() or ""
+            parts.append(part)
+            length += len(part)
+        return len(pages), "\n\n".join(parts)
+    except (pypdf.errors.PyPdfError, ValueError, KeyError, TypeError) as exc:
+        raise InvalidPDF(str(exc)) from exc
+
+
+# ----- built-in fallback -----
+
+OBJECT_RE = re.compile(rb"\d+\s+\d+\s+obj\b(.*?)\bendobj", re.S)
+STREAM_RE = re.compile(rb"^(.*?)\bstream\r?\n(.*?)\r?\n?endstream", re.S)
+PAGES_COUNT_RE = re.compile(rb"/Type\s*/Pages\b.*?/Count\s+(\d+)|/Count\s+(\d+).*?/Type\s*/Pages\b", re.S)
+PAGE_RE = re.compile(rb"/Type\s*/Page(?![A-Za-z])")
+OPERATOR_RE = re.compile(rb"[A-Za-z'\"*]+")
+NOT_HEX_RE = re.compile(rb"[^0-9A-Fa-f]")
+STRING_ESCAPE_RE = re.compile(rb"\\([nrtbf()\\]|[0-7]{1,3}|\r?\n)")
+ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f"}
+
+
+def _objects(data):
+    """
+    Yield (dictionary bytes, decoded stream bytes or None, packed) for every
+    object; packed is True for the concatenated dictionaries of an object stream.
+    """
+    for match in OBJECT_RE.finditer(data):
+        body = match.group(1)
+        stream = STREAM_RE.match(body)
+        if not stream:
+            yield body, None, False
+            continue
+        header, raw = stream.groups()
+        if b"/FlateDecode" in header:
+            inflater = zlib.decompressobj()
+            try:
+                raw = inflater.decompress(raw, MAX_STREAM_BYTES)
+            except zlib.error:
+                continue
+            if inflater.unconsumed_tail or len(raw) >= MAX_STREAM_BYTES:
+                raise InvalidPDF("The PDF has a stream that decompresses to more than "
+                                 f"{MAX_STREAM_BYTES // (1024 * 1024)} MB.")
+        elif b"/Filter" in header:
+            continue  # images and other encodings carry no text
+        if b"/ObjStm" in header:
+            yield raw, None, True
+        else:
+            yield header, raw, False
+
+
+def _read_builtin(data):
+    page_counts, pages, text = [], 0, []
+    for header, stream, packed in _objects(data):
+        match = None if packed else PAGES_COUNT_RE.search(header)
+        if match:
+            page_counts.append(int(match.group(1) or match.group(2)))
+        pages += len(PAGE_RE.findall(header))
+        if stream is not None and b"BT" in stream:
+            text.append(_content_text(stream))
+    # the root /Pages node counts every page; bare /Page objects are the fallback
+    return (max(page_counts) if page_counts else pages), "\n".join(t for t in text if t)
+
+
+def _unescape(match):
+    escape = match.group(1)
+    if escape[:1] in b"\r\n":
+        return b""  # line continuation
+    if escape[:1].isdigit():
+        return bytes([int(escape, 8) & 0xFF])
+    return ESCAPES.get(escape, escape)
+
+
+def _decode(raw):
+    if raw.startswith(b"\xfe\xff"):
+        return raw[2:].decode("utf-16-be", "ignore")
+    return raw.decode("latin-1")
+
+
+def _literal_string(stream, pos):
+    """Parse a (...) string starting at stream[pos]; returns (bytes, end position)."""
+    depth, i = 0, pos
+    while i < len(stream):
+        ch = stream[i]
+        if ch == 0x5C:  # backslash: skip the escaped byte
+            i += 2
+            continue
+        if ch == 0x28:
+            depth += 1
+        elif ch == 0x29:
+            depth -= 1
+            if depth == 0:
+                raw = STRING_ESCAPE_RE.sub(_unescape, stream[pos + 1:i])
+                return raw, i + 1
+        i += 1
+    return stream[pos + 1:], len(stream)
+
+
+def _content_text(stream):
+    """Text shown by the Tj, TJ, ' and " operators of a page content stream."""
+    out, operands, in_array = [], [], False
+    i, length = 0, len(stream)
+    while i < length:
+        ch = stream[i:i + 1]
+        if ch == b"(":
+            raw, i = _literal_string(stream, i)
+            operands.append(_decode(raw))
+        elif ch == b"<" and stream[i + 1:i + 2] != b"<":
+            end = stream.find(b">", i)
+            end = length if end < 0 else end
+            digits = NOT_HEX_RE.sub(b"", stream[i + 1:end])
+            operands.append(_decode(bytes.fromhex((digits + b"0" * (len(digits) % 2)).decode())))
+            i = end + 1
+        elif ch == b"[":
+            in_array, operands = True, []
+            i += 1
+        elif ch == b"]":
+            in_array = False
+            i += 1
+        elif ch.isalpha() or ch in (b"'", b'"', b"*"):
+            # match in place: slicing stream[i:] would copy the rest of the stream at every operator
+            operator = OPERATOR_RE.match(stream, i).group(0)
+            i += len(operator)
+            if in_array:
+                continue
+            if operator in (b"Tj", b"TJ", b"'", b'"'):
+                out.append("".join(operands))
+            elif operator == b"ET":
+                out.append("\n")
+            elif operator in (b"Td", b"TD", b"T*"):
+                out.append(" ")
+            operands = []
+        else:
+            i += 1
+    text = "".join(out)
+    # fonts with custom encodings decode to noise; keep only mostly-printable output
+    printable = sum(ch.isprintable() or ch.isspace() for ch in text)
+    return text if text and printable / len(text) > 0.9 else ""
+
+
+# ----- thumbnail -----
+
+def render_thumbnail(path, width=THUMBNAIL_WIDTH):
+    """PNG of the first page, or None when no renderer is available or it fails."""
+    if fitz is not None:
+        try:
+            with fitz.open(path) as pdf:
+                page = pdf[0]
+                zoom = width / page.rect.width
+                return page.get_pixmap(matrix=fitz.Matrix(zoom, zoom)).tobytes("png")
+        except Exception:  # a bad page should not fail the whole document
+            return None
+
+    pdftoppm = shutil.which("pdftoppm")
+    if pdftoppm is None:
+        return None
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / "page"
+        try:
+            subprocess.run(
+                [pdftoppm, "-png", "-f", "1", "-l", "1", "-singlefile", "-scale-to-x", str(width),
+                 "-scale-to-y", "-1", str(path), str(out)],
+                check=True, capture_output=True, timeout=RENDER_TIMEOUT,
+            )
+        except (subprocess.SubprocessError, OSError):
+            return None
+        png = out.with_suffix(".png")
+        return png.read_bytes() if png.exists() else None
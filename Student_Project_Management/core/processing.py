@@ -0,0 +1,97 @@
+"""
+Background processing of uploaded proposal documents.
+
+An upload only creates a PENDING ProposalDocument. The process_documents
+command claims pending rows (one conditional UPDATE each, so several workers
+never take the same row), runs core.pdf.inspect_pdf in a process pool and
+stores the page count, extracted text and thumbnail. Rows left PROCESSING by a
+worker that died are picked up again after STALE_AFTER.
+
+Files are content-addressed (core.storage), so a re-upload of the same PDF
+copies the result of the earlier one instead of being processed again. Once a
+document is READY its text joins the proposal's near-duplicate check
+(core.similarity).
+"""
+import datetime
+
+from django.core.files.base import ContentFile
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ProjectProposal, ProposalDocument
+from .pdf import InvalidPDF
+from .similarity import update_proposal_similarity
+from .storage import document_storage
+
+STALE_AFTER = datetime.timedelta(minutes=15)
+
+Status = ProposalDocument.ProcessingStatus
+RESULT_FIELDS = ("processing_status", "processing_error", "page_count", "extracted_text", "thumbnail")
+
+
+def _queue(now):
+    return Q(processing_status=Status.PENDING) | Q(
+        processing_status=Status.PROCESSING,
+        processing_started_at__lt=now - STALE_AFTER,
+    )
+
+
+def claim_documents(limit):
+    """Mark up to `limit` queued documents PROCESSING and return them."""
+    now = timezone.now()
+    candidates = ProposalDocument.objects.filter(_queue(now)).order_by("id").values_list("id", flat=True)[:limit]
+    claimed = [
+        document_id
+        for document_id in candidates
+        if ProposalDocument.objects.filter(_queue(now), id=document_id).update(
+            processing_status=Status.PROCESSING,
+            processing_started_at=now,
+        )
+    ]
+    return list(ProposalDocument.objects.filter(id__in=claimed).only("id", "file", "proposal").order_by("id"))
+
+
+def reuse_result(document):
+    """Copy the result of an already processed document with the same file; False if there is none."""
+    done = ProposalDocument.objects.filter(
+        file=document.file.name,
+        processing_status__in=[Status.READY, Status.FAILED],
+    ).exclude(id=document.id).only(*RESULT_FIELDS).first()
+    if done is None:
+        return False
+    for name in RESULT_FIELDS:
+        setattr(document, name, getattr(done, name))
+    _finish(document)
+    return True
+
+
+def save_result(document, result):
+    """Store the dict returned by inspect_pdf."""
+    document.processing_status = Status.READY
+    document.processing_error = ""
+    document.page_count = result["page_count"]
+    document.extracted_text = result["text"]
+    if result["thumbnail"]:
+        document.thumbnail.name = document_storage.save("thumbnail.png", ContentFile(result["thumbnail"]))
+    _finish(document)
+
+
+def save_failure(document, exc):
+    if isinstance(exc, InvalidPDF):
+        message = str(exc)
+    elif isinstance(exc, FileNotFoundError):
+        message = "The uploaded file is missing."
+    else:
+        message = f"Processing error: {exc.__class__.__name__}: {exc}"
+    document.processing_status = Status.FAILED
+    document.processing_error = message[:255]
+    _finish(document)
+
+
+def _finish(document):
+    document.processed_at = timezone.now()
+    document.save(update_fields=[*RESULT_FIELDS, "processed_at"])
+    if document.processing_status == Status.READY:
+        proposal = ProjectProposal.objects.filter(id=document.proposal_id).first()
+        if proposal is not None:
+            update_proposal_similarity(proposal)
@@ -0,0 +1,64 @@
+"""
+Cached lookup of the logged-in user's StudentProfile / FacultyProfile.
+
+The profile is read from the cache (falling back to one query) and memoised
+on the user object, so a request resolves it at most once. core.signals
+invalidates the cache entry whenever the user or the profile is saved.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import User, FacultyProfile, StudentProfile
+
+_MISSING = "missing"  # cached marker for users without a profile
+
+
+def _cache_key(user_id):
+    return f"core:profile:{user_id}"
+
+
+def _load_profile(user):
+    if user.user_type == User.UserType.STUDENT:
+        queryset = StudentProfile.objects.select_related(
+            "user", "department", "batch", "class_section"
+        )
+    else:
+        queryset = FacultyProfile.objects.select_related("user", "department")
+    try:
+        return queryset.get(user_id=user.pk)
+    except queryset.model.DoesNotExist:
+        return None
+
+
+def get_profile(user):
+    """Return the user's StudentProfile or FacultyProfile (None if there is none)."""
+    if not user.is_authenticated:
+        return None
+    if hasattr(user, "_profile_cache"):
+        return user._profile_cache
+
+    key = _cache_key(user.pk)
+    cached = cache.get(key)
+    if cached is None:
+        profile = _load_profile(user)
+        timeout = getattr(settings, "PROFILE_CACHE_TIMEOUT", 300)
+        cache.set(key, _MISSING if profile is None else profile, timeout)
+    else:
+        profile = None if cached == _MISSING else cached
+
+    user._profile_cache = profile
+    return profile
+
+
+def get_student_profile(user):
+    profile = get_profile(user)
+    return profile if isinstance(profile, StudentProfile) else None
+
+
+def get_faculty_profile(user):
+    profile = get_profile(user)
+    return profile if isinstance(profile, FacultyProfile) else None
+
+
+def invalidate_profiles(user_ids):
+    cache.delete_many([_cache_key(user_id) for user_id in user_ids])
@@ -0,0 +1,351 @@
+"""
+Bulk roster import from CSV (import_roster command and the admin upload page).
+
+Student rows are keyed on roll_number and faculty rows on employee_id.
+Departments, batches and sections named in the file are created on demand.
+A re-import only writes the rows whose values differ from the database, and
+existing users keep their passwords. Initial passwords are hashed in a process
+pool (core.hashing).
+
+Student columns: roll_number, username, first_name, last_name, email,
+                 department, batch ("2025-2026"), section, semester[, password]
+Faculty columns: employee_id, username, first_name, last_name, email,
+                 department[, is_hod, is_coordinator, is_advisor, password]
+A role column left out of a faculty file leaves that role as it is.
+"""
+import csv
+import re
+from dataclasses import dataclass, field
+
+from django.db import transaction
+
+from .hashing import hash_passwords
+from .models import User, Department, Batch, ClassSection, FacultyProfile, StudentProfile
+from .profiles import invalidate_profiles
+from .stats import rebuild_stats
+
+BULK_BATCH_SIZE = 1000
+
+STUDENT_COLUMNS = ("roll_number", "username", "first_name", "last_name", "email",
+                   "department", "batch", "section", "semester")
+FACULTY_COLUMNS = ("employee_id", "username", "first_name", "last_name", "email", "department")
+ROLE_COLUMNS = ("is_hod", "is_coordinator", "is_advisor")  # optional faculty columns
+TRUE_VALUES = {"1", "true", "yes", "y", "x"}
+
+
+class RosterError(Exception):
+    """The file cannot be imported; .errors lists the problems with line numbers."""
+
+    def __init__(self, errors):
+        super().__init__("; ".join(errors[:5]) + (f" (+{len(errors) - 5} more)" if len(errors) > 5 else ""))
+        self.errors = errors
+
+
+@dataclass
+class ImportResult:
+    kind: str
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    new_lookups: dict = field(default_factory=dict)  # model name -> rows created
+
+    def __str__(self):
+        extra = "".join(f", {n} new {name}" for name, n in self.new_lookups.items() if n)
+        return f"{self.kind}: {self.created} created, {self.updated} updated, {self.unchanged} unchanged{extra}"
+
+
+def detect_kind(header):
+    if "roll_number" in header:
+        return "students"
+    if "employee_id" in header:
+        return "faculty"
+    raise RosterError(["Header must contain roll_number (students) or employee_id (faculty)."])
+
+
+def import_roster(csvfile, default_password=None, workers=None, dry_run=False):
+    """Import an open CSV text file; returns an ImportResult. Raises RosterError."""
+    reader = csv.DictReader(csvfile)
+    header = [(name or "").strip() for name in (reader.fieldnames or [])]
+    reader.fieldnames = header
+    kind = detect_kind(header)
+    required = STUDENT_COLUMNS if kind == "students" else FACULTY_COLUMNS
+    missing = [c for c in required if c not in header]
+    if missing:
+        raise RosterError([f"Missing column(s): {', '.join(missing)}."])
+
+    rows = []
+    for line, raw in enumerate(reader, start=2):
+        rows.append((line, {k: (v or "").strip() for k, v in raw.items() if k}))
+
+    importer = (StudentImporter if kind == "students" else FacultyImporter)(rows, default_password, workers)
+    importer.validate()
+    # the hashing pool forks: do it before the transaction (and its connection) is open
+    importer.hash_new_passwords()
+    with transaction.atomic():
+        result = importer.run()
+        if dry_run:
+            transaction.set_rollback(True)
+        elif kind == "students":
+            # bulk writes skip the signals that keep the HOD dashboard counters current
+            rebuild_stats()
+    return result
+
+
+def _parse_years(name):
+    match = re.fullmatch(r"(\d{4})\s*[-/]\s*(\d{4})", name)
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def _changed(obj, values):
+    """Set values on obj; return the names of the fields that actually changed."""
+    changed = []
+    for name, value in values.items():
+        if getattr(obj, name) != value:
+            setattr(obj, name, value)
+            changed.append(name)
+    return changed
+
+
+class _Importer:
+    kind = ""
+    key = ""
+    model = None
+    required = ()
+    new_user_values = {}  # for users the file creates, under what user_values() returns
+
+    def __init__(self, rows, default_password, workers):
+        self.rows = rows
+        self.default_password = default_password or None
+        self.workers = workers
+        self.errors = []
+        self.result = ImportResult(self.kind)
+        self.hashed = {}  # username -> hashed initial password
+
+    # ----- validation -----
+
+    def validate(self):
+        seen_keys, seen_usernames = {}, {}
+        for line, row in self.rows:
+            for column in self.required:
+                if not row.get(column):
+                    self.errors.append(f"line {line}: {column} is empty")
+            for value, seen, label in ((row.get(self.key), seen_keys, self.key),
+                                       (row.get("username"), seen_usernames, "username")):
+                if value and value in seen:
+                    self.errors.append(f"line {line}: duplicate {label} {value!r} (first on line {seen[value]})")
+                elif value:
+                    seen[value] = line
+            self.validate_row(line, row)
+        if self.errors:
+            raise RosterError(self.errors)
+
+    def validate_row(self, line, row):
+        pass
+
+    # ----- lookups -----
+
+    def ensure_departments(self):
+        names = {row["department"] for _, row in self.rows}
+        existing = dict(Department.objects.filter(name__in=names).values_list("name", "id"))
+        new = [Department(name=n, full_name=n) for n in sorted(names - existing.keys())]
+        Department.objects.bulk_create(new, batch_size=BULK_BATCH_SIZE)
+        self.result.new_lookups["departments"] = len(new)
+        self.departments = dict(Department.objects.filter(name__in=names).values_list("name", "id"))
+
+    # ----- users and profiles -----
+
+    def profile_values(self, row):
+        raise NotImplementedError
+
+    def user_values(self, row):
+        return {
+            "username": row["username"],
+            "first_name": row["first_name"],
+            "last_name": row["last_name"],
+            "email": row["email"],
+        }
+
+    def hash_new_passwords(self):
+        """Hash the initial passwords of the users the file will create (see hashing)."""
+        keys = set(self.model.objects.filter(
+            **{f"{self.key}__in": [row[self.key] for _, row in self.rows]}
+        ).values_list(self.key, flat=True))
+        candidates = [row for _, row in self.rows if row[self.key] not in keys]
+        existing = set(User.objects.filter(
+            username__in=[row["username"] for row in candidates]
+        ).values_list("username", flat=True))
+        new = [row for row in candidates if row["username"] not in existing]
+        passwords = [row.get("password") or self.default_password for row in new]
+        self.hashed = dict(zip((row["username"] for row in new), hash_passwords(passwords, self.workers)))
+
+    def upsert(self):
+        keys = [row[self.key] for _, row in self.rows]
+        profiles = {
+            getattr(p, self.key): p
+            for p in self.model.objects.select_related("user").filter(**{f"{self.key}__in": keys})
+        }
+        # users created earlier without a profile (e.g. through the admin) are adopted, not duplicated
+        orphan_users = {
+            u.username: u
+            for u in User.objects.filter(
+                username__in=[row["username"] for _, row in self.rows if row[self.key] not in profiles]
+            ).select_related("studentprofile", "facultyprofile")
+        }
+        taken = [
+            f"username {name!r} already belongs to another profile"
+            for name, u in orphan_users.items()
+            if hasattr(u, "studentprofile") or hasattr(u, "facultyprofile")
+        ]
+        if taken:
+            raise RosterError(taken)
+
+        users_to_update, profiles_to_update = [], []
+        user_fields, profile_fields = set(), set()
+        new_users, new_passwords, new_profiles = [], [], []
+
+        for _, row in self.rows:
+            user_values = self.user_values(row)
+            profile_values = self.profile_values(row)
+            profile = profiles.get(row[self.key])
+            if profile is not None:
+                changed_user = _changed(profile.user, user_values)
+                changed_profile = _changed(profile, profile_values)
+                if changed_user:
+                    users_to_update.append(profile.user)
+                    user_fields.update(changed_user)
+                if changed_profile:
+                    profiles_to_update.append(profile)
+                    profile_fields.update(changed_profile)
+                if changed_user or changed_profile:
+                    self.result.updated += 1
+                else:
+                    self.result.unchanged += 1
+                continue
+
+            user = orphan_users.get(row["username"])
+            if user is not None:
+                changed_user = _changed(user, user_values)
+                if changed_user:
+                    users_to_update.append(user)
+                    user_fields.update(changed_user)
+            else:
+                user = User(**{**self.new_user_values, **user_values})
+                new_users.append(user)
+                new_passwords.append(row.get("password") or self.default_password)
+            new_profiles.append((user, self.model(**{self.key: row[self.key]}, **profile_values)))
+            self.result.created += 1
+
+        # users that appeared after hash_new_passwords() are few: hash them here, without the pool
+        unhashed = [(user, raw) for user, raw in zip(new_users, new_passwords) if user.username not in self.hashed]
+        self.hashed.update(zip(
+            (user.username for user, _ in unhashed), hash_passwords([raw for _, raw in unhashed], workers=1),
+        ))
+        for user in new_users:
+            user.password = self.hashed[user.username]
+        User.objects.bulk_create(new_users, batch_size=BULK_BATCH_SIZE)
+        if users_to_update:
+            User.objects.bulk_update(users_to_update, sorted(user_fields), batch_size=BULK_BATCH_SIZE)
+
+        # bulk_create does not return primary keys on MySQL, so read them back by username
+        user_ids = dict(User.objects.filter(
+            username__in=[user.username for user, _ in new_profiles]
+        ).values_list("username", "id"))
+        for user, profile in new_profiles:
+            profile.user_id = user_ids[user.username]
+        self.model.objects.bulk_create([p for _, p in new_profiles], batch_size=BULK_BATCH_SIZE)
+        if profiles_to_update:
+            self.model.objects.bulk_update(profiles_to_update, sorted(profile_fields), batch_size=BULK_BATCH_SIZE)
+
+        # bulk writes skip post_save, so drop the cached profiles here
+        invalidate_profiles([u.pk for u in users_to_update] + [p.user_id for p in profiles_to_update])
+
+    def run(self):
+        """Write the validated rows; call validate() (and hash_new_passwords()) first."""
+        self.ensure_departments()
+        self.ensure_lookups()
+        self.upsert()
+        return self.result
+
+    def ensure_lookups(self):
+        pass
+
+
+class StudentImporter(_Importer):
+    kind = "students"
+    key = "roll_number"
+    model = StudentProfile
+    required = STUDENT_COLUMNS
+
+    def validate_row(self, line, row):
+        if row.get("batch") and _parse_years(row["batch"]) is None:
+            self.errors.append(f"line {line}: batch {row['batch']!r} is not like 2025-2026")
+        if row.get("semester") and not row["semester"].isdigit():
+            self.errors.append(f"line {line}: semester {row['semester']!r} is not a number")
+
+    def ensure_lookups(self):
+        names = {row["batch"] for _, row in self.rows}
+        existing = set(Batch.objects.filter(name__in=names).values_list("name", flat=True))
+        new = []
+        for name in sorted(names - existing):
+            start, end = _parse_years(name)
+            new.append(Batch(name=name, start_year=start, end_year=end))
+        Batch.objects.bulk_create(new, batch_size=BULK_BATCH_SIZE)
+        self.result.new_lookups["batches"] = len(new)
+        self.batches = dict(Batch.objects.filter(name__in=names).values_list("name", "id"))
+
+        wanted = {
+            (self.departments[row["department"]], self.batches[row["batch"]], row["section"])
+            for _, row in self.rows
+        }
+        sections = ClassSection.objects.filter(
+            department_id__in={d for d, _, _ in wanted}, batch_id__in={b for _, b, _ in wanted}
+        )
+        self.sections = {(s.department_id, s.batch_id, s.name): s.id for s in sections}
+        new = [
+            ClassSection(department_id=d, batch_id=b, name=n)
+            for d, b, n in sorted(wanted - self.sections.keys())
+        ]
+        ClassSection.objects.bulk_create(new, batch_size=BULK_BATCH_SIZE)
+        self.result.new_lookups["sections"] = len(new)
+        if new:
+            sections = ClassSection.objects.filter(
+                department_id__in={d for d, _, _ in wanted}, batch_id__in={b for _, b, _ in wanted}
+            )
+            self.sections = {(s.department_id, s.batch_id, s.name): s.id for s in sections}
+
+    def user_values(self, row):
+        return {**super().user_values(row), "user_type": User.UserType.STUDENT}
+
+    def profile_values(self, row):
+        department_id = self.departments[row["department"]]
+        batch_id = self.batches[row["batch"]]
+        return {
+            "department_id": department_id,
+            "batch_id": batch_id,
+            "class_section_id": self.sections[(department_id, batch_id, row["section"])],
+            "semester": int(row["semester"]),
+        }
+
+
+class FacultyImporter(_Importer):
+    kind = "faculty"
+    key = "employee_id"
+    model = FacultyProfile
+    required = FACULTY_COLUMNS
+
+    new_user_values = {"user_type": User.UserType.FACULTY}
+
+    # a role column missing from the file leaves that role as it is
+    def user_values(self, row):
+        values = super().user_values(row)
+        if "is_hod" in row:
+            is_hod = row["is_hod"].lower() in TRUE_VALUES
+            values["user_type"] = User.UserType.HOD if is_hod else User.UserType.FACULTY
+        return values
+
+    def profile_values(self, row):
+        values = {"department_id": self.departments[row["department"]]}
+        for role in ROLE_COLUMNS:
+            if role in row:
+                values[role] = row[role].lower() in TRUE_VALUES
+        return values
@@ -0,0 +1,234 @@
+"""
+Review panel scheduling.
+
+A review slot is a (date, session) pair: Review.session numbers the sittings
+of a day (1 = first). A faculty member may sit on one panel per slot; a
+review without a session blocks the whole day for its panel.
+
+build_timetable() places every team of a department/batch in a slot with a
+full panel, never double-booking anyone:
+
+1. Greedy: each team takes the least-used slot that still has `panel_size`
+   free faculty (and a free room, if rooms are limited), and its panel is the
+   free faculty with the fewest panels so far.
+2. Local search: while the busiest member sits on two or more panels more
+   than the least busy one, hand one of their panels to a less busy member
+   who is free in that slot.
+
+Faculty already booked by other reviews in the window are treated as busy.
+Everything works on ids and sets, so 300 teams and 80 faculty take a fraction
+of a second; save_timetable() then writes the result with bulk queries and
+drops the scores of faculty taken off a panel (core.scoring).
+"""
+import datetime
+import heapq
+from collections import Counter
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from django.db.models import Q
+
+from .cards import bump_team_versions
+from .models import FacultyProfile, Review, Team
+from .scoring import prune_scores, refresh_results
+from .stats import add_deltas
+
+MAX_IMPROVEMENTS = 10_000  # local search moves (each lowers the load spread)
+
+
+@dataclass
+class Timetable:
+    slots: list  # [(date, session)]
+    placements: dict = field(default_factory=dict)  # team id -> (slot index, [faculty ids])
+    unscheduled: list = field(default_factory=list)  # team ids without a free slot
+    loads: dict = field(default_factory=dict)  # faculty id -> panels
+
+    def by_slot(self):
+        """[(date, session, [(team id, panel)])] in slot order, empty slots left out."""
+        grouped = {}
+        for team_id, (index, panel) in self.placements.items():
+            grouped.setdefault(index, []).append((team_id, panel))
+        return [(*self.slots[i], sorted(grouped[i])) for i in sorted(grouped)]
+
+
+def review_slots(start, end, sessions_per_day, skip_sundays=True):
+    """All (date, session) slots from start to end inclusive."""
+    slots = []
+    day = start
+    while day <= end:
+        if not (skip_sundays and day.weekday() == 6):
+            slots.extend((day, session) for session in range(1, sessions_per_day + 1))
+        day += datetime.timedelta(days=1)
+    return slots
+
+
+def build_timetable(team_ids, faculty_ids, slots, panel_size, busy=None, rooms=None):
+    """
+    Conflict-free timetable (see the module docstring). busy maps a faculty id
+    to the (date, session) slots they cannot take; (date, None) blocks the day.
+    """
+    busy = busy or {}
+    booked = {f: set(busy.get(f, ())) for f in faculty_ids}
+    loads = dict.fromkeys(faculty_ids, 0)
+    order = {f: i for i, f in enumerate(faculty_ids)}
+    teams_in_slot = [0] * len(slots)
+    timetable = Timetable(slots, loads=loads)
+
+    def is_free(f, index):
+        date, session = slots[index]
+        return (date, session) not in booked[f] and (date, None) not in booked[f]
+
+    for team_id in team_ids:
+        for index in sorted(range(len(slots)), key=lambda i: (teams_in_slot[i], i)):
+            if rooms and teams_in_slot[index] >= rooms:
+                continue
+            free = [f for f in faculty_ids if is_free(f, index)]
+            if len(free) < panel_size:
+                continue
+            panel = heapq.nsmallest(panel_size, free, key=lambda f: (loads[f], order[f]))
+            for f in panel:
+                booked[f].add(slots[index])
+                loads[f] += 1
+            teams_in_slot[index] += 1
+            timetable.placements[team_id] = (index, panel)
+            break
+        else:
+            timetable.unscheduled.append(team_id)
+
+    _rebalance(timetable, faculty_ids, booked, is_free)
+    return timetable
+
+
+def _rebalance(timetable, faculty_ids, booked, is_free):
+    loads = timetable.loads
+    seats = {f: [] for f in faculty_ids}  # faculty id -> team ids whose panel they sit on
+    for team_id, (_, panel) in timetable.placements.items():
+        for f in panel:
+            seats[f].append(team_id)
+
+    for _ in range(MAX_IMPROVEMENTS):
+        busiest = max(faculty_ids, key=lambda f: loads[f], default=None)
+        if busiest is None:
+            return
+        moved = False
+        for team_id in seats[busiest]:
+            index, panel = timetable.placements[team_id]
+            substitute = min(
+                (f for f in faculty_ids if loads[f] <= loads[busiest] - 2 and f not in panel and is_free(f, index)),
+                key=lambda f: loads[f],
+                default=None,
+            )
+            if substitute is None:
+                continue
+            panel[panel.index(busiest)] = substitute
+            slot = timetable.slots[index]
+            booked[busiest].discard(slot)
+            booked[substitute].add(slot)
+            loads[busiest] -= 1
+            loads[substitute] += 1
+            seats[busiest].remove(team_id)
+            seats[substitute].append(team_id)
+            moved = True
+            break
+        if not moved:
+            return
+
+
+# ----- database -----
+
+def busy_slots(faculty_ids, start, end, exclude=Q()):
+    """Slots in which each faculty member already sits on a review panel."""
+    through = Review.panel_members.through
+    rows = through.objects.filter(
+        facultyprofile_id__in=faculty_ids,
+        review__date__range=(start, end),
+    ).exclude(exclude).values_list("facultyprofile_id", "review__date", "review__session")
+    busy = {}
+    for faculty_id, date, session in rows:
+        busy.setdefault(faculty_id, set()).add((date, session))
+    return busy
+
+
+def panel_conflicts(faculty_ids, date, session, review=None):
+    """Faculty among faculty_ids who already sit on another panel in that slot."""
+    if date is None:
+        return FacultyProfile.objects.none()
+    clash = Q(date=date)
+    if session is not None:
+        clash &= Q(session=session) | Q(session__isnull=True)
+    reviews = Review.objects.filter(clash)
+    if review is not None and review.pk:
+        reviews = reviews.exclude(pk=review.pk)
+    return FacultyProfile.objects.filter(id__in=faculty_ids, panel_reviews__in=reviews).distinct()
+
+
+def schedule_reviews(department, batch, review_type, slots, panel_size, rooms=None):
+    """Timetable for every team of the department (and batch, if given) for one review type."""
+    teams = Team.objects.filter(department=department)
+    if batch is not None:
+        teams = teams.filter(batch=batch)
+    team_ids = list(teams.order_by("id").values_list("id", flat=True))
+    faculty_ids = list(
+        FacultyProfile.objects.filter(department=department).order_by("id").values_list("id", flat=True)
+    )
+    busy = {}
+    if slots:
+        # the reviews being rescheduled do not block anyone
+        busy = busy_slots(
+            faculty_ids,
+            slots[0][0],
+            slots[-1][0],
+            exclude=Q(review__team_id__in=team_ids, review__review_type=review_type),
+        )
+    return build_timetable(team_ids, faculty_ids, slots, panel_size, busy, rooms)
+
+
+def save_timetable(timetable, review_type, created_by):
+    """Create or update one Review per scheduled team and replace its panel, in bulk."""
+    with transaction.atomic():
+        existing = {
+            r.team_id: r
+            for r in Review.objects.select_for_update().filter(
+                team_id__in=timetable.placements, review_type=review_type,
+            )
+        }
+        new, changed = [], []
+        for team_id, (index, _) in timetable.placements.items():
+            date, session = timetable.slots[index]
+            review = existing.get(team_id)
+            if review is None:
+                new.append(Review(
+                    team_id=team_id, review_type=review_type, date=date, session=session, created_by=created_by,
+                ))
+            else:
+                review.date, review.session, review.created_by = date, session, created_by
+                changed.append(review)
+        Review.objects.bulk_update(changed, ["date", "session", "created_by"], batch_size=500)
+        Review.objects.bulk_create(new, batch_size=500)
+        if new:
+            scheduled = Counter()  # for core.stats; bulk_create skips its signal
+            for department_id, batch_id in Team.objects.filter(
+                    id__in=[r.team_id for r in new]).values_list("department_id", "batch_id"):
+                scheduled[department_id, batch_id, f"reviews.{review_type}"] += 1
+            add_deltas(scheduled)
+
+        # bulk_create does not return ids on MySQL
+        reviews = dict(Review.objects.filter(
+            team_id__in=timetable.placements, review_type=review_type,
+        ).values_list("team_id", "id"))
+        through = Review.panel_members.through
+        through.objects.filter(review_id__in=reviews.values()).delete()
+        through.objects.bulk_create(
+            [
+                through(review_id=reviews[team_id], facultyprofile_id=f)
+                for team_id, (_, panel) in timetable.placements.items()
+                for f in panel
+            ],
+            batch_size=1000,
+        )
+        # bulk writes skip post_save
+        bump_team_versions(reviews)
+        # scores from faculty taken off a panel no longer count
+        prune_scores(reviews.values())
+        refresh_results(Review.objects.filter(id__in=reviews.values()))
+    return len(new), len(changed)
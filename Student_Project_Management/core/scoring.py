@@ -0,0 +1,208 @@
+"""
+Rubric scoring and leaderboards.
+
+Panelists record one RubricScore per rubric of a review. A review's total is
+
+    sum(weight_r * mean_r) / sum(weight_r) * 100
+
+where mean_r is the mean of score / max_score over the panelists who scored
+rubric r (rubrics nobody scored yet are left out). A team's overall score is
+the REVIEW_WEIGHTS-weighted mean of its review totals.
+
+Totals are materialized in ReviewResult. refresh_results() recomputes any set
+of reviews in one pass: the scores are loaded as flat arrays and grouped with
+NumPy (np.unique + np.bincount), with no per-row Python loop, so a whole batch costs
+one query and a few array operations. The score entry and review edit views
+refresh just the review they changed; rebuild_leaderboards refreshes all.
+"""
+from collections import Counter
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef
+from django.utils import timezone
+
+from .models import Review, ReviewResult, RubricScore
+from .stats import add_deltas
+
+DEFAULT_REVIEW_WEIGHTS = {
+    Review.Type.FIRST: 25,
+    Review.Type.SECOND: 25,
+    Review.Type.FINAL: 50,
+}
+REFRESH_CHUNK_SIZE = 500
+
+
+def review_weights():
+    return getattr(settings, "REVIEW_WEIGHTS", DEFAULT_REVIEW_WEIGHTS)
+
+
+# ----- aggregation -----
+
+def review_totals(rows):
+    """
+    rows: (review id, rubric id, weight, max score, panelist id, score) tuples.
+    Returns {review id: (total percentage, panelists who scored, scores entered)}.
+    """
+    if not rows:
+        return {}
+
+    review, rubric, weight, max_score, panelist, score = (np.array(column) for column in zip(*rows))
+    ratio = np.clip(score / np.maximum(max_score, 1), 0, 1)
+
+    rubrics, first, rubric_idx = np.unique(rubric, return_index=True, return_inverse=True)
+    rubric_mean = np.bincount(rubric_idx, ratio) / np.bincount(rubric_idx)
+    reviews, review_idx = np.unique(review[first], return_inverse=True)
+    rubric_weight = weight[first].astype(float)
+    weighted = np.bincount(review_idx, rubric_weight * rubric_mean, minlength=len(reviews))
+    total_weight = np.bincount(review_idx, rubric_weight, minlength=len(reviews))
+    plain = np.bincount(review_idx, rubric_mean) / np.bincount(review_idx)  # all weights 0
+    totals = np.where(total_weight > 0, weighted / np.where(total_weight > 0, total_weight, 1), plain) * 100
+
+    row_review = np.searchsorted(reviews, review)
+    entries = np.bincount(row_review, minlength=len(reviews))
+    pairs = np.unique(np.stack([row_review, panelist]), axis=1)
+    panelists = np.bincount(pairs[0], minlength=len(reviews))
+    return {
+        int(r): (float(t), int(p), int(e))
+        for r, t, p, e in zip(reviews, totals, panelists, entries)
+    }
+
+
+def overall_scores(results):
+    """
+    results: (team id, review type, total) tuples. Returns {team id: overall}
+    weighted by REVIEW_WEIGHTS over the reviews each team has results for.
+    """
+    weights = review_weights()
+    results = [(team, weights.get(kind, 0), total) for team, kind, total in results]
+    if not results:
+        return {}
+
+    team, weight, total = (np.array(column, dtype=float) for column in zip(*results))
+    teams, idx = np.unique(team, return_inverse=True)
+    weighted = np.bincount(idx, weight * total)
+    total_weight = np.bincount(idx, weight)
+    overall = weighted / np.where(total_weight > 0, total_weight, 1)
+    return {int(t): float(o) for t, o in zip(teams, overall)}
+
+
+# ----- materialized results -----
+
+def prune_scores(review_ids):
+    """Delete scores of faculty who are no longer on the review's panel."""
+    on_panel = Review.panel_members.through.objects.filter(
+        review_id=OuterRef("rubric__review_id"),
+        facultyprofile_id=OuterRef("panelist_id"),
+    )
+    RubricScore.objects.filter(rubric__review_id__in=review_ids).exclude(Exists(on_panel)).delete()
+
+
+def refresh_results(reviews):
+    """Recompute the ReviewResult rows of a Review queryset. Returns the number of reviews."""
+    reviews = reviews.annotate(
+        panel_size=Count("panel_members", distinct=True),
+        rubric_count=Count("rubrics", distinct=True),
+    ).values_list(
+        "id", "team_id", "team__department_id", "team__batch_id", "review_type", "panel_size", "rubric_count",
+    )
+    count = 0
+    chunk = []
+    for review in reviews.order_by("id").iterator(chunk_size=REFRESH_CHUNK_SIZE):
+        chunk.append(review)
+        if len(chunk) == REFRESH_CHUNK_SIZE:
+            _refresh_chunk(chunk)
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        _refresh_chunk(chunk)
+        count += len(chunk)
+    return count
+
+
+def _refresh_chunk(reviews):
+    ids = [r[0] for r in reviews]
+    rows = list(RubricScore.objects.filter(rubric__review_id__in=ids).values_list(
+        "rubric__review_id", "rubric_id", "rubric__weight", "rubric__max_score", "panelist_id", "score",
+    ))
+    totals = review_totals(rows)
+    now = timezone.now()
+    with transaction.atomic():
+        existing = {r.review_id: r for r in ReviewResult.objects.select_for_update().filter(review_id__in=ids)}
+        new, changed = [], []
+        deltas = Counter()  # complete results for core.stats; bulk writes skip its signals
+        for review_id, team_id, department_id, batch_id, review_type, panel_size, rubric_count in reviews:
+            if review_id not in totals:
+                continue
+            total, panelists, entries = totals[review_id]
+            values = {
+                "team_id": team_id,
+                "department_id": department_id,
+                "batch_id": batch_id,
+                "review_type": review_type,
+                "score": round(total, 2),
+                "panelists": panelists,
+                "complete": entries >= panel_size * rubric_count,
+            }
+            result = existing.get(review_id)
+            if values["complete"]:
+                deltas[department_id, batch_id, f"reviews.{review_type}.complete"] += 1
+            if result is not None and result.complete:
+                deltas[result.department_id, result.batch_id, f"reviews.{result.review_type}.complete"] -= 1
+            if result is None:
+                new.append(ReviewResult(review_id=review_id, **values))
+            elif any(getattr(result, k) != v for k, v in values.items()):
+                for k, v in values.items():
+                    setattr(result, k, v)
+                result.updated_at = now
+                changed.append(result)
+        ReviewResult.objects.filter(review_id__in=[i for i in ids if i not in totals]).delete()
+        ReviewResult.objects.bulk_update(
+            changed,
+            ["team", "department", "batch", "review_type", "score", "panelists", "complete", "updated_at"],
+        )
+        ReviewResult.objects.bulk_create(new)
+        add_deltas(deltas)
+
+
+def refresh_review(review_id):
+    refresh_results(Review.objects.filter(id=review_id))
+
+
+# ----- leaderboards -----
+
+def leaderboard(department, batch, review_type):
+    """Ranked ReviewResults (each with a rank attribute) for one review type."""
+    results = list(
+        ReviewResult.objects.filter(department=department, batch=batch, review_type=review_type)
+        .select_related("team").order_by("-score", "team_id")
+    )
+    for result, rank in zip(results, ranks([r.score for r in results])):
+        result.rank = rank
+    return results
+
+
+def overall_leaderboard(department, batch):
+    """[(rank, team, overall, {review type: score})] for every team with a result."""
+    results = list(
+        ReviewResult.objects.filter(department=department, batch=batch).select_related("team")
+    )
+    overall = overall_scores([(r.team_id, r.review_type, r.score) for r in results])
+    teams, by_type = {}, {}
+    for r in results:
+        teams[r.team_id] = r.team
+        by_type.setdefault(r.team_id, {})[r.review_type] = r.score
+    ordered = sorted(overall.items(), key=lambda item: (-item[1], item[0]))
+    return [
+        (rank, teams[team_id], round(score, 2), by_type[team_id])
+        for (team_id, score), rank in zip(ordered, ranks([round(score, 2) for _, score in ordered]))
+    ]
+
+
+def ranks(scores):
+    """Competition ranks (1, 2, 2, 4) of scores sorted best first."""
+    result = []
+    for position, score in enumerate(scores, start=1):
+        result.append(result[-1] if result and score == scores[position - 2] else position)
+    return result
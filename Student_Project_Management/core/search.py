@@ -0,0 +1,201 @@
+"""
+Full-text search over project proposals.
+
+The backend is picked from the database vendor:
+  - MySQL:  a FULLTEXT index on core_projectproposal (kept up to date by InnoDB)
+  - SQLite: an FTS5 table, core_proposal_fts, kept in sync by core.signals
+  - other:  icontains fallback, no index
+Every backend filters a ProjectProposal queryset, annotates it with
+search_rank and orders it by relevance.
+
+Team names are not in the text index: search_proposals() also looks the query
+up as a team name prefix (team_dept_name_idx) and lists those proposals first.
+"""
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+SEARCH_FIELDS = ("title", "problem_statement", "objectives", "domain", "expected_outcomes")
+SEARCH_RESULTS_LIMIT = 100
+
+FTS_TABLE = "core_proposal_fts"
+FULLTEXT_INDEX = "proposal_fulltext"
+
+
+def search_terms(query):
+    return re.findall(r"\w+", query.lower())[:10]
+
+
+class FallbackSearchBackend:
+    def apply(self, queryset, query):
+        terms = search_terms(query)
+        if not terms:
+            return queryset.none()
+        condition = Q()
+        for term in terms:
+            term_match = Q()
+            for field in SEARCH_FIELDS:
+                term_match |= Q(**{f"{field}__icontains": term})
+            condition &= term_match
+        return queryset.filter(condition).annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        ).order_by("-updated_at")
+
+    def create_index(self, cursor):
+        pass
+
+    def drop_index(self, cursor):
+        pass
+
+    def index(self, proposal):
+        pass
+
+    def remove(self, proposal_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+
+class MySQLSearchBackend(FallbackSearchBackend):
+    match_sql = "MATCH ({cols}) AGAINST (%s IN BOOLEAN MODE)".format(
+        cols=", ".join(f"core_projectproposal.{f}" for f in SEARCH_FIELDS)
+    )
+
+    def apply(self, queryset, query):
+        terms = search_terms(query)
+        if not terms:
+            return queryset.none()
+        # +term* : every term must appear, prefix match
+        expression = " ".join(f"+{term}*" for term in terms)
+        return queryset.annotate(
+            search_rank=RawSQL(self.match_sql, [expression], output_field=FloatField())
+        ).filter(search_rank__gt=0).order_by("-search_rank")
+
+    def create_index(self, cursor):
+        cursor.execute(
+            f"ALTER TABLE core_projectproposal ADD FULLTEXT INDEX {FULLTEXT_INDEX} "
+            f"({', '.join(SEARCH_FIELDS)})"
+        )
+
+    def drop_index(self, cursor):
+        cursor.execute(f"ALTER TABLE core_projectproposal DROP INDEX {FULLTEXT_INDEX}")
+
+    def rebuild(self):
+        # InnoDB maintains FULLTEXT indexes itself; recreate it if missing and
+        # merge the pending index changes
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) FROM information_schema.statistics "
+                "WHERE table_schema = DATABASE() AND table_name = 'core_projectproposal' "
+                "AND index_name = %s",
+                [FULLTEXT_INDEX],
+            )
+            if cursor.fetchone()[0] == 0:
+                self.create_index(cursor)
+            else:
+                cursor.execute("OPTIMIZE TABLE core_projectproposal")
+                cursor.fetchall()
+
+
+class SQLiteSearchBackend(FallbackSearchBackend):
+    def apply(self, queryset, query):
+        terms = search_terms(query)
+        if not terms:
+            return queryset.none()
+        expression = " ".join(f'"{term}"*' for term in terms)
+        # bm25() is lower-is-better, so negate it for search_rank
+        rank = RawSQL(
+            f"SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE}.rowid = core_projectproposal.id AND {FTS_TABLE} MATCH %s",
+            [expression],
+            output_field=FloatField(),
+        )
+        matches = RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [expression])
+        return queryset.filter(id__in=matches).annotate(search_rank=rank).order_by("-search_rank")
+
+    def create_index(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5({', '.join(SEARCH_FIELDS)})"
+        )
+
+    def drop_index(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+    def index(self, proposal):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [proposal.pk])
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(SEARCH_FIELDS)}) "
+                f"VALUES (%s, {', '.join(['%s'] * len(SEARCH_FIELDS))})",
+                [proposal.pk] + [getattr(proposal, f) or "" for f in SEARCH_FIELDS],
+            )
+
+    def remove(self, proposal_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [proposal_id])
+
+    def rebuild(self):
+        columns = ", ".join(SEARCH_FIELDS)
+        with connection.cursor() as cursor:
+            self.create_index(cursor)
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, {columns}) "
+                f"SELECT id, {columns} FROM core_projectproposal"
+            )
+
+
+BACKENDS = {
+    "mysql": MySQLSearchBackend,
+    "sqlite": SQLiteSearchBackend,
+}
+
+
+def get_search_backend(conn=None):
+    vendor = (conn or connection).vendor
+    return BACKENDS.get(vendor, FallbackSearchBackend)()
+
+
+def highlight(text, terms, length=160):
+    """Short HTML-escaped excerpt of text around the first match, matches wrapped in <mark>."""
+    if not text or not terms:
+        return ""
+    pattern = re.compile(r"\b(" + "|".join(re.escape(t) for t in terms) + r")\w*", re.IGNORECASE)
+    match = pattern.search(text)
+    if match is None:
+        return ""
+    start = max(match.start() - length // 3, 0)
+    excerpt = text[start:start + length]
+    pieces, last = [], 0
+    for m in pattern.finditer(excerpt):
+        pieces.append(escape(excerpt[last:m.start()]))
+        pieces.append(f"<mark>{escape(m.group(0))}</mark>")
+        last = m.end()
+    pieces.append(escape(excerpt[last:]))
+    prefix = "… " if start > 0 else ""
+    suffix = " …" if start + length < len(text) else ""
+    return mark_safe(prefix + "".join(pieces) + suffix)
+
+
+def search_proposals(queryset, query, limit=SEARCH_RESULTS_LIMIT):
+    """
+    Top `limit` proposals matching `query`, best first. Each one gets a
+    search_snippet attribute with the highlighted matching excerpt.
+    """
+    by_team = list(queryset.filter(team__name__istartswith=query.strip()).order_by("team__name")[:limit])
+    text_matches = get_search_backend().apply(queryset.exclude(id__in=[p.id for p in by_team]), query)
+    results = by_team + list(text_matches[:limit - len(by_team)])
+    terms = search_terms(query)
+    for proposal in results:
+        proposal.search_snippet = ""
+        for field in SEARCH_FIELDS:
+            snippet = highlight(getattr(proposal, field), terms)
+            if snippet:
+                proposal.search_snippet = snippet
+                break
+    return results
@@ -0,0 +1,161 @@
+"""
+Serving proposal documents: access rules and efficient file responses.
+
+Documents are served by core.views.proposal_document after
+can_view_document() passes. With DOCUMENT_SENDFILE_BACKEND set, Django only
+checks access and hands the transfer to the web server (X-Accel-Redirect for
+nginx, X-Sendfile for Apache/lighttpd), which also does Range requests.
+Otherwise the file is streamed with FileResponse, honouring a single-range
+Range header. Either way the response has an ETag (the SHA-256 of
+content-addressed files), so repeat views get a 304.
+"""
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header
+
+from .models import FacultyProfile, StudentProfile, User
+from .storage import blob_digest
+
+# blob contents never change, so browsers may keep them for a year without revalidating
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def can_view_document(user, profile, document):
+    """Team members, the team's mentor, department coordinators and the HOD."""
+    team = document.proposal.team
+    if isinstance(profile, StudentProfile):
+        return profile.current_team_id == team.id
+    if not isinstance(profile, FacultyProfile):
+        return False
+    if team.mentor_id == profile.id or team.coordinator_id == profile.id:
+        return True
+    if profile.department_id != team.department_id:
+        return False
+    if profile.is_coordinator:
+        return True
+    return profile.is_hod and user.user_type == User.UserType.HOD
+
+
+def file_etag(fieldfile):
+    digest = blob_digest(fieldfile.name)
+    if digest:
+        return f'"{digest}"'
+    storage = fieldfile.storage
+    mtime = int(storage.get_modified_time(fieldfile.name).timestamp())
+    return f'"{storage.size(fieldfile.name):x}-{mtime:x}"'
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive for a single satisfiable byte range, None to send
+    the whole file (no/ignored header), or False if the range is unsatisfiable.
+    """
+    match = RANGE_RE.match(header.replace(" ", "")) if header else None
+    if not match or match.groups() == ("", ""):
+        return None  # absent, malformed or multi-range: send everything
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    else:  # suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        start, end = max(size - length, 0), size - 1
+    if start >= size:
+        return False
+    return start, end
+
+
+class _RangeFile:
+    """Read at most `length` bytes of a file, starting at `start`."""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def serve_document(request, document, as_attachment=False, thumbnail=False):
+    """The document's file, or with thumbnail=True its first-page PNG."""
+    fieldfile = document.thumbnail if thumbnail else document.file
+    name = fieldfile.name
+    etag = file_etag(fieldfile)
+    cache_control = IMMUTABLE_CACHE_CONTROL if blob_digest(name) else REVALIDATE_CACHE_CONTROL
+    if thumbnail:
+        stem = os.path.splitext(document.original_name or f"document-{document.id}")[0]
+        filename = f"{stem}.png"
+    else:
+        filename = document.original_name or os.path.basename(name)
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        backend = getattr(settings, "DOCUMENT_SENDFILE_BACKEND", None)
+        if backend:
+            response = _sendfile_response(backend, fieldfile.storage, name, content_type)
+        else:
+            response = _file_response(request, fieldfile.storage, name, content_type, etag)
+        response["Content-Disposition"] = content_disposition_header(as_attachment, filename)
+    response["ETag"] = etag
+    response["Cache-Control"] = cache_control
+    return response
+
+
+def _sendfile_response(backend, storage, name, content_type):
+    response = HttpResponse(content_type=content_type)
+    if backend == "x-accel-redirect":
+        prefix = getattr(settings, "DOCUMENT_ACCEL_REDIRECT_PREFIX", "/protected-media/")
+        response["X-Accel-Redirect"] = prefix.rstrip("/") + "/" + name
+    elif backend == "x-sendfile":
+        response["X-Sendfile"] = storage.path(name)
+    else:
+        raise ValueError(f"Unknown DOCUMENT_SENDFILE_BACKEND {backend!r}.")
+    return response
+
+
+def _file_response(request, storage, name, content_type, etag):
+    size = storage.size(name)
+    byte_range = parse_range(request.headers.get("Range"), size)
+    if_range = request.headers.get("If-Range")
+    if if_range and if_range != etag:
+        byte_range = None  # the client's partial copy is stale: send the whole file
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    file = storage.open(name, "rb")
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+        response["Content-Length"] = size
+    else:
+        start, end = byte_range
+        response = FileResponse(_RangeFile(file, start, end - start + 1), content_type=content_type, status=206)
+        response["Content-Length"] = end - start + 1
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response["Accept-Ranges"] = "bytes"
+    return response
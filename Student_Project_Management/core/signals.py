@@ -0,0 +1,174 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from .cards import bump_team_versions
+from . import stats
+from .models import (
+    User,
+    FacultyProfile,
+    StudentProfile,
+    Team,
+    ProjectProposal,
+    ProposalDocument,
+    Review,
+    ReviewResult,
+    Invitation,
+)
+from .profiles import invalidate_profiles
+from .search import get_search_backend
+from .similarity import update_proposal_similarity
+from .teams import sync_current_team
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_profile(sender, instance, **kwargs):
+    invalidate_profiles([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=FacultyProfile)
+@receiver([post_save, post_delete], sender=StudentProfile)
+def invalidate_profile(sender, instance, **kwargs):
+    invalidate_profiles([instance.user_id])
+
+
+@receiver(pre_delete, sender=Team)
+def remember_team_members(sender, instance, **kwargs):
+    # the members' current_team is cleared by on_delete=SET_NULL, which sends no profile signal
+    instance._member_user_ids = list(instance.current_members.values_list("user_id", flat=True))
+
+
+@receiver(post_delete, sender=Team)
+def invalidate_team_member_profiles(sender, instance, **kwargs):
+    invalidate_profiles(getattr(instance, "_member_user_ids", []))
+
+
+@receiver(post_save, sender=ProjectProposal)
+def index_proposal(sender, instance, **kwargs):
+    get_search_backend().index(instance)
+
+
+@receiver(post_save, sender=ProjectProposal)
+def check_proposal_similarity(sender, instance, **kwargs):
+    # after the commit, so the save's transaction does not wait for the bucket lookup;
+    # cheap when the text did not change (e.g. a status update): the stored text hash matches
+    transaction.on_commit(lambda: update_proposal_similarity(instance))
+
+
+@receiver(post_delete, sender=ProjectProposal)
+def unindex_proposal(sender, instance, **kwargs):
+    get_search_backend().remove(instance.pk)
+
+
+@receiver(m2m_changed, sender=Team.members.through)
+def sync_team_members(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        sync_current_team(instance, action, pk_set)
+        if action.startswith("post_"):
+            bump_team_versions([instance.pk])
+        return
+    # student.teams.add/remove/clear(...)
+    team_ids = pk_set or [instance.current_team_id]
+    for team in Team.objects.filter(id__in=team_ids):
+        sync_current_team(team, action, [instance.pk])
+    if action.startswith("post_"):
+        bump_team_versions(team_ids)
+
+
+# ----- cached dashboard cards (core.cards) -----
+
+@receiver([post_save, post_delete], sender=Team)
+def bump_team_card(sender, instance, **kwargs):
+    bump_team_versions([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=ProjectProposal)
+@receiver([post_save, post_delete], sender=Review)
+def bump_team_card_of(sender, instance, **kwargs):
+    bump_team_versions([instance.team_id])
+
+
+@receiver([post_save, post_delete], sender=ProposalDocument)
+def bump_document_team_card(sender, instance, **kwargs):
+    team_id = ProjectProposal.objects.filter(id=instance.proposal_id).values_list("team_id", flat=True).first()
+    bump_team_versions([team_id])
+
+
+# ----- department statistics (core.stats) -----
+
+@receiver(post_init, sender=Team)
+@receiver(post_init, sender=ProjectProposal)
+@receiver(post_init, sender=StudentProfile)
+def remember_stats_origin(sender, instance, **kwargs):
+    stats.remember(instance)
+
+
+@receiver(post_save, sender=Team)
+def count_team(sender, instance, created, **kwargs):
+    stats.team_saved(instance, created)
+
+
+@receiver(pre_delete, sender=Team)
+def uncount_team_members(sender, instance, **kwargs):
+    # the membership rows go with the team without m2m_changed
+    stats.team_deleting(instance)
+
+
+@receiver(post_delete, sender=Team)
+def uncount_team(sender, instance, **kwargs):
+    stats.team_deleted(instance)
+
+
+@receiver(m2m_changed, sender=Team.members.through)
+def count_members(sender, instance, action, reverse, pk_set, **kwargs):
+    stats.members_changed(instance, action, reverse, pk_set)
+
+
+@receiver(post_save, sender=ProjectProposal)
+def count_proposal(sender, instance, created, **kwargs):
+    stats.proposal_saved(instance, created)
+
+
+@receiver(post_delete, sender=ProjectProposal)
+def uncount_proposal(sender, instance, **kwargs):
+    stats.proposal_deleted(instance)
+
+
+@receiver(post_save, sender=Review)
+def count_review(sender, instance, created, **kwargs):
+    stats.review_saved(instance, created)
+
+
+@receiver(post_delete, sender=Review)
+def uncount_review(sender, instance, **kwargs):
+    stats.review_deleted(instance)
+
+
+@receiver(post_delete, sender=ReviewResult)
+def uncount_review_result(sender, instance, **kwargs):
+    stats.result_deleted(instance)
+
+
+@receiver(post_save, sender=Invitation)
+def count_invitation(sender, instance, created, **kwargs):
+    stats.invitation_saved(instance, created)
+
+
+@receiver(post_delete, sender=Invitation)
+def uncount_invitation(sender, instance, **kwargs):
+    stats.invitation_deleted(instance)
+
+
+@receiver(post_save, sender=StudentProfile)
+def count_student(sender, instance, created, **kwargs):
+    stats.student_saved(instance, created)
+
+
+@receiver(pre_delete, sender=StudentProfile)
+def uncount_student_membership(sender, instance, **kwargs):
+    stats.student_deleting(instance)
+
+
+@receiver(post_delete, sender=StudentProfile)
+def uncount_student(sender, instance, **kwargs):
+    stats.student_deleted(instance)
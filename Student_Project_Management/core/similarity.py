@@ -0,0 +1,228 @@
+"""
+Near-duplicate detection across all proposals (every department and batch).
+
+Each proposal's text (its fields plus the extracted text of its latest
+processed PDF) is cut into word 5-gram shingles. A MinHash signature of
+NUM_PERM values estimates the Jaccard similarity of two shingle sets: the
+fraction of positions where the signatures agree.
+
+Signatures are split into BANDS bands of ROWS values. Each band is hashed into
+a ProposalBucket row, and two proposals become candidates when they share a
+bucket. A pair with similarity s shares at least one bucket with probability
+1 - (1 - s**ROWS)**BANDS: about 0.35 at s=0.3, 0.92 at s=0.5 and over 0.999 at
+s=0.7. Checking a new or edited proposal is therefore one indexed bucket
+lookup plus a comparison with the few candidates, not a scan of the corpus.
+Pairs scoring at least MIN_SIMILARITY are stored in ProposalSimilarity, in
+both directions.
+
+Signatures are computed with NumPy (a NUM_PERM x shingles matrix at a time),
+which keeps the check cheap enough to run right after a proposal is saved.
+"""
+import hashlib
+import random
+import re
+import zlib
+
+import numpy as np
+from django.db import transaction
+
+from .models import ProjectProposal, ProposalBucket, ProposalDocument, ProposalSignature, ProposalSimilarity
+
+SHINGLE_SIZE = 5
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+MIN_SIMILARITY = 0.3
+
+# universal hashing h(x) = (a*x + b) mod p with p = 2**31 - 1: every product
+# stays below 2**62, so it fits in uint64 without overflow
+PRIME = (1 << 31) - 1
+_rng = random.Random(20240601)  # fixed: stored signatures must stay comparable
+PERM_A = [_rng.randrange(1, PRIME) for _ in range(NUM_PERM)]
+PERM_B = [_rng.randrange(0, PRIME) for _ in range(NUM_PERM)]
+MINHASH_CHUNK = 4096  # shingles hashed at a time (bounds the NUM_PERM x chunk matrix)
+
+TEXT_FIELDS = ("title", "problem_statement", "objectives", "expected_outcomes")
+
+
+def proposal_text(proposal, document_text=None):
+    """Text compared between proposals; document_text defaults to the latest processed PDF."""
+    if document_text is None:
+        document_text = ProposalDocument.objects.filter(
+            proposal_id=proposal.pk,
+            processing_status=ProposalDocument.ProcessingStatus.READY,
+        ).order_by("-uploaded_at").values_list("extracted_text", flat=True).first() or ""
+    return "\n".join([*(getattr(proposal, f) or "" for f in TEXT_FIELDS), document_text])
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """31-bit hashes of the word `size`-grams of text (one shingle if it is shorter)."""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < size:
+        grams = [" ".join(words)] if words else []
+    else:
+        grams = (" ".join(words[i:i + size]) for i in range(len(words) - size + 1))
+    return {zlib.crc32(gram.encode()) & PRIME for gram in grams}
+
+
+def minhash(shingle_set):
+    """Signature as an array of NUM_PERM uint32 values."""
+    values = np.fromiter(shingle_set, dtype=np.uint64, count=len(shingle_set))
+    a = np.array(PERM_A, dtype=np.uint64)[:, None]
+    b = np.array(PERM_B, dtype=np.uint64)[:, None]
+    signature = np.full(NUM_PERM, PRIME, dtype=np.uint64)
+    for start in range(0, len(values), MINHASH_CHUNK):
+        chunk = values[None, start:start + MINHASH_CHUNK]
+        signature = np.minimum(signature, ((a * chunk + b) % PRIME).min(axis=1))
+    return signature.astype(np.uint32)
+
+
+def to_bytes(signature):
+    return np.asarray(signature, dtype="<u4").tobytes()
+
+
+def from_bytes(data):
+    return np.frombuffer(bytes(data), dtype="<u4")
+
+
+def band_buckets(signature_bytes):
+    """One 63-bit bucket key per band (the band number is part of the hash)."""
+    width = ROWS * 4
+    return [
+        int.from_bytes(
+            hashlib.blake2b(bytes([band]) + signature_bytes[band * width:(band + 1) * width], digest_size=8).digest(),
+            "big",
+        ) >> 1
+        for band in range(BANDS)
+    ]
+
+
+def similarities(signature, others):
+    """Estimated Jaccard similarity of signature with each signature in others."""
+    if not others:
+        return []
+    return (np.vstack(others) == signature).mean(axis=1).tolist()
+
+
+# ----- incremental updates -----
+
+def update_proposal_similarity(proposal, document_text=None):
+    """
+    Recompute proposal's signature if its text changed and refresh its
+    similar pairs. Returns the number of similar proposals found, or None
+    when the text was unchanged.
+    """
+    text = proposal_text(proposal, document_text)
+    text_hash = hashlib.sha256(text.encode()).hexdigest()
+    current = ProposalSignature.objects.filter(proposal_id=proposal.pk).values_list("text_hash", flat=True).first()
+    if current == text_hash:
+        return None
+
+    shingle_set = shingles(text)
+    with transaction.atomic():
+        ProposalBucket.objects.filter(proposal_id=proposal.pk).delete()
+        ProposalSimilarity.objects.filter(proposal_id=proposal.pk).delete()
+        ProposalSimilarity.objects.filter(other_id=proposal.pk).delete()
+        if not shingle_set:
+            ProposalSignature.objects.filter(proposal_id=proposal.pk).delete()
+            return 0
+
+        signature = minhash(shingle_set)
+        signature_bytes = to_bytes(signature)
+        ProposalSignature.objects.update_or_create(
+            proposal_id=proposal.pk,
+            defaults={"text_hash": text_hash, "minhash": signature_bytes},
+        )
+        buckets = band_buckets(signature_bytes)
+        ProposalBucket.objects.bulk_create(
+            [ProposalBucket(proposal_id=proposal.pk, bucket=b) for b in buckets]
+        )
+
+        candidate_ids = set(
+            ProposalBucket.objects.filter(bucket__in=buckets).exclude(proposal_id=proposal.pk)
+            .values_list("proposal_id", flat=True)
+        )
+        rows = list(
+            ProposalSignature.objects.filter(proposal_id__in=candidate_ids).values_list("proposal_id", "minhash")
+        )
+        scores = similarities(signature, [from_bytes(m) for _, m in rows])
+        pairs = [(other_id, score) for (other_id, _), score in zip(rows, scores) if score >= MIN_SIMILARITY]
+        ProposalSimilarity.objects.bulk_create(
+            [ProposalSimilarity(proposal_id=proposal.pk, other_id=o, score=s) for o, s in pairs]
+            + [ProposalSimilarity(proposal_id=o, other_id=proposal.pk, score=s) for o, s in pairs]
+        )
+    return len(pairs)
+
+
+def similar_proposals(proposal, limit=5):
+    """The most similar other proposals, best first, each with a similarity attribute."""
+    matches = list(
+        ProposalSimilarity.objects.filter(proposal_id=proposal.pk)
+        .select_related("other__team__department", "other__team__batch")
+        .order_by("-score")[:limit]
+    )
+    for match in matches:
+        match.other.similarity = match.score
+    return [match.other for match in matches]
+
+
+# ----- full rebuild -----
+
+def rebuild_similarity(batch_size=500):
+    """
+    Recompute every signature and all similar pairs from scratch. Candidate
+    pairs come from in-memory LSH buckets, so the work grows with the number
+    of proposals and collisions rather than with every possible pair.
+    """
+    document_texts = {}
+    for proposal_id, text in ProposalDocument.objects.filter(
+        processing_status=ProposalDocument.ProcessingStatus.READY,
+    ).order_by("uploaded_at").values_list("proposal_id", "extracted_text").iterator(chunk_size=batch_size):
+        document_texts[proposal_id] = text  # latest upload wins
+
+    ids, signatures, hashes, buckets = [], [], [], {}
+    proposals = ProjectProposal.objects.only(*TEXT_FIELDS).order_by("id")
+    for proposal in proposals.iterator(chunk_size=batch_size):
+        text = proposal_text(proposal, document_texts.get(proposal.id, ""))
+        shingle_set = shingles(text)
+        if not shingle_set:
+            continue
+        signature = minhash(shingle_set)
+        signature_bytes = to_bytes(signature)
+        index = len(ids)
+        ids.append(proposal.id)
+        signatures.append(signature)
+        hashes.append((hashlib.sha256(text.encode()).hexdigest(), signature_bytes))
+        for bucket in band_buckets(signature_bytes):
+            buckets.setdefault(bucket, []).append(index)
+
+    candidates = {}
+    for members in buckets.values():
+        for i, left in enumerate(members):
+            candidates.setdefault(left, set()).update(members[i + 1:])
+
+    pairs = []
+    for left, rights in candidates.items():
+        rights = sorted(rights)
+        for right, score in zip(rights, similarities(signatures[left], [signatures[r] for r in rights])):
+            if score >= MIN_SIMILARITY:
+                pairs.append((ids[left], ids[right], score))
+
+    with transaction.atomic():
+        ProposalSimilarity.objects.all().delete()
+        ProposalBucket.objects.all().delete()
+        ProposalSignature.objects.all().delete()
+        ProposalSignature.objects.bulk_create(
+            [ProposalSignature(proposal_id=pid, text_hash=h, minhash=m) for pid, (h, m) in zip(ids, hashes)],
+            batch_size=batch_size,
+        )
+        ProposalBucket.objects.bulk_create(
+            [ProposalBucket(proposal_id=ids[i], bucket=b) for b, members in buckets.items() for i in members],
+            batch_size=batch_size,
+        )
+        ProposalSimilarity.objects.bulk_create(
+            [ProposalSimilarity(proposal_id=a, other_id=b, score=s) for a, b, s in pairs]
+            + [ProposalSimilarity(proposal_id=b, other_id=a, score=s) for a, b, s in pairs],
+            batch_size=batch_size,
+        )
+    return len(ids), len(pairs)
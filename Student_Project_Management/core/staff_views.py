@@ -1,11 +1,17 @@
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db import models
+from django.db import models, transaction
 from django.shortcuts import get_object_or_404, redirect, render
-from django.db.models import Q, Case, When, Value, IntegerField,Prefetch
+from django.db.models import Count, Q, Prefetch
+from django.http import Http404
+from django.urls import reverse
+from django.utils.http import urlencode
+from django.views.decorators.http import require_safe
 from core import staff_views
 from .models import (
     User,
+    Batch,
+    ClassSection,
     FacultyProfile,
     ProjectProposal,
     ProposalDocument,
@@ -13,11 +19,29 @@ from .models import (
     Team,
     Review,
     ReviewRubric,
+    RubricScore,
 )
 import datetime
+from asgiref.sync import sync_to_async
 from django.utils import timezone
+from .api import RESOURCES as API_RESOURCES, api_response, json_error
+from .assignment import apply_assignment, plan_assignment
+from .cards import render_team_cards
+from .conditional import list_validators, not_modified, with_validators
+from .exports import FORMATS as EXPORT_FORMATS, iterate_chunks, iterate_rows, streaming_export
+from .formation import create_teams, plan_formation
+from .pagination import keyset_page, page_querystring
+from .parallel import gather_queries
+from .profiles import get_faculty_profile, invalidate_profiles
+from .scheduling import panel_conflicts, review_slots, save_timetable, schedule_reviews
+from .scoring import leaderboard, overall_leaderboard, prune_scores, refresh_review, review_weights
+from .search import search_proposals
+from .similarity import similar_proposals
 
 
+# queue order for the proposal lists: PENDING first, newest first, id as tie-breaker
+PROPOSAL_QUEUE_ORDERING = ("status_order", "-updated_at", "-id")
+
 
 def _require_coordinator(user: User):
     """
@@ -27,9 +51,8 @@ def _require_coordinator(user: User):
     if user.user_type != User.UserType.FACULTY:
         return None, redirect("dashboard_redirect")
 
-    try:
-        faculty = FacultyProfile.objects.get(user=user)
-    except FacultyProfile.DoesNotExist:
+    faculty = get_faculty_profile(user)
+    if faculty is None:
         return None, redirect("dashboard_redirect")
 
     if not getattr(faculty, "is_coordinator", False):
@@ -63,31 +86,33 @@ def coordinator_proposal_list(request):
     if status:
         qs = qs.filter(status=status)
 
-    # Optional search by team name or title
+    # 304 when nothing listed changed since the browser's copy
+    etag = list_validators(request, qs)
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+
+    # Optional full-text search (results ranked by relevance, not paginated)
     q = request.GET.get("q", "").strip()
     if q:
-        qs = qs.filter(
-            models.Q(team__name__icontains=q) |
-            models.Q(title__icontains=q)
+        proposals, next_cursor = search_proposals(qs, q), None
+    else:
+        # PENDING first, then by recency; served from proposal_queue_idx
+        proposals, next_cursor = keyset_page(
+            qs, PROPOSAL_QUEUE_ORDERING, cursor=request.GET.get("cursor")
         )
 
-    proposals = qs.annotate(
-    status_order=Case(
-        When(status=ProjectProposal.Status.PENDING, then=Value(0)),
-        default=Value(1),
-        output_field=IntegerField(),
-    )
-    ).order_by("status_order", "-updated_at")
-
-
     context = {
         "faculty": faculty,
         "proposals": proposals,
+        "next_cursor": next_cursor,
+        "is_first_page": not request.GET.get("cursor"),
+        "page_query": page_querystring(request),
         "selected_status": status or "",
         "search_query": q,
         "status_choices": ProjectProposal.Status.choices,
     }
-    return render(request, "dashboards/coordinator_proposals.html", context)
+    return with_validators(render(request, "dashboards/coordinator_proposals.html", context), etag)
 
 
 @login_required
@@ -144,7 +169,7 @@ def coordinator_proposal_detail(request, proposal_id):
         messages.success(request, "Proposal status updated.")
         return redirect("coordinator_proposal_detail", proposal_id=proposal.id)
 
-    documents = proposal.documents.all().order_by("-uploaded_at")
+    documents = proposal.documents.select_related("uploaded_by__user").order_by("-uploaded_at")
 
     context = {
         "faculty": faculty,
@@ -152,9 +177,78 @@ def coordinator_proposal_detail(request, proposal_id):
         "documents": documents,
         "status_choices": ProjectProposal.Status.choices,
         "possible_mentors": possible_mentors,
+        "similar_proposals": similar_proposals(proposal),
     }
     return render(request, "dashboards/coordinator_proposal_detail.html", context)
 
+@login_required
+def coordinator_mentor_assignment(request):
+    """
+    Coordinator: assign mentors to all approved teams of the department at
+    once (optionally one batch, ?batch=<id>). GET shows the solver's proposed
+    assignment and mentor loads; POST saves the reviewed assignment.
+    """
+    faculty, error_response = _require_coordinator(request.user)
+    if error_response:
+        return error_response
+
+    batch_id = request.GET.get("batch") or request.POST.get("batch") or ""
+    batch = Batch.objects.filter(id=batch_id).first() if batch_id.isdigit() else None
+
+    if request.method == "POST":
+        assignments = {}
+        for key, value in request.POST.items():
+            if key.startswith("mentor_") and key[7:].isdigit() and value.isdigit():
+                assignments[int(key[7:])] = int(value)
+        changed = apply_assignment(faculty.department, assignments)
+        messages.success(request, f"Mentors updated for {changed} team(s).")
+        url = reverse("coordinator_mentor_assignment")
+        return redirect(f"{url}?batch={batch.id}" if batch else url)
+
+    context = {
+        "faculty": faculty,
+        "plan": plan_assignment(faculty.department, batch),
+        "batches": Batch.objects.filter(team__department=faculty.department).distinct().order_by("-start_year"),
+        "selected_batch": batch,
+    }
+    return render(request, "dashboards/coordinator_mentor_assignment.html", context)
+
+
+@login_required
+def coordinator_form_teams(request):
+    """
+    Coordinator: put the students of a batch who are still without a team
+    into teams of 3-4 (see core.formation). GET previews; POST creates them.
+    """
+    faculty, error_response = _require_coordinator(request.user)
+    if error_response:
+        return error_response
+
+    batches = list(
+        Batch.objects.filter(studentprofile__department=faculty.department).distinct().order_by("-start_year")
+    )
+    batch_id = request.POST.get("batch") or request.GET.get("batch") or ""
+    batch = next((b for b in batches if str(b.id) == batch_id), batches[0] if batches else None)
+
+    if request.method == "POST" and batch is not None:
+        plan = create_teams(faculty.department, batch, coordinator=faculty)
+        messages.success(
+            request,
+            f"Created {len(plan.teams)} team(s) for {sum(len(t) for t in plan.teams)} student(s).",
+        )
+        if plan.leftover:
+            messages.warning(request, f"{len(plan.leftover)} student(s) could not be placed in a team of 3-4.")
+        return redirect(f"{reverse('coordinator_form_teams')}?batch={batch.id}")
+
+    context = {
+        "faculty": faculty,
+        "batches": batches,
+        "selected_batch": batch,
+        "plan": plan_formation(faculty.department, batch) if batch is not None else None,
+    }
+    return render(request, "dashboards/coordinator_form_teams.html", context)
+
+
 def require_coordinator_or_hod(user: User):
     """
     Return (faculty_profile, error_response).
@@ -163,17 +257,16 @@ def require_coordinator_or_hod(user: User):
       - Faculty with is_hod=True.
     """
     if user.user_type != User.UserType.FACULTY and user.user_type != User.UserType.HOD:
-        return None, redirect("dashboardredirect")
+        return None, redirect("dashboard_redirect")
 
-    try:
-        faculty = FacultyProfile.objects.get(user=user)
-    except FacultyProfile.DoesNotExist:
-        return None, redirect("dashboardredirect")
+    faculty = get_faculty_profile(user)
+    if faculty is None:
+        return None, redirect("dashboard_redirect")
 
     if getattr(faculty, "is_coordinator", False) or getattr(faculty, "is_hod", False):
         return faculty, None
 
-    return None, redirect("dashboardredirect")
+    return None, redirect("dashboard_redirect")
 
 
 @login_required
@@ -190,7 +283,10 @@ def coordinator_team_reviews(request, team_id):
         department=faculty.department,
     )
 
-    reviews = team.reviews.all().order_by("date")
+    reviews = team.reviews.prefetch_related(
+        "panel_members__user",
+        "rubrics",
+    ).order_by("date")
 
     context = {
         "faculty": faculty,
@@ -240,6 +336,16 @@ def coordinator_edit_review(request, team_id, review_type):
         else:
             review.date = None  # or keep previous date
 
+        session = request.POST.get("session", "").strip()
+        review.session = int(session) if session.isdigit() and int(session) > 0 else None
+
+        # a faculty member can sit on one panel per session
+        clashes = panel_conflicts(panel_ids, review.date, review.session, review).select_related("user")
+        if clashes:
+            names = ", ".join(f.user.get_full_name() or f.user.username for f in clashes)
+            messages.error(request, f"Already on another panel at that time: {names}.")
+            return redirect("coordinator_edit_review", team_id=team.id, review_type=review_type)
+
         review.requirements = requirements
         review.created_by = faculty
         review.save()
@@ -251,7 +357,8 @@ def coordinator_edit_review(request, team_id, review_type):
             )
         )
 
-        review.rubrics.all().delete()
+        # update rubrics in place (matched by name) so panel scores survive edits
+        existing = {rb.name: rb for rb in review.rubrics.all()}
         names = request.POST.getlist("rubric_name")
         weights = request.POST.getlist("rubric_weight")
         max_scores = request.POST.getlist("rubric_max_score")
@@ -260,12 +367,14 @@ def coordinator_edit_review(request, team_id, review_type):
             name = name.strip()
             if not name:
                 continue
-            ReviewRubric.objects.create(
-                review=review,
-                name=name,
-                weight=int(weight or 0),
-                max_score=int(max_score or 10),
-            )
+            rubric = existing.pop(name, None) or ReviewRubric(review=review, name=name)
+            rubric.weight = int(weight or 0)
+            rubric.max_score = int(max_score or 10)
+            rubric.save()
+        ReviewRubric.objects.filter(id__in=[rb.id for rb in existing.values()]).delete()
+
+        prune_scores([review.id])
+        refresh_review(review.id)
 
         messages.success(request, "Review details saved.")
         return redirect("coordinator_team_reviews", team_id=team.id)
@@ -280,13 +389,94 @@ def coordinator_edit_review(request, team_id, review_type):
     return render(request, "dashboards/coordinator_edit_review.html", context)
 
 
+MAX_SCHEDULE_DAYS = 31
+
+
+def _schedule_options(data):
+    """Parse the scheduler form (GET or POST); returns (options, error message)."""
+    try:
+        start = datetime.date.fromisoformat(data.get("start", ""))
+        end = datetime.date.fromisoformat(data.get("end", ""))
+        sessions = int(data.get("sessions") or 4)
+        panel_size = int(data.get("panel_size") or 3)
+        rooms = int(data["rooms"]) if data.get("rooms") else None
+    except ValueError:
+        return None, "Enter valid dates and numbers."
+    if end < start or (end - start).days >= MAX_SCHEDULE_DAYS:
+        return None, f"The review window must be 1 to {MAX_SCHEDULE_DAYS} days."
+    if not (1 <= sessions <= 12 and 1 <= panel_size <= 10) or (rooms is not None and rooms < 1):
+        return None, "Sessions, panel size and rooms must be positive."
+    review_type = data.get("review_type")
+    if review_type not in Review.Type.values:
+        return None, "Choose a review type."
+    batch_id = data.get("batch") or ""
+    return {
+        "review_type": review_type,
+        "batch": Batch.objects.filter(id=batch_id).first() if batch_id.isdigit() else None,
+        "slots": review_slots(start, end, sessions, skip_sundays=not data.get("sundays")),
+        "panel_size": panel_size,
+        "rooms": rooms,
+    }, None
+
+
+@login_required
+def coordinator_schedule_reviews(request):
+    """
+    Coordinator/HOD: schedule one review type for every team of the
+    department (optionally one batch) with conflict-free panels. GET with the
+    form filled in previews the timetable; POST saves it.
+    """
+    faculty, error_response = require_coordinator_or_hod(request.user)
+    if error_response:
+        return error_response
+
+    data = request.POST if request.method == "POST" else request.GET
+    timetable, options, error = None, None, None
+    if "start" in data:
+        options, error = _schedule_options(data)
+    if options:
+        timetable = schedule_reviews(faculty.department, **options)
+
+    if request.method == "POST" and timetable is not None:
+        created, updated = save_timetable(timetable, options["review_type"], faculty)
+        messages.success(request, f"Scheduled {created + updated} review(s): {created} new, {updated} moved.")
+        if timetable.unscheduled:
+            messages.warning(request, f"{len(timetable.unscheduled)} team(s) did not fit; add dates or sessions.")
+        params = {k: v for k, v in request.POST.items() if k != "csrfmiddlewaretoken"}
+        return redirect(f"{reverse('coordinator_schedule_reviews')}?{urlencode(params)}")
+    if error:
+        messages.error(request, error)
+
+    rows, loads, unscheduled = [], [], []
+    if timetable is not None:
+        teams = Team.objects.in_bulk([*timetable.placements, *timetable.unscheduled])
+        panel = FacultyProfile.objects.select_related("user").in_bulk(list(timetable.loads))
+        rows = [
+            (date, session, [(teams[t], [panel[f] for f in members]) for t, members in placements])
+            for date, session, placements in timetable.by_slot()
+        ]
+        loads = sorted(((panel[f], n) for f, n in timetable.loads.items()), key=lambda x: (-x[1], x[0].id))
+        unscheduled = [teams[t] for t in timetable.unscheduled]
+
+    context = {
+        "faculty": faculty,
+        "form": data,
+        "timetable": timetable,
+        "rows": rows,
+        "loads": loads,
+        "unscheduled": unscheduled,
+        "review_types": Review.Type.choices,
+        "batches": Batch.objects.filter(team__department=faculty.department).distinct().order_by("-start_year"),
+    }
+    return render(request, "dashboards/coordinator_schedule_reviews.html", context)
+
+
 def require_hod_user(user): 
     """Helper: return faculty_profile, error_response (error_response is None when user is a valid HOD)."""
     if user.user_type != User.UserType.HOD:
         return None, redirect('dashboard_redirect')
-    try:
-        faculty = FacultyProfile.objects.get(user=user)
-    except FacultyProfile.DoesNotExist:
+    faculty = get_faculty_profile(user)
+    if faculty is None:
         return None, redirect('dashboard_redirect')
     if not getattr(faculty, 'is_hod', False):
         return None, redirect('dashboard_redirect')
@@ -312,25 +502,22 @@ def hod_dashboard(request):
     if status:
         qs = qs.filter(status=status)
     
-    # Optional search by team name or title (?q=teamname)
+    # Optional full-text search (?q=...), ranked by relevance
     q = request.GET.get('q', '').strip()
     if q:
-        qs = qs.filter(
-            Q(team__name__icontains=q) | Q(title__icontains=q)
-        )
-    
-    # Order: PENDING first, then by recency
-    proposals = qs.annotate(
-        status_order=Case(
-            When(status=ProjectProposal.Status.PENDING, then=Value(0)),
-            default=Value(1),
-            output_field=IntegerField(),
+        proposals, next_cursor = search_proposals(qs, q), None
+    else:
+        # Order: PENDING first, then by recency
+        proposals, next_cursor = keyset_page(
+            qs, PROPOSAL_QUEUE_ORDERING, cursor=request.GET.get('cursor')
         )
-    ).order_by('status_order', '-updated_at')
     
     context = {
         'faculty': faculty,
         'proposals': proposals,
+        'next_cursor': next_cursor,
+        'is_first_page': not request.GET.get('cursor'),
+        'page_query': page_querystring(request),
         'selected_status': status or '',
         'search_query': q,
         'status_choices': ProjectProposal.Status.choices,
@@ -352,6 +539,7 @@ def hod_proposal_list(request):
         "team__department",
         "team__batch",
         "team__class_section",
+        "team__mentor__user",
     ).filter(
         team__department=faculty.department,
     )
@@ -364,34 +552,38 @@ def hod_proposal_list(request):
     if batch_id:
         qs = qs.filter(team__batch_id=batch_id)
 
+    # 304 when nothing listed changed since the browser's copy
+    etag = list_validators(request, qs)
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+
     q = request.GET.get("q", "").strip()
     if q:
-        qs = qs.filter(
-            models.Q(team__name__icontains=q) |
-            models.Q(title__icontains=q)
+        proposals, next_cursor = search_proposals(qs, q), None
+    else:
+        proposals, next_cursor = keyset_page(
+            qs, PROPOSAL_QUEUE_ORDERING, cursor=request.GET.get("cursor")
         )
 
-    proposals = qs.annotate(
-        status_order=Case(
-            When(status=ProjectProposal.Status.PENDING, then=Value(0)),
-            default=Value(1),
-            output_field=IntegerField(),
-        )
-    ).order_by("status_order", "-updated_at")
-
-    # distinct batches in this department for filter dropdown
-    batches = qs.values_list("team__batch_id", "team__batch__name").distinct()
+    # batches that have teams in this department, for the filter dropdown
+    batches = Batch.objects.filter(
+        team__department=faculty.department
+    ).distinct().order_by("-start_year").values_list("id", "name")
 
     context = {
         "faculty": faculty,
         "proposals": proposals,
+        "next_cursor": next_cursor,
+        "is_first_page": not request.GET.get("cursor"),
+        "page_query": page_querystring(request),
         "selected_status": status or "",
         "selected_batch": int(batch_id) if batch_id else None,
         "search_query": q,
         "status_choices": ProjectProposal.Status.choices,
         "batches": batches,
     }
-    return render(request, "dashboards/hod_proposals.html", context)
+    return with_validators(render(request, "dashboards/hod_proposals.html", context), etag)
 
 
 @login_required
@@ -415,13 +607,14 @@ def hod_proposal_detail(request, proposal_id):
         team__department=faculty.department,
     )
 
-    documents = proposal.documents.all().order_by("-uploaded_at")
+    documents = proposal.documents.select_related("uploaded_by__user").order_by("-uploaded_at")
 
     context = {
         "faculty": faculty,
         "proposal": proposal,
         "documents": documents,
         "status_choices": ProjectProposal.Status.choices,
+        "similar_proposals": similar_proposals(proposal),
         "is_hod_readonly": True,
     }
     return render(request, "dashboards/coordinator_proposal_detail.html", context)
@@ -447,6 +640,10 @@ def hod_faculty_list(request):
         FacultyProfile.objects.filter(id__in=ids, department=department).update(
             is_coordinator=True
         )
+        # .update() skips post_save, so drop the cached role flags here
+        invalidate_profiles(
+            FacultyProfile.objects.filter(department=department).values_list("user_id", flat=True)
+        )
 
         messages.success(request, "Coordinator assignments updated.")
 
@@ -461,76 +658,225 @@ def hod_faculty_list(request):
     return render(request, "dashboards/hod_faculty_list.html", context)
 
 
+
+def _full_name(first_name, last_name, username=""):
+    return f"{first_name or ''} {last_name or ''}".strip() or (username or "")
+
+
+def _export_roster(department, batch_id):
+    students = StudentProfile.objects.filter(department=department)
+    if batch_id:
+        students = students.filter(batch_id=batch_id)
+    header = ["Roll number", "Name", "Username", "Email", "Batch", "Section", "Semester", "Team"]
+    fields = (
+        "roll_number", "user__first_name", "user__last_name", "user__username", "user__email",
+        "batch__name", "class_section__name", "semester", "current_team__name",
+    )
+    rows = (
+        (roll, _full_name(first, last, username), username, email, batch, section, semester, team)
+        for roll, first, last, username, email, batch, section, semester, team
+        in iterate_rows(students, fields)
+    )
+    return header, rows
+
+
+def _export_teams(department, batch_id):
+    # one row per team member, straight off the m2m table
+    memberships = Team.members.through.objects.filter(team__department=department)
+    if batch_id:
+        memberships = memberships.filter(team__batch_id=batch_id)
+    header = [
+        "Team", "Team ID", "Batch", "Section", "Mentor",
+        "Roll number", "Student", "Leader",
+    ]
+    fields = (
+        "team__name", "team__team_id_code", "team__batch__name", "team__class_section__name",
+        "team__mentor__user__first_name", "team__mentor__user__last_name", "team__mentor__user__username",
+        "studentprofile__roll_number", "studentprofile__user__first_name", "studentprofile__user__last_name",
+        "studentprofile_id", "team__team_leader_id",
+    )
+    rows = (
+        (
+            team, code, batch, section, _full_name(m_first, m_last, m_username),
+            roll, _full_name(s_first, s_last), "Yes" if student_id == leader_id else "",
+        )
+        for (team, code, batch, section, m_first, m_last, m_username,
+             roll, s_first, s_last, student_id, leader_id) in iterate_rows(memberships, fields)
+    )
+    return header, rows
+
+
+def _export_proposals(department, batch_id):
+    proposals = ProjectProposal.objects.filter(team__department=department)
+    if batch_id:
+        proposals = proposals.filter(team__batch_id=batch_id)
+    header = [
+        "Team", "Team ID", "Batch", "Section", "Title", "Domain",
+        "Status", "Mentor", "Preferred mentor", "Last updated",
+    ]
+    fields = (
+        "team__name", "team__team_id_code", "team__batch__name", "team__class_section__name",
+        "title", "domain", "status",
+        "team__mentor__user__first_name", "team__mentor__user__last_name", "team__mentor__user__username",
+        "preferred_mentor__user__first_name", "preferred_mentor__user__last_name",
+        "preferred_mentor__user__username", "updated_at",
+    )
+    status_labels = dict(ProjectProposal.Status.choices)
+    rows = (
+        (
+            team, code, batch, section, title, domain, status_labels.get(status, status),
+            _full_name(m_first, m_last, m_username), _full_name(p_first, p_last, p_username),
+            updated_at,
+        )
+        for (team, code, batch, section, title, domain, status, m_first, m_last, m_username,
+             p_first, p_last, p_username, updated_at) in iterate_rows(proposals, fields)
+    )
+    return header, rows
+
+
+def _export_reviews(department, batch_id):
+    reviews = Review.objects.filter(team__department=department)
+    if batch_id:
+        reviews = reviews.filter(team__batch_id=batch_id)
+    header = ["Team", "Team ID", "Batch", "Review", "Date", "Panel", "Requirements"]
+    fields = ("team__name", "team__team_id_code", "team__batch__name", "review_type", "date", "requirements")
+    type_labels = dict(Review.Type.choices)
+
+    def rows():
+        for chunk in iterate_chunks(reviews, fields):
+            # panel names for the whole chunk in one query
+            panels = {}
+            for review_id, first, last, username in Review.panel_members.through.objects.filter(
+                review_id__in=[row[0] for row in chunk]
+            ).order_by("pk").values_list(
+                "review_id", "facultyprofile__user__first_name",
+                "facultyprofile__user__last_name", "facultyprofile__user__username",
+            ):
+                panels.setdefault(review_id, []).append(_full_name(first, last, username))
+            for pk, team, code, batch, review_type, date, requirements in chunk:
+                yield (
+                    team, code, batch, type_labels.get(review_type, review_type), date,
+                    "; ".join(panels.get(pk, [])), requirements,
+                )
+
+    return header, rows()
+
+
+# dataset name -> builder(department, batch_id) returning (header, rows)
+HOD_EXPORTS = {
+    "roster": _export_roster,
+    "teams": _export_teams,
+    "proposals": _export_proposals,
+    "reviews": _export_reviews,
+}
+
+
 @login_required
-def advisor_dashboard(request):
+def hod_export(request, dataset):
     """
-    Advisor dashboard: all students in advisor's department + their team/project.
+    HOD: download a department dataset as CSV (default) or XLSX (?format=xlsx),
+    optionally limited to one batch (?batch=<id>). The file is streamed.
     """
-    user: User = request.user
-
-    if user.user_type != User.UserType.FACULTY:
-        return redirect("dashboard_redirect")
+    faculty, error_response = require_hod_user(request.user)
+    if error_response:
+        return error_response
 
-    try:
-        faculty = FacultyProfile.objects.get(user=user)
-    except FacultyProfile.DoesNotExist:
-        return redirect("dashboard_redirect")
+    fmt = request.GET.get("format", "csv")
+    if dataset not in HOD_EXPORTS or fmt not in EXPORT_FORMATS:
+        raise Http404("Unknown export.")
 
-    if not getattr(faculty, "is_advisor", False):
-        return redirect("dashboard_redirect")
+    batch_id = request.GET.get("batch")
+    if batch_id and not batch_id.isdigit():
+        raise Http404("Unknown batch.")
 
-    students = StudentProfile.objects.select_related(
-        "user", "department", "batch", "class_section"
-    ).filter(department=faculty.department)
-
-    teams = Team.objects.select_related(
-        "department",
-        "batch",
-        "class_section",
-        "proposal",
-    ).prefetch_related(
-        "proposal__documents",
-        "reviews",
-    ).filter(mentor=faculty)
+    header, rows = HOD_EXPORTS[dataset](faculty.department, batch_id)
+    filename = f"{faculty.department.name}-{dataset}".lower()
+    return streaming_export(filename, header, rows, fmt)
 
 
-    context = {
-        "faculty": faculty,
-        "students": students,
-    }
-    return render(request, "dashboards/advisor_dashboard.html", context)
+@require_safe
+def api(request, resource):
+    """
+    Read-only JSON API (core.api) for coordinators and the HOD, limited to
+    their department. Errors are JSON too, so scripts are never redirected
+    to the login page.
+    """
+    if resource not in API_RESOURCES:
+        return json_error("Unknown resource.", status=404)
+    if not request.user.is_authenticated:
+        return json_error("Authentication required.", status=401)
+    faculty, error_response = require_coordinator_or_hod(request.user)
+    if error_response:
+        return json_error("Only coordinators and HODs can use the API.", status=403)
+    return api_response(request, API_RESOURCES[resource], faculty.department_id)
 
 
 @login_required
-def advisor_dashboard(request):
-    user: User = request.user
+async def advisor_dashboard(request):
+    """
+    Advisor dashboard: students in the advisor's department with their team/project.
+    Filterable by section/batch and keyset-paginated, so each page runs a fixed
+    number of queries whatever the department size. The section list and the
+    student page are loaded at the same time (core.parallel).
+    """
+    user: User = await request.auser()
 
     if user.user_type != User.UserType.FACULTY:
         return redirect("dashboard_redirect")
 
-    try:
-        faculty = FacultyProfile.objects.get(user=user)
-    except FacultyProfile.DoesNotExist:
+    faculty = await sync_to_async(get_faculty_profile)(user)
+    if faculty is None:
         return redirect("dashboard_redirect")
 
     if not getattr(faculty, "is_advisor", False):
         return redirect("dashboard_redirect")
 
     students = StudentProfile.objects.select_related(
-    "user", "department", "batch", "class_section"
+        "user", "class_section"
+    ).prefetch_related(
+        Prefetch(
+            "teams",
+            queryset=Team.objects.select_related("proposal").order_by("name"),
+        ),
     ).filter(
-    department=faculty.department
-    ).order_by(
-    "class_section__name",
-    "teams__name",
-    "user__username",
+        department=faculty.department_id
     )
 
+    section_id = request.GET.get("section", "")
+    if section_id.isdigit():
+        students = students.filter(class_section_id=section_id)
+
+    batch_id = request.GET.get("batch", "")
+    if batch_id.isdigit():
+        students = students.filter(batch_id=batch_id)
+
+    page = await gather_queries(
+        sections=lambda: list(
+            ClassSection.objects.select_related("batch")
+            .filter(department=faculty.department_id)
+            .order_by("batch__start_year", "name")
+        ),
+        students=lambda: keyset_page(
+            students,
+            ("class_section_id", "roll_number", "id"),  # student_dept_section_roll_idx, no filesort
+            cursor=request.GET.get("cursor"),
+        ),
+    )
+    sections = page["sections"]
+    batches = list({s.batch_id: s.batch for s in sections}.values())
+    students, next_cursor = page["students"]
+
     context = {
         "faculty": faculty,
         "students": students,
+        "sections": sections,
+        "batches": batches,
+        "selected_section": int(section_id) if section_id.isdigit() else None,
+        "selected_batch": int(batch_id) if batch_id.isdigit() else None,
+        "next_cursor": next_cursor,
+        "is_first_page": not request.GET.get("cursor"),
     }
-    return render(request, "dashboards/advisor_dashboard.html", context)
+    return await sync_to_async(render)(request, "dashboards/advisor_dashboard.html", context)
 
 @login_required
 def mentor_dashboard(request):
@@ -542,22 +888,140 @@ def mentor_dashboard(request):
     if user.user_type != User.UserType.FACULTY:
         return redirect("dashboard_redirect")
 
-    try:
-        faculty = FacultyProfile.objects.get(user=user)
-    except FacultyProfile.DoesNotExist:
+    faculty = get_faculty_profile(user)
+    if faculty is None:
         return redirect("dashboard_redirect")
 
-    teams = Team.objects.select_related(
-        "department",
-        "batch",
-        "class_section",
-        "proposal",
-    ).prefetch_related(
-    "proposal__documents",
-    ).filter(mentor=faculty)
-
+    def load_teams(team_ids):
+        return Team.objects.select_related(
+            "department",
+            "batch",
+            "class_section",
+            "proposal",
+        ).prefetch_related(
+            "members__user",
+            Prefetch("proposal__documents", queryset=ProposalDocument.objects.defer("extracted_text")),
+            "reviews",
+        ).filter(id__in=team_ids)
+
+    # cards are cached per team version; only teams that changed are loaded
+    team_ids = Team.objects.filter(mentor=faculty).values_list("id", flat=True)
     context = {
         "faculty": faculty,
-        "teams": teams,
+        "team_cards": render_team_cards(request, "dashboards/cards/mentor_team.html", team_ids, load_teams),
     }
     return render(request, "dashboards/mentor_dashboard.html", context)
+
+
+@login_required
+def panel_reviews(request):
+    """Faculty: the reviews they sit on as a panel member, with their scoring progress."""
+    faculty = get_faculty_profile(request.user)
+    if faculty is None:
+        return redirect("dashboard_redirect")
+
+    reviews = Review.objects.filter(panel_members=faculty).select_related(
+        "team__batch",
+    ).annotate(
+        rubric_count=Count("rubrics", distinct=True),
+        my_scores=Count("rubrics__scores", filter=Q(rubrics__scores__panelist=faculty), distinct=True),
+    ).order_by("-date", "session", "team__name")
+
+    context = {
+        "faculty": faculty,
+        "reviews": reviews,
+    }
+    return render(request, "dashboards/panel_reviews.html", context)
+
+
+@login_required
+def panel_score_review(request, review_id):
+    """Panel member: enter or change their score for each rubric of a review."""
+    faculty = get_faculty_profile(request.user)
+    if faculty is None:
+        return redirect("dashboard_redirect")
+
+    review = get_object_or_404(
+        Review.objects.select_related("team__batch"),
+        id=review_id,
+        panel_members=faculty,
+    )
+    rubrics = list(review.rubrics.order_by("id"))
+    scores = dict(
+        RubricScore.objects.filter(rubric__review=review, panelist=faculty).values_list("rubric_id", "score")
+    )
+
+    if request.method == "POST":
+        entered = {}
+        for rubric in rubrics:
+            raw = request.POST.get(f"score_{rubric.id}", "").strip()
+            if not raw:
+                continue
+            try:
+                value = float(raw)
+            except ValueError:
+                value = -1
+            if not 0 <= value <= rubric.max_score:
+                messages.error(request, f"{rubric.name}: enter a score from 0 to {rubric.max_score}.")
+                return redirect("panel_score_review", review_id=review.id)
+            entered[rubric.id] = value
+
+        with transaction.atomic():
+            for rubric_id, value in entered.items():
+                if scores.get(rubric_id) != value:
+                    RubricScore.objects.update_or_create(
+                        rubric_id=rubric_id, panelist=faculty, defaults={"score": value},
+                    )
+            refresh_review(review.id)
+        messages.success(request, "Scores saved.")
+        return redirect("panel_reviews")
+
+    for rubric in rubrics:
+        rubric.my_score = scores.get(rubric.id)
+
+    context = {
+        "faculty": faculty,
+        "review": review,
+        "rubrics": rubrics,
+    }
+    return render(request, "dashboards/panel_score_review.html", context)
+
+
+@login_required
+def review_leaderboard(request):
+    """
+    Coordinator/HOD: teams of a batch ranked by one review's weighted score
+    (?review=FIRST|SECOND|FINAL) or by their overall score (?review=OVERALL).
+    Read from the ReviewResult table that core.scoring keeps up to date.
+    """
+    faculty, error_response = require_coordinator_or_hod(request.user)
+    if error_response:
+        return error_response
+
+    batches = list(
+        Batch.objects.filter(team__department=faculty.department).distinct().order_by("-start_year")
+    )
+    batch_id = request.GET.get("batch", "")
+    batch = next((b for b in batches if str(b.id) == batch_id), batches[0] if batches else None)
+    review_type = request.GET.get("review", "OVERALL")
+    if review_type not in Review.Type.values:
+        review_type = "OVERALL"
+
+    results, overall = [], []
+    if batch is not None:
+        if review_type == "OVERALL":
+            overall = overall_leaderboard(faculty.department, batch)
+        else:
+            results = leaderboard(faculty.department, batch, review_type)
+
+    context = {
+        "faculty": faculty,
+        "batches": batches,
+        "selected_batch": batch,
+        "review_type": review_type,
+        "review_types": Review.Type.choices,
+        "review_weights": [(label, review_weights().get(value, 0)) for value, label in Review.Type.choices],
+        "results": results,
+        "overall": overall,
+    }
+    return render(request, "dashboards/review_leaderboard.html", context)
@@ -0,0 +1,394 @@
+"""
+Department statistics for the HOD dashboard.
+
+DepartmentStat holds named counters per (department, batch):
+
+    students, members              students, and students in a team
+    teams, section.<id>.teams      teams, per section
+    mentor.<faculty id>            teams the faculty member mentors
+    proposals.<STATUS>             proposals by status,
+    section.<id>.proposals.<STATUS>  and per section of the team
+    reviews.<TYPE>                 reviews scheduled,
+    reviews.<TYPE>.complete        and fully scored (ReviewResult.complete)
+    invitations.pending            pending invitations to the batch's students
+
+The dashboard reads the department's rows with one query. Writes change
+counters by deltas (UPDATE ... SET value = value + n) in the writer's
+transaction: core.signals turns saves and deletes of teams, members,
+proposals, reviews, results, invitations and students into deltas, and bulk
+writers (team formation, mentor assignment, review scheduling, result
+refresh, invitation transitions) pass theirs to add_deltas. Moves the
+signals do not follow (a team changing batch, a review changing type) and
+bulk roster imports are corrected by rebuild_stats(), which recomputes every
+counter with a few GROUP BYs (the rebuild_stats command; import_roster and
+seed_college run it themselves).
+"""
+import functools
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import (
+    Batch,
+    ClassSection,
+    DepartmentStat,
+    FacultyProfile,
+    Invitation,
+    ProjectProposal,
+    Review,
+    ReviewResult,
+    StudentProfile,
+    Team,
+)
+
+
+_state = threading.local()
+
+
+@contextmanager
+def paused():
+    """Skip the signal deltas (e.g. while deleting a whole department); rebuild afterwards."""
+    _state.paused = True
+    try:
+        yield
+    finally:
+        _state.paused = False
+
+
+def _handler(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not getattr(_state, "paused", False):
+            func(*args, **kwargs)
+    return wrapper
+
+
+# ----- deltas -----
+
+def add_deltas(deltas):
+    """
+    Apply {(department id, batch id, key): n} to the counters, in key order
+    so concurrent writers lock rows in the same order. A missing counter is
+    created by a positive delta; a negative one has nothing to correct (its
+    department may be being deleted).
+    """
+    deltas = {k: n for k, n in deltas.items() if n and k[0] is not None and k[1] is not None}
+    for (department_id, batch_id, key), n in sorted(deltas.items()):
+        counter = DepartmentStat.objects.filter(department_id=department_id, batch_id=batch_id, key=key)
+        if counter.update(value=F("value") + n) or n < 0:
+            continue
+        try:
+            with transaction.atomic():
+                DepartmentStat.objects.create(department_id=department_id, batch_id=batch_id, key=key, value=n)
+        except IntegrityError:  # created meanwhile
+            counter.update(value=F("value") + n)
+
+
+def team_deltas(department_id, batch_id, section_id, mentor_id, sign=1):
+    deltas = Counter({
+        (department_id, batch_id, "teams"): sign,
+        (department_id, batch_id, f"section.{section_id}.teams"): sign,
+    })
+    if mentor_id is not None:
+        deltas[department_id, batch_id, f"mentor.{mentor_id}"] += sign
+    return deltas
+
+
+def proposal_deltas(department_id, batch_id, section_id, status, sign=1):
+    return Counter({
+        (department_id, batch_id, f"proposals.{status}"): sign,
+        (department_id, batch_id, f"section.{section_id}.proposals.{status}"): sign,
+    })
+
+
+def _team_place(team_id):
+    """(department id, batch id, section id) of a team."""
+    return Team.objects.filter(id=team_id).values_list(
+        "department_id", "batch_id", "class_section_id"
+    ).first() or (None, None, None)
+
+
+def _team_fields(team):
+    # read straight from __dict__: deferred fields must not trigger queries
+    return tuple(team.__dict__.get(f) for f in ("department_id", "batch_id", "class_section_id", "mentor_id"))
+
+
+def remember(instance):
+    """post_init: keep the values the counters were computed from."""
+    if isinstance(instance, Team):
+        instance._stats_origin = _team_fields(instance)
+    elif isinstance(instance, ProjectProposal):
+        instance._stats_origin = instance.__dict__.get("status")
+    elif isinstance(instance, StudentProfile):
+        instance._stats_origin = (instance.__dict__.get("department_id"), instance.__dict__.get("batch_id"))
+
+
+# ----- signal handlers (core.signals) -----
+
+@_handler
+def team_saved(team, created):
+    new = _team_fields(team)
+    old = getattr(team, "_stats_origin", None)
+    if created:
+        add_deltas(team_deltas(*new))
+    elif old != new and None not in old[:3]:
+        deltas = team_deltas(*new)
+        deltas.subtract(team_deltas(*old))
+        if old[:3] != new[:3]:  # the proposal is counted per section too
+            status = ProjectProposal.objects.filter(team_id=team.id).values_list("status", flat=True).first()
+            if status is not None:
+                deltas.update(proposal_deltas(*new[:3], status))
+                deltas.subtract(proposal_deltas(*old[:3], status))
+        add_deltas(deltas)
+    team._stats_origin = new
+
+
+@_handler
+def team_deleting(team):
+    department_id, batch_id, _, _ = _team_fields(team)
+    add_deltas({(department_id, batch_id, "members"): -team.members.count()})
+
+
+@_handler
+def team_deleted(team):
+    add_deltas(_negate(team_deltas(*_team_fields(team))))
+
+
+def _negate(deltas):
+    return {k: -v for k, v in deltas.items()}
+
+
+@_handler
+def members_changed(instance, action, reverse, pk_set):
+    """Team.members m2m_changed (post_add, post_remove, pre_clear)."""
+    sign = {"post_add": 1, "post_remove": -1, "pre_clear": -1}.get(action)
+    if sign is None:
+        return
+    if not reverse:
+        n = len(pk_set) if pk_set is not None else instance.members.count()
+        add_deltas({(instance.department_id, instance.batch_id, "members"): sign * n})
+        return
+    teams = Team.objects.filter(id__in=pk_set) if pk_set is not None else instance.teams.all()
+    deltas = Counter()
+    for department_id, batch_id in teams.values_list("department_id", "batch_id"):
+        deltas[department_id, batch_id, "members"] += sign
+    add_deltas(deltas)
+
+
+@_handler
+def proposal_saved(proposal, created):
+    old = getattr(proposal, "_stats_origin", None)
+    if created or old != proposal.status:
+        department_id, batch_id, section_id = _team_place(proposal.team_id)
+        deltas = proposal_deltas(department_id, batch_id, section_id, proposal.status)
+        if not created and old is not None:
+            deltas.subtract(proposal_deltas(department_id, batch_id, section_id, old))
+        add_deltas(deltas)
+    proposal._stats_origin = proposal.status
+
+
+@_handler
+def proposal_deleted(proposal):
+    department_id, batch_id, section_id = _team_place(proposal.team_id)
+    add_deltas(_negate(proposal_deltas(department_id, batch_id, section_id, proposal._stats_origin)))
+
+
+@_handler
+def review_saved(review, created):
+    if created:
+        department_id, batch_id, _ = _team_place(review.team_id)
+        add_deltas({(department_id, batch_id, f"reviews.{review.review_type}"): 1})
+
+
+@_handler
+def review_deleted(review):
+    department_id, batch_id, _ = _team_place(review.team_id)
+    add_deltas({(department_id, batch_id, f"reviews.{review.review_type}"): -1})
+
+
+@_handler
+def result_deleted(result):
+    if result.complete:
+        add_deltas({(result.department_id, result.batch_id, f"reviews.{result.review_type}.complete"): -1})
+
+
+@_handler
+def invitation_saved(invitation, created):
+    if created and invitation.status == "PENDING":
+        add_deltas({(*_student_place(invitation.to_student_id), "invitations.pending"): 1})
+
+
+@_handler
+def invitation_deleted(invitation):
+    if invitation.status == "PENDING":
+        add_deltas({(*_student_place(invitation.to_student_id), "invitations.pending"): -1})
+
+
+def _student_place(student_id):
+    return StudentProfile.objects.filter(id=student_id).values_list(
+        "department_id", "batch_id"
+    ).first() or (None, None)
+
+
+@_handler
+def student_saved(student, created):
+    new = (student.department_id, student.batch_id)
+    old = getattr(student, "_stats_origin", None)
+    if created:
+        add_deltas({(*new, "students"): 1})
+    elif old != new and None not in old:
+        add_deltas({(*old, "students"): -1, (*new, "students"): 1})
+    student._stats_origin = new
+
+
+@_handler
+def student_deleting(student):
+    if student.current_team_id is not None:
+        department_id, batch_id, _ = _team_place(student.current_team_id)
+        add_deltas({(department_id, batch_id, "members"): -1})
+
+
+@_handler
+def student_deleted(student):
+    add_deltas({(student.department_id, student.batch_id, "students"): -1})
+
+
+# ----- rebuild -----
+
+def compute_stats(departments=None):
+    """Every counter recomputed from the source tables: {(department id, batch id, key): n}."""
+    def scoped(queryset, department_field):
+        if departments is None:
+            return queryset
+        return queryset.filter(**{f"{department_field}__in": departments})
+
+    stats = Counter()
+    for d, b, n in scoped(StudentProfile.objects, "department").values_list(
+            "department_id", "batch_id").annotate(n=Count("id")).order_by():
+        stats[d, b, "students"] += n
+    for d, b, n in scoped(Team.members.through.objects, "team__department").values_list(
+            "team__department_id", "team__batch_id").annotate(n=Count("id")).order_by():
+        stats[d, b, "members"] += n
+    for d, b, s, m, n in scoped(Team.objects, "department").values_list(
+            "department_id", "batch_id", "class_section_id", "mentor_id").annotate(n=Count("id")).order_by():
+        for key, value in team_deltas(d, b, s, m, sign=n).items():
+            stats[key] += value
+    for d, b, s, status, n in scoped(ProjectProposal.objects, "team__department").values_list(
+            "team__department_id", "team__batch_id", "team__class_section_id", "status").annotate(
+            n=Count("id")).order_by():
+        for key, value in proposal_deltas(d, b, s, status, sign=n).items():
+            stats[key] += value
+    for d, b, kind, n in scoped(Review.objects, "team__department").values_list(
+            "team__department_id", "team__batch_id", "review_type").annotate(n=Count("id")).order_by():
+        stats[d, b, f"reviews.{kind}"] += n
+    for d, b, kind, n in scoped(ReviewResult.objects.filter(complete=True), "department").values_list(
+            "department_id", "batch_id", "review_type").annotate(n=Count("id")).order_by():
+        stats[d, b, f"reviews.{kind}.complete"] += n
+    for d, b, n in scoped(Invitation.objects.filter(status="PENDING"), "to_student__department").values_list(
+            "to_student__department_id", "to_student__batch_id").annotate(n=Count("id")).order_by():
+        stats[d, b, "invitations.pending"] += n
+    return {key: n for key, n in stats.items() if n}
+
+
+def rebuild_stats(departments=None):
+    """Recompute the counters of the departments (all by default). Returns the number of counters."""
+    stats = compute_stats(departments)
+    with transaction.atomic():
+        rows = DepartmentStat.objects.select_for_update()
+        if departments is not None:
+            rows = rows.filter(department__in=departments)
+        existing = {(r.department_id, r.batch_id, r.key): r for r in rows}
+        changed, stale = [], []
+        for key, row in existing.items():
+            value = stats.get(key)
+            if value is None:
+                stale.append(row.id)
+            elif row.value != value:
+                row.value = value
+                changed.append(row)
+        DepartmentStat.objects.filter(id__in=stale).delete()
+        DepartmentStat.objects.bulk_update(changed, ["value"], batch_size=500)
+        DepartmentStat.objects.bulk_create(
+            [
+                DepartmentStat(department_id=d, batch_id=b, key=key, value=n)
+                for (d, b, key), n in stats.items()
+                if (d, b, key) not in existing
+            ],
+            batch_size=500,
+        )
+    return len(stats)
+
+
+# ----- dashboard -----
+
+@dataclass
+class BatchStats:
+    batch: Batch
+    students: int = 0
+    unteamed: int = 0
+    teams: int = 0
+    pending_invitations: int = 0
+    proposals: list = field(default_factory=list)  # [(label, count)]
+    sections: list = field(default_factory=list)  # [(section, teams, [(label, count)])]
+    reviews: list = field(default_factory=list)  # [(label, scheduled, complete)]
+
+
+def department_summary(department):
+    """
+    ([BatchStats], [(mentor, teams)]) for the HOD dashboard, newest batch
+    first, from the department's counters (plus name lookups).
+    """
+    counters = {}
+    for batch_id, key, value in DepartmentStat.objects.filter(department=department).values_list(
+            "batch_id", "key", "value"):
+        counters.setdefault(batch_id, {})[key] = value
+
+    batches = Batch.objects.filter(id__in=counters).order_by("-start_year", "-id")
+    section_ids = {
+        int(key.split(".")[1]) for values in counters.values() for key in values
+        if key.startswith("section.") and key.split(".")[1].isdigit()
+    }
+    sections = ClassSection.objects.filter(id__in=section_ids).order_by("name")
+    mentor_loads = Counter()
+    for values in counters.values():
+        for key, value in values.items():
+            if key.startswith("mentor."):
+                mentor_loads[int(key.split(".")[1])] += value
+    mentors = FacultyProfile.objects.filter(id__in=mentor_loads).select_related("user")
+
+    summary = []
+    for batch in batches:
+        values = counters[batch.id]
+        stats = BatchStats(
+            batch=batch,
+            students=values.get("students", 0),
+            unteamed=max(values.get("students", 0) - values.get("members", 0), 0),
+            teams=values.get("teams", 0),
+            pending_invitations=values.get("invitations.pending", 0),
+            proposals=[
+                (label, values.get(f"proposals.{status}", 0))
+                for status, label in ProjectProposal.Status.choices
+            ],
+            reviews=[
+                (label, values.get(f"reviews.{kind}", 0), values.get(f"reviews.{kind}.complete", 0))
+                for kind, label in Review.Type.choices
+            ],
+        )
+        for section in sections:
+            teams = values.get(f"section.{section.id}.teams", 0)
+            if teams:
+                stats.sections.append((section, teams, [
+                    (label, values.get(f"section.{section.id}.proposals.{status}", 0))
+                    for status, label in ProjectProposal.Status.choices
+                ]))
+        summary.append(stats)
+
+    loads = sorted(
+        ((mentor, mentor_loads[mentor.id]) for mentor in mentors if mentor_loads[mentor.id]),
+        key=lambda item: (-item[1], item[0].user.get_full_name() or item[0].user.username),
+    )
+    return summary, loads
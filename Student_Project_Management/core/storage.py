@@ -0,0 +1,93 @@
+"""
+Content-addressed storage for proposal documents.
+
+A file is stored once, under the SHA-256 of its bytes:
+
+    blobs/<d[0:2]>/<d[2:4]>/<digest><ext>
+
+The two-level fan-out keeps directories small (65,536 leaves). An upload is
+read once: it is hashed while it is spooled (in memory up to
+FILE_UPLOAD_MAX_MEMORY_SIZE), or, when Django already streamed it to a
+temporary file, hashed there and then moved into place. Saving bytes that are
+already stored writes nothing and returns the existing name, so
+ProposalDocument rows that share content share the blob. Files are never
+deleted when a row goes away; the gc_document_blobs command removes blobs no
+row references.
+"""
+import hashlib
+import os
+import re
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+BLOB_DIR = "blobs"
+BLOB_NAME_RE = re.compile(rf"^{BLOB_DIR}/[0-9a-f]{{2}}/[0-9a-f]{{2}}/(?P<digest>[0-9a-f]{{64}})(\.\w+)?$")
+
+
+def blob_name(digest, extension=""):
+    return f"{BLOB_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+
+def blob_digest(name):
+    """The digest in a blob name, or None for files stored elsewhere."""
+    match = BLOB_NAME_RE.match(name or "")
+    return match.group("digest") if match else None
+
+
+def _extension(name):
+    ext = os.path.splitext(name)[1].lower()
+    return ext if re.fullmatch(r"\.[a-z0-9]{1,10}", ext) else ""
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def __init__(self, **kwargs):
+        # two identical uploads may race to create the same blob; either copy is right
+        kwargs.setdefault("allow_overwrite", True)
+        super().__init__(**kwargs)
+
+    def get_available_name(self, name, max_length=None):
+        # the final name is chosen in _save from the content, never suffixed
+        return name
+
+    def _save(self, name, content):
+        if hasattr(content, "temporary_file_path"):
+            # already on disk: hash it there; the parent class moves it into place
+            spool, source = None, content
+        else:
+            spool = SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+            source = File(spool)
+        try:
+            sha = hashlib.sha256()
+            if hasattr(content, "seek"):
+                content.seek(0)
+            for chunk in content.chunks():
+                sha.update(chunk)
+                if spool is not None:
+                    spool.write(chunk)
+            name = blob_name(sha.hexdigest(), _extension(name))
+            if self.exists(name):
+                # already stored: refresh the mtime so a running GC treats it as fresh
+                os.utime(self.path(name))
+                return name
+            return super()._save(name, source)
+        finally:
+            if spool is not None:
+                spool.close()
+
+    def iter_blobs(self):
+        """Yield (name, mtime) for every stored blob."""
+        root = self.path(BLOB_DIR)
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                name = os.path.relpath(path, self.location).replace(os.sep, "/")
+                if blob_digest(name):
+                    yield name, os.path.getmtime(path)
+
+
+document_storage = ContentAddressedStorage()
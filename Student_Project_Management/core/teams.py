@@ -0,0 +1,83 @@
+"""
+Team membership bookkeeping.
+
+StudentProfile.current_team mirrors Team.members. Claiming students for a
+team is a single conditional UPDATE (... WHERE current_team IS NULL), so two
+concurrent team creations can never both take the same student. Adding a
+member through Team.members is held to the same rule: it raises
+StudentInAnotherTeam (rolling the add back) instead of moving the student.
+"""
+from django.db.models import Q
+
+from .models import StudentProfile
+from .profiles import invalidate_profiles
+
+
+class StudentInAnotherTeam(Exception):
+    """
+    Raised when a Team.members add includes students of another team. The
+    add's transaction is rolled back, so inside an outer atomic block make
+    the add in its own (savepoint) block to carry on after catching this.
+    """
+
+    def __init__(self, student_ids):
+        self.student_ids = sorted(student_ids)
+        super().__init__(f"Students already in another team: {', '.join(map(str, self.student_ids))}.")
+
+
+def claim_students(team, student_ids):
+    """
+    Put every student in student_ids into team. Returns False, changing
+    nothing it could not undo, if any of them already belongs to a team;
+    call it inside transaction.atomic() and roll back on False.
+    """
+    student_ids = set(student_ids)
+    claimed = StudentProfile.objects.filter(
+        id__in=student_ids,
+        current_team__isnull=True,
+    ).update(current_team=team)
+    _invalidate(student_ids)
+    return claimed == len(student_ids)
+
+
+def assign_students(assignments):
+    """
+    Set current_team from {student id: team id} in bulk (for rows created
+    with bulk_create, which skips m2m_changed). The students should be locked
+    with select_for_update by the caller.
+    """
+    StudentProfile.objects.bulk_update(
+        [StudentProfile(id=s, current_team_id=t) for s, t in assignments.items()],
+        ["current_team"],
+        batch_size=500,
+    )
+    _invalidate(assignments)
+
+
+def sync_current_team(team, action, student_ids):
+    """Mirror a Team.members change (m2m_changed action) onto current_team."""
+    if action == "post_add":
+        # the same conditional UPDATE as claim_students; m2m add runs in a
+        # transaction, so raising here undoes the new membership rows
+        free = Q(current_team__isnull=True) | Q(current_team=team)
+        claimed = StudentProfile.objects.filter(free, id__in=student_ids).update(current_team=team)
+        if claimed != len(student_ids):
+            raise StudentInAnotherTeam(
+                StudentProfile.objects.filter(id__in=student_ids).exclude(free).values_list("id", flat=True)
+            )
+    elif action == "post_remove":
+        StudentProfile.objects.filter(id__in=student_ids, current_team=team).update(current_team=None)
+    elif action == "pre_clear":
+        if student_ids is None:
+            student_ids = list(team.members.values_list("id", flat=True))
+        StudentProfile.objects.filter(id__in=student_ids, current_team=team).update(current_team=None)
+    else:
+        return
+    _invalidate(student_ids)
+
+
+def _invalidate(student_ids):
+    # .update() skips post_save, so drop the students' cached profiles here
+    invalidate_profiles(
+        StudentProfile.objects.filter(id__in=student_ids).values_list("user_id", flat=True)
+    )
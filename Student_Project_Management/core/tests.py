@@ -1,3 +1,1956 @@
-from django.test import TestCase
+import csv
+import datetime
+import hashlib
+import io
+import itertools
+import os
+import pathlib
+import random
+import statistics
+import tempfile
+import threading
+import time
+import unittest.mock
+import zipfile
+import zlib
+from collections import Counter
+from xml.etree import ElementTree
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth.hashers import check_password
+from django.core.cache import cache
+from django.core.files.base import ContentFile, File
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
+from django.core.management import call_command
+from django.contrib.sessions.models import Session
+from django.db import IntegrityError, connection, transaction
+from django.forms.models import model_to_dict
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from .models import (
+    User,
+    Department,
+    Batch,
+    ClassSection,
+    FacultyProfile,
+    StudentProfile,
+    Team,
+    Invitation,
+    ProjectProposal,
+    ProposalDocument,
+    ProposalSignature,
+    ProposalSimilarity,
+    Review,
+    ReviewRubric,
+    ReviewResult,
+    RubricScore,
+    DepartmentStat,
+)
+from .admin import TeamAdminForm
+from .assignment import apply_assignment, plan_assignment, solve_assignment
+from .cards import card_cache_stats
+from .exports import iterate_rows
+from .formation import create_teams, pack, plan_formation, preference_groups, team_sizes
+from .invitations import (
+    MAX_PENDING_INVITATIONS,
+    accept_invitation,
+    expire_stale_invitations,
+    reject_invitation,
+    send_invitation,
+)
+from .hashing import PARALLEL_HASH_THRESHOLD, hash_passwords
+from .roster import RosterError, import_roster
+from .scheduling import build_timetable, review_slots, save_timetable
+from . import scoring
+from .similarity import PERM_A, PERM_B, PRIME, minhash, shingles, similar_proposals
+from .stats import compute_stats
+from .pagination import encode_cursor
+from .parallel import gather_queries
+from .pdf import _content_text
+from .processing import STALE_AFTER, claim_documents
+from .storage import blob_name, document_storage
+from .teams import StudentInAnotherTeam
+from .views import can_be_teammates
+
+
+# Maximum number of SQL queries each page may run, including the two
+# session/user lookups done by the auth middleware. The budget must hold no
+# matter how many rows the department has.
+QUERY_BUDGETS = {
+    "student_dashboard": 10,
+    "mentor_dashboard": 7,
+    "advisor_dashboard": 5,
+    "coordinator_proposals": 4,  # incl. the conditional GET validator
+    "hod_proposal_list": 5,
+    "coordinator_team_reviews": 7,
+    "review_leaderboard": 5,
+    "hod_dashboard": 7,
+}
+# the same requests with empty caches (profile and team card lookups hit the database)
+COLD_QUERY_BUDGETS = {
+    "student_dashboard": 11,
+    "mentor_dashboard": 9,
+    "advisor_dashboard": 6,
+    "coordinator_proposals": 5,
+    "hod_proposal_list": 6,
+    "coordinator_team_reviews": 8,
+    "review_leaderboard": 5,
+    "hod_dashboard": 7,
+}
+
+
+class DepartmentSeeder:
+    """
+    Builds a small but realistic department: sections, faculty, students,
+    teams with members, proposals, documents, reviews and invitations.
+    Call grow() to add more rows of the same shape.
+    """
+
+    def __init__(self, name="CSE"):
+        self.department = Department.objects.create(name=name, full_name=f"{name} Department")
+        self.batch = Batch.objects.create(name=f"{name}-2025-2026", start_year=2025, end_year=2026)
+        self.sections = [
+            ClassSection.objects.create(department=self.department, batch=self.batch, name=f"{name}-{s}")
+            for s in "AB"
+        ]
+        self.counter = 0
+
+        self.hod = self.make_faculty(user_type=User.UserType.HOD, is_hod=True)
+        self.coordinator = self.make_faculty(is_coordinator=True)
+        self.advisor = self.make_faculty(is_advisor=True)
+        self.mentor = self.make_faculty()
+        self.panel = [self.make_faculty() for _ in range(2)]
+
+        self.team = self.make_team(mentor=self.mentor)
+        self.student = self.team.team_leader
+        self.reviewed_team = self.team
+        for review_type in Review.Type.values:
+            review = Review.objects.create(
+                team=self.team,
+                review_type=review_type,
+                date=datetime.date(2026, 1, 15),
+                created_by=self.coordinator,
+            )
+            review.panel_members.set(self.panel)
+            ReviewRubric.objects.create(review=review, name="Presentation", weight=50)
+
+    def next_id(self):
+        self.counter += 1
+        return self.counter
+
+    def make_user(self, prefix, user_type):
+        n = self.next_id()
+        return User.objects.create(
+            username=f"{self.department.name.lower()}-{prefix}{n}",
+            first_name=prefix.title(),
+            last_name=str(n),
+            user_type=user_type,
+        )
+
+    def make_faculty(self, user_type=User.UserType.FACULTY, **flags):
+        user = self.make_user("fac", user_type)
+        return FacultyProfile.objects.create(
+            user=user,
+            department=self.department,
+            employee_id=f"{self.department.name}-E{user.id}",
+            **flags,
+        )
+
+    def make_student(self, section=None):
+        user = self.make_user("stu", User.UserType.STUDENT)
+        return StudentProfile.objects.create(
+            user=user,
+            department=self.department,
+            class_section=section or self.sections[user.id % len(self.sections)],
+            batch=self.batch,
+            roll_number=f"{self.department.name}{user.id:05d}",
+            semester=7,
+        )
+
+    def make_team(self, mentor=None, size=4):
+        section = self.sections[self.counter % len(self.sections)]
+        students = [self.make_student(section) for _ in range(size)]
+        team = Team.objects.create(
+            name=f"Team {self.next_id()}",
+            department=self.department,
+            batch=self.batch,
+            class_section=section,
+            team_leader=students[0],
+            mentor=mentor,
+            coordinator=self.coordinator,
+        )
+        team.members.set(students)
+        proposal = ProjectProposal.objects.create(
+            team=team,
+            title=f"Project {team.id}",
+            problem_statement="Problem",
+            preferred_mentor=mentor,
+            status=ProjectProposal.Status.PENDING if team.id % 2 else ProjectProposal.Status.APPROVED,
+        )
+        ProposalDocument.objects.create(
+            proposal=proposal,
+            file=f"proposals/team_{team.id}/proposal.pdf",
+            uploaded_by=students[0],
+        )
+        return team
+
+    def grow(self, teams=3):
+        """Add teams (all mentored by self.mentor), loose students and invitations."""
+        for _ in range(teams):
+            self.make_team(mentor=self.mentor)
+            loose = self.make_student()
+            Invitation.objects.create(from_student=loose, to_student=self.student, status="REJECTED")
+            Invitation.objects.create(from_student=self.student, to_student=loose, status="EXPIRED")
+        for review in self.reviewed_team.reviews.all():
+            extra = self.make_faculty()
+            review.panel_members.add(extra)
+            ReviewRubric.objects.create(review=review, name=f"Rubric {extra.id}", weight=10)
+
+
+class CacheResetTestCase(TestCase):
+    """The cache is not rolled back with the database, so start every test empty."""
+
+    def setUp(self):
+        cache.clear()
+
+
+class QueryBudgetTests(CacheResetTestCase):
+    """
+    Every dashboard/list view must run a fixed number of queries, both with
+    warm caches and right after the caches were emptied: the counts are
+    measured on a seeded department, the department is grown, and the counts
+    are measured again.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seed = DepartmentSeeder()
+
+    def measure(self, url_name, user, kwargs=None, cold=False):
+        """Queries of the request with the caches warmed by a first GET, or emptied (cold)."""
+        self.client.force_login(user)
+        url = reverse(url_name, kwargs=kwargs)
+        if cold:
+            cache.clear()
+        else:
+            self.client.get(url)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, f"{url} returned {response.status_code}")
+        return ctx.captured_queries
+
+    def format_queries(self, queries):
+        return "\n".join(f"  {i}. {q['sql']}" for i, q in enumerate(queries, start=1))
+
+    def assertQueryBudget(self, url_name, user, kwargs=None):
+        # warm: steady state, served from the profile and team card caches;
+        # cold: the first request after the caches were emptied
+        budgets = {"warm": QUERY_BUDGETS[url_name], "cold": COLD_QUERY_BUDGETS[url_name]}
+        before = {state: self.measure(url_name, user, kwargs, cold=state == "cold") for state in budgets}
+        self.seed.grow()
+        after = {state: self.measure(url_name, user, kwargs, cold=state == "cold") for state in budgets}
+
+        for state, budget in budgets.items():
+            if len(after[state]) != len(before[state]):
+                self.fail(
+                    f"{url_name} ({state}): query count grew with the data "
+                    f"({len(before[state])} -> {len(after[state])}). Queries after growth:\n"
+                    f"{self.format_queries(after[state])}"
+                )
+            if len(after[state]) > budget:
+                self.fail(
+                    f"{url_name} ({state}): {len(after[state])} queries, budget is {budget}. Queries:\n"
+                    f"{self.format_queries(after[state])}"
+                )
+
+    def test_student_dashboard(self):
+        self.assertQueryBudget("student_dashboard", self.seed.student.user)
+
+    def test_mentor_dashboard(self):
+        self.assertQueryBudget("mentor_dashboard", self.seed.mentor.user)
+
+    def test_advisor_dashboard(self):
+        self.assertQueryBudget("advisor_dashboard", self.seed.advisor.user)
+
+    def test_coordinator_proposal_list(self):
+        self.assertQueryBudget("coordinator_proposals", self.seed.coordinator.user)
+
+    def test_hod_proposal_list(self):
+        self.assertQueryBudget("hod_proposal_list", self.seed.hod.user)
+
+    def test_review_leaderboard(self):
+        self.assertQueryBudget("review_leaderboard", self.seed.coordinator.user)
+
+    def test_hod_dashboard(self):
+        self.assertQueryBudget("hod_dashboard", self.seed.hod.user)
+
+    def test_coordinator_team_reviews(self):
+        self.assertQueryBudget(
+            "coordinator_team_reviews",
+            self.seed.coordinator.user,
+            kwargs={"team_id": self.seed.reviewed_team.id},
+        )
+
+
+class AdvisorRosterTests(CacheResetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seed = DepartmentSeeder()
+        cls.seed.grow(teams=15)
+
+    def test_pages_cover_every_student_once(self):
+        self.client.force_login(self.seed.advisor.user)
+        seen, cursor, pages = [], None, 0
+        while True:
+            params = {"cursor": cursor} if cursor else {}
+            response = self.client.get(reverse("advisor_dashboard"), params)
+            seen.extend(s.id for s in response.context["students"])
+            cursor = response.context["next_cursor"]
+            pages += 1
+            if not cursor:
+                break
+
+        expected = StudentProfile.objects.filter(department=self.seed.department).count()
+        self.assertGreater(pages, 1)
+        self.assertEqual(len(seen), expected)
+        self.assertEqual(len(set(seen)), expected)
+
+    def test_pages_are_read_in_index_order(self):
+        self.client.force_login(self.seed.advisor.user)
+        first = self.client.get(reverse("advisor_dashboard"))
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse("advisor_dashboard"), {"cursor": first.context["next_cursor"]})
+        page_sql = next(q["sql"] for q in ctx.captured_queries
+                        if q["sql"].startswith('SELECT "core_studentprofile"') and "ORDER BY" in q["sql"])
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN QUERY PLAN {page_sql}")
+                plan = " ".join(str(row[-1]) for row in cursor.fetchall())
+            self.assertIn("student_dept_section_roll_idx", plan)
+            self.assertNotIn("TEMP B-TREE", plan)
+        keys = [(s.class_section_id, s.roll_number) for s in first.context["students"]]
+        self.assertEqual(keys, sorted(keys))
+
+    def test_section_filter(self):
+        self.client.force_login(self.seed.advisor.user)
+        section = self.seed.sections[0]
+        response = self.client.get(reverse("advisor_dashboard"), {"section": section.id})
+        self.assertTrue(response.context["students"])
+        self.assertTrue(all(s.class_section_id == section.id for s in response.context["students"]))
+
+
+class ProfileCacheTests(CacheResetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seed = DepartmentSeeder()
+
+    def test_profile_is_cached_across_requests(self):
+        faculty = self.seed.coordinator
+        self.client.force_login(faculty.user)
+        self.client.get(reverse("coordinator_proposals"))
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse("coordinator_proposals"))
+        self.assertFalse(any("core_facultyprofile" in q["sql"] for q in ctx.captured_queries))
+
+    def test_saving_profile_invalidates_role_flags(self):
+        faculty = self.seed.mentor
+        self.client.force_login(faculty.user)
+        response = self.client.get(reverse("coordinator_proposals"))
+        self.assertEqual(response.status_code, 302)
+
+        faculty.is_coordinator = True
+        faculty.save()
+        response = self.client.get(reverse("coordinator_proposals"))
+        self.assertEqual(response.status_code, 200)
+
+    def test_deleting_a_team_invalidates_its_members(self):
+        team = self.seed.make_team()
+        student = team.team_leader
+        self.client.force_login(student.user)
+        self.assertEqual(self.client.get(reverse("student_dashboard")).context["team_id"], team.id)
+
+        team.delete()
+        response = self.client.get(reverse("student_dashboard"))
+        self.assertIsNone(response.context["team_id"])
+        self.assertFalse(response.context["already_in_team"])
+
+    def test_hod_coordinator_update_invalidates_role_flags(self):
+        coordinator = self.seed.coordinator
+        self.client.force_login(coordinator.user)
+        self.assertEqual(self.client.get(reverse("coordinator_proposals")).status_code, 200)
+
+        self.client.force_login(self.seed.hod.user)
+        self.client.post(reverse("hod_faculty_list"), {"coordinator_ids": []})
+
+        self.client.force_login(coordinator.user)
+        self.assertEqual(self.client.get(reverse("coordinator_proposals")).status_code, 302)
+
+
+class ProposalQueueTests(CacheResetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seed = DepartmentSeeder()
+        cls.seed.grow(teams=55)
+
+    def test_status_order_follows_status(self):
+        proposal = self.seed.team.proposal
+        proposal.status = ProjectProposal.Status.PENDING
+        proposal.save()
+        self.assertEqual(ProjectProposal.objects.get(id=proposal.id).status_order, 0)
+
+        proposal.status = ProjectProposal.Status.REVISION
+        proposal.save(update_fields=["status"])
+        self.assertEqual(ProjectProposal.objects.get(id=proposal.id).status_order, 1)
+
+    def test_pages_follow_queue_order(self):
+        self.client.force_login(self.seed.coordinator.user)
+        rows, cursor = [], None
+        while True:
+            params = {"cursor": cursor} if cursor else {}
+            response = self.client.get(reverse("coordinator_proposals"), params)
+            rows.extend(response.context["proposals"])
+            cursor = response.context["next_cursor"]
+            if not cursor:
+                break
+
+        expected = list(
+            ProjectProposal.objects.filter(team__department=self.seed.department)
+            .order_by("status_order", "-updated_at", "-id")
+            .values_list("id", flat=True)
+        )
+        self.assertGreater(len(expected), 50)
+        self.assertEqual([p.id for p in rows], expected)
+
+    def test_tampered_cursor_gives_the_first_page(self):
+        self.client.force_login(self.seed.hod.user)
+        first = self.client.get(reverse("hod_proposal_list")).context["proposals"]
+        for values in (["a", "b", "c"], [0, None, 1], [0, "2026-01-01T00:00:00", {}], "x"):
+            response = self.client.get(reverse("hod_proposal_list"), {"cursor": encode_cursor(values)})
+            self.assertEqual(response.status_code, 200, values)
+            self.assertEqual([p.id for p in response.context["proposals"]], [p.id for p in first])
+
+
+class ProposalSearchTests(CacheResetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seed = DepartmentSeeder()
+        cls.seed.grow(teams=2)
+        cls.target = cls.seed.team.proposal
+        cls.target.objectives = "Detect crop disease from leaf images using a <b>CNN</b>."
+        cls.target.domain = "Computer Vision"
+        cls.target.save()
+
+    def search(self, q):
+        self.client.force_login(self.seed.coordinator.user)
+        response = self.client.get(reverse("coordinator_proposals"), {"q": q})
+        return response.context["proposals"]
+
+    def test_searches_beyond_title(self):
+        results = self.search("crop disease")
+        self.assertEqual([p.id for p in results], [self.target.id])
+        self.assertIn("<mark>crop</mark>", results[0].search_snippet)
+        self.assertIn("&lt;b&gt;", results[0].search_snippet)
+
+    def test_prefix_match(self):
+        self.assertEqual([p.id for p in self.search("vis")], [self.target.id])
+
+    def test_team_name_prefix_matches(self):
+        Team.objects.filter(id=self.seed.team.id).update(name="Zephyr Robotics")
+        results = self.search("zephyr")
+        self.assertEqual([p.id for p in results], [self.target.id])
+        self.assertEqual(results[0].team.name, "Zephyr Robotics")
+
+        # found by its team name and by its text: listed once
+        self.target.title = "Zephyr leaf scanner"
+        self.target.save()
+        self.assertEqual([p.id for p in self.search("Zephyr")], [self.target.id])
+
+    def test_index_follows_save_and_delete(self):
+        self.target.objectives = "Smart irrigation"
+        self.target.save()
+        self.assertEqual(self.search("crop"), [])
+        self.assertEqual([p.id for p in self.search("irrigation")], [self.target.id])
+
+        self.target.delete()
+        self.assertEqual(self.search("irrigation"), [])
+
+
+class ExplainViewsCommandTests(CacheResetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seed = DepartmentSeeder()
+
+    def test_reports_every_view_without_writing(self):
+        sessions_before = Session.objects.count()
+        out = io.StringIO()
+        call_command("explain_views", stdout=out)
+        report = out.getvalue()
+        for url_name in ("student_dashboard", "mentor_dashboard", "advisor_dashboard",
+                         "coordinator_proposals", "hod_proposal_list", "coordinator_team_reviews"):
+            self.assertIn(f"{url_name} (", report)
+        self.assertNotIn("skipped", report)
+        self.assertEqual(Session.objects.count(), sessions_before)
+
+
+class CurrentTeamTests(CacheResetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seed = DepartmentSeeder()
+
+    def make_leader_with_invites(self, count=3):
+        leader = self.seed.make_student(self.seed.sections[0])
+        invitees = [self.seed.make_student(self.seed.sections[0]) for _ in range(count)]
+        for s in invitees:
+            Invitation.objects.create(from_student=leader, to_student=s, status="ACCEPTED")
+        return leader, invitees
+
+    def test_members_change_maintains_current_team(self):
+        team = self.seed.team
+        member = team.members.exclude(id=team.team_leader_id).first()
+        self.assertEqual(StudentProfile.objects.get(id=member.id).current_team_id, team.id)
+
+        team.members.remove(member)
+        self.assertIsNone(StudentProfile.objects.get(id=member.id).current_team_id)
+
+        member.teams.add(team)
+        self.assertEqual(StudentProfile.objects.get(id=member.id).current_team_id, team.id)
+
+    def test_adding_a_member_of_another_team_is_refused(self):
+        other = self.seed.make_team()
+        poached = other.members.exclude(id=other.team_leader_id).first()
+        with self.assertRaises(StudentInAnotherTeam) as raised, transaction.atomic():
+            self.seed.team.members.add(poached)
+        self.assertEqual(raised.exception.student_ids, [poached.id])
+        self.assertEqual(StudentProfile.objects.get(id=poached.id).current_team_id, other.id)
+        self.assertFalse(self.seed.team.members.filter(id=poached.id).exists())
+
+        # the admin form says so instead of failing on save
+        data = {k: v for k, v in model_to_dict(self.seed.team).items() if v is not None}
+        data["members"] = [*data["members"], poached]
+        form = TeamAdminForm(data=data, instance=self.seed.team)
+        self.assertFalse(form.is_valid())
+        self.assertIn("Already in another team", form.errors["members"][0])
+
+    def test_create_team_claims_members(self):
+        leader, invitees = self.make_leader_with_invites()
+        self.client.force_login(leader.user)
+        response = self.client.post(reverse("create_team"), {
+            "team_name": "New Team",
+            "member_ids": [s.id for s in invitees],
+        })
+        self.assertRedirects(response, reverse("student_dashboard"), fetch_redirect_response=False)
+        team = Team.objects.get(team_leader=leader)
+        self.assertEqual(
+            set(StudentProfile.objects.filter(current_team=team).values_list("id", flat=True)),
+            {leader.id, *(s.id for s in invitees)},
+        )
+        response = self.client.get(reverse("student_dashboard"))
+        self.assertEqual(response.context["team_id"], team.id)
+        self.assertContains(response, "New Team")
+
+    def test_create_team_rejects_student_already_in_team(self):
+        leader, invitees = self.make_leader_with_invites()
+        taken = self.seed.team.members.exclude(id=self.seed.team.team_leader_id).first()
+        self.client.force_login(leader.user)
+        self.client.post(reverse("create_team"), {
+            "team_name": "Clash",
+            "member_ids": [invitees[0].id, invitees[1].id, taken.id],
+        })
+        self.assertFalse(Team.objects.filter(name="Clash").exists())
+        self.assertIsNone(StudentProfile.objects.get(id=invitees[0].id).current_team_id)
+        self.assertEqual(StudentProfile.objects.get(id=taken.id).current_team_id, self.seed.team.id)
+
+
+class InvitationTests(CacheResetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seed = DepartmentSeeder()
+        cls.target = cls.seed.make_student(cls.seed.sections[0])
+        cls.senders = [cls.seed.make_student(cls.seed.sections[0]) for _ in range(MAX_PENDING_INVITATIONS + 1)]
+
+    def send(self, sender, target):
+        client = self.client_class()
+        client.force_login(sender.user)
+        response = client.post(reverse("send_invite"), {"roll_number": target.roll_number}, follow=True)
+        return [str(m) for m in response.context["messages"]]
+
+    def test_send_enforces_limit_and_duplicates(self):
+        for sender in self.senders[:-1]:
+            self.assertEqual(self.send(sender, self.target), ["Invitation sent."])
+        self.assertEqual(self.send(self.senders[0], self.target), ["You already sent an invitation to this student."])
+        self.assertEqual(
+            self.send(self.senders[-1], self.target),
+            [f"This student already has {MAX_PENDING_INVITATIONS} pending invitations."],
+        )
+        self.assertEqual(self.target.received_invitations.filter(status="PENDING").count(), MAX_PENDING_INVITATIONS)
+
+        # one read for both rules, then the INSERT
+        self.client.force_login(self.senders[0].user)
+        other = self.seed.make_student(self.seed.sections[0])
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(reverse("send_invite"), {"roll_number": other.roll_number})
+        self.assertEqual(sum("core_invitation" in q["sql"] for q in ctx.captured_queries), 2)
+
+    def test_database_allows_one_pending_invitation_per_pair(self):
+        first = Invitation.objects.create(from_student=self.senders[0], to_student=self.target)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Invitation.objects.create(from_student=self.senders[0], to_student=self.target)
+        Invitation.objects.filter(id=first.id).update(status="REJECTED")
+        Invitation.objects.create(from_student=self.senders[0], to_student=self.target)
+
+    def test_invitation_leaves_pending_once(self):
+        first, second = (
+            Invitation.objects.create(from_student=sender, to_student=self.target) for sender in self.senders[:2]
+        )
+        self.client.force_login(self.target.user)
+        respond = lambda invite, action: self.client.post(reverse("respond_invite", args=[invite.id, action]))
+
+        respond(first, "accept")
+        self.assertEqual(Invitation.objects.get(id=first.id).status, "ACCEPTED")
+        self.assertEqual(Invitation.objects.get(id=second.id).status, "EXPIRED")
+        # stale pages: neither can move an invitation that is no longer pending
+        respond(second, "accept")
+        respond(first, "reject")
+        self.assertEqual(Invitation.objects.get(id=first.id).status, "ACCEPTED")
+        self.assertEqual(Invitation.objects.get(id=second.id).status, "EXPIRED")
+
+        self.client.force_login(self.senders[0].user)
+        self.assertEqual(respond(first, "accept").status_code, 404)
+
+    def test_sweeper_expires_stale_invitations_in_batches(self):
+        teamed = self.seed.student
+        invite = lambda a, b, **kw: Invitation.objects.create(from_student=a, to_student=b, **kw)
+        fresh = [invite(s, self.target) for s in self.senders[:3]]
+        old = [invite(s, self.senders[5]) for s in self.senders[:3]]
+        Invitation.objects.filter(id__in=[i.id for i in old]).update(
+            created_at=timezone.now() - datetime.timedelta(days=20)
+        )
+        to_team = invite(self.senders[4], teamed)
+        from_team = invite(teamed, self.senders[4])
+        answered = invite(self.senders[3], self.target, status="REJECTED")
+        Invitation.objects.filter(id=answered.id).update(created_at=timezone.now() - datetime.timedelta(days=20))
+
+        out = io.StringIO()
+        call_command("expire_invitations", "--dry-run", stdout=out)
+        self.assertIn("Would expire 5", out.getvalue())
+        self.assertEqual(Invitation.objects.filter(status="EXPIRED").count(), 0)
+
+        with CaptureQueriesContext(connection) as ctx:
+            call_command("expire_invitations", "--batch-size", "2", stdout=io.StringIO())
+        # 8 pending rows in ranges of 2; the range of fresh invitations has nothing to expire
+        self.assertEqual(sum(
+            q["sql"].startswith("UPDATE") and "departmentstat" not in q["sql"] for q in ctx.captured_queries
+        ), 3)
+        status = dict(Invitation.objects.values_list("id", "status"))
+        self.assertEqual({status[i.id] for i in old + [to_team, from_team]}, {"EXPIRED"})
+        self.assertEqual({status[i.id] for i in fresh}, {"PENDING"})
+        self.assertEqual(status[answered.id], "REJECTED")
+
+
+@skipUnlessDBFeature("has_select_for_update")
+class InvitationConcurrencyTests(TransactionTestCase):
+    """Concurrent requests through real connections; needs row locks (MySQL, PostgreSQL)."""
+
+    def setUp(self):
+        cache.clear()
+        self.seed = DepartmentSeeder()
+        self.target = self.seed.make_student(self.seed.sections[0])
+        self.senders = [self.seed.make_student(self.seed.sections[0]) for _ in range(10)]
+
+    def race(self, requests):
+        """Run (student, url, data) POSTs at the same moment, each on its own connection."""
+        barrier = threading.Barrier(len(requests))
+        errors = []
+
+        def run(student, url, data):
+            client = self.client_class()
+            client.force_login(student.user)
+            try:
+                barrier.wait()
+                client.post(url, data)
+            except Exception as e:  # reported by the test thread
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=run, args=request) for request in requests]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+
+    def test_invariants_hold_under_concurrent_requests(self):
+        send = reverse("send_invite")
+        self.race([(sender, send, {"roll_number": self.target.roll_number}) for sender in self.senders])
+        pending = list(self.target.received_invitations.filter(status="PENDING"))
+        self.assertEqual(len(pending), MAX_PENDING_INVITATIONS)
+
+        other = self.seed.make_student(self.seed.sections[0])
+        self.race([(self.senders[0], send, {"roll_number": other.roll_number})] * 4)
+        self.assertEqual(other.received_invitations.filter(status="PENDING").count(), 1)
+
+        requests = [
+            (self.target, reverse("respond_invite", args=[invite.id, "accept"]), {}) for invite in pending
+        ]
+        requests.append((self.target, reverse("respond_invite", args=[pending[0].id, "reject"]), {}))
+        self.race(requests)
+        statuses = sorted(self.target.received_invitations.values_list("status", flat=True))
+        self.assertIn(statuses.count("ACCEPTED"), (0, 1))
+        self.assertEqual(statuses.count("PENDING"), 0)
+        if "REJECTED" in statuses:
+            self.assertEqual(statuses.count("REJECTED"), 1)
+        self.assertEqual(len(statuses), MAX_PENDING_INVITATIONS)
+
+
+class TeamCardCacheTests(CacheResetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seed = DepartmentSeeder()
+        cls.seed.grow(teams=2)
+        cls.team = cls.seed.team
+        cls.proposal = cls.team.proposal
+
+    def get(self, user, url_name):
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse(url_name))
+        return response, len(ctx.captured_queries)
+
+    def test_unchanged_cards_come_from_the_cache(self):
+        mentor = self.seed.mentor.user
+        card_cache_stats(reset=True)
+        self.get(mentor, "mentor_dashboard")
+        self.assertEqual(card_cache_stats(), {"hits": 0, "misses": 3})
+        with CaptureQueriesContext(connection) as ctx:
+            response, _ = self.get(mentor, "mentor_dashboard")
+        self.assertEqual(card_cache_stats(), {"hits": 3, "misses": 3})
+        self.assertContains(response, self.proposal.title)
+        # only the list of team ids is read
+        self.assertEqual([q["sql"] for q in ctx.captured_queries if "core_team" in q["sql"]][1:], [])
+        self.assertFalse(any("core_proposaldocument" in q["sql"] for q in ctx.captured_queries))
+
+        out = io.StringIO()
+        call_command("card_cache_stats", "--reset", stdout=out)
+        self.assertIn("3 hits, 3 misses (hit ratio 50.0%)", out.getvalue())
+        self.assertEqual(card_cache_stats(), {"hits": 0, "misses": 0})
+
+    def test_changes_refresh_the_card(self):
+        student = self.seed.student.user
+        self.get(student, "student_dashboard")
+        _, warm = self.get(student, "student_dashboard")
+
+        self.proposal.title = "Renamed project"
+        self.proposal.save()
+        response, cold = self.get(student, "student_dashboard")
+        self.assertContains(response, "Renamed project")
+        self.assertGreater(cold, warm)
+
+        document = ProposalDocument.objects.create(proposal=self.proposal, file="proposals/v2.pdf")
+        self.assertContains(self.get(student, "student_dashboard")[0], reverse("proposal_document", args=[document.id]))
+
+        review = self.team.reviews.get(review_type=Review.Type.FINAL)
+        review.requirements = "Bring a demo"
+        review.save()
+        self.assertContains(self.get(student, "student_dashboard")[0], "Bring a demo")
+
+        newcomer = self.seed.make_student()
+        self.team.members.add(newcomer)
+        self.assertContains(self.get(student, "student_dashboard")[0], newcomer.user.get_full_name())
+
+    def test_bulk_writes_refresh_the_card(self):
+        mentor = self.seed.mentor.user
+        self.get(mentor, "mentor_dashboard")
+        ProjectProposal.objects.filter(id=self.proposal.id).update(status=ProjectProposal.Status.APPROVED)
+        apply_assignment(self.seed.department, {self.team.id: self.seed.panel[0].id})
+        response, _ = self.get(mentor, "mentor_dashboard")
+        self.assertNotContains(response, self.proposal.title)
+        self.assertContains(self.get(self.seed.panel[0].user, "mentor_dashboard")[0], "Approved")
+
+    def test_student_cards_are_per_viewer(self):
+        other = self.team.members.exclude(id=self.seed.student.id).first()
+        self.get(self.seed.student.user, "student_dashboard")
+        response, _ = self.get(other.user, "student_dashboard")
+        self.assertContains(response, "View Proposal")
+        self.assertNotContains(response, "Edit Proposal")
+
+
+class ConditionalProposalListTests(CacheResetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seed = DepartmentSeeder()
+        cls.seed.grow()
+
+    def revalidate(self, url, etag):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, headers={"if-none-match": etag})
+        return response, len(ctx.captured_queries)
+
+    def test_unchanged_list_is_not_modified(self):
+        self.client.force_login(self.seed.coordinator.user)
+        url = reverse("coordinator_proposals")
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("private", first["Cache-Control"])
+        self.assertFalse(first.has_header("Last-Modified"))
+
+        response, queries = self.revalidate(url, first["ETag"])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(queries, 3)  # session, user, validator
+        self.assertEqual(response["ETag"], first["ETag"])
+
+        # other filters and other users have their own validators
+        self.assertEqual(self.revalidate(url + "?status=PENDING", first["ETag"])[0].status_code, 200)
+        self.client.force_login(self.seed.hod.user)
+        self.assertEqual(self.revalidate(url, first["ETag"])[0].status_code, 302)
+
+    def test_changes_are_served_in_full(self):
+        self.client.force_login(self.seed.hod.user)
+        url = reverse("hod_proposal_list") + f"?batch={self.seed.batch.id}"
+        etag = self.client.get(url)["ETag"]
+
+        proposal = self.seed.team.proposal
+        proposal.status = ProjectProposal.Status.APPROVED
+        proposal.save()
+        response, _ = self.revalidate(url, etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+
+        # team changes too: a new mentor, in bulk
+        apply_assignment(self.seed.department, {self.seed.team.id: self.seed.panel[0].id})
+        response, _ = self.revalidate(url, etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+
+        Team.objects.get(id=self.seed.team.id).delete()
+        self.assertEqual(self.revalidate(url, etag)[0].status_code, 200)
+
+    def test_if_modified_since_does_not_hide_deletions(self):
+        self.client.force_login(self.seed.coordinator.user)
+        url = reverse("coordinator_proposals")
+        self.client.get(url)
+        ProjectProposal.objects.filter(team=self.seed.team).delete()
+        response = self.client.get(url, headers={"if-modified-since": http_date(time.time() + 3600)})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, self.seed.team.name)
+
+    def test_pending_messages_are_rendered(self):
+        self.client.force_login(self.seed.coordinator.user)
+        url = reverse("coordinator_proposals")
+        etag = self.client.get(url)["ETag"]
+        # forming teams adds no proposal but leaves a message for the next page
+        self.client.post(reverse("coordinator_form_teams"), {"batch": self.seed.batch.id})
+        response, _ = self.revalidate(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Created 1 team(s)")
+        self.assertEqual(self.revalidate(url, response["ETag"])[0].status_code, 304)
+
+
+XLSX_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+
+
+class HodExportTests(CacheResetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seed = DepartmentSeeder()
+        cls.seed.grow(teams=3)
+        cls.other = DepartmentSeeder(name="ECE")
+
+    def download(self, dataset, **params):
+        self.client.force_login(self.seed.hod.user)
+        response = self.client.get(reverse("hod_export", args=[dataset]), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content)
+
+    def test_roster_csv_lists_department_students_once(self):
+        rows = list(csv.reader(io.StringIO(self.download("roster").decode())))
+        self.assertEqual(rows[0][0], "Roll number")
+        expected = StudentProfile.objects.filter(department=self.seed.department)
+        self.assertEqual(sorted(r[0] for r in rows[1:]), sorted(expected.values_list("roll_number", flat=True)))
+
+    def test_rows_are_read_in_chunks(self):
+        students = StudentProfile.objects.filter(department=self.seed.department)
+        with CaptureQueriesContext(connection) as ctx:
+            rows = list(iterate_rows(students, ("roll_number",), chunk_size=5))
+        self.assertEqual(len(rows), students.count())
+        self.assertEqual(len(ctx.captured_queries), students.count() // 5 + 1)
+
+    def test_reviews_list_panel(self):
+        rows = list(csv.reader(io.StringIO(self.download("reviews").decode())))
+        self.assertEqual(len(rows) - 1, Review.objects.filter(team__department=self.seed.department).count())
+        panel = self.seed.panel[0].user.get_full_name()
+        team_rows = [row for row in rows[1:] if row[0] == self.seed.team.name]
+        self.assertEqual(len(team_rows), len(Review.Type.values))
+        self.assertTrue(all(panel in row[5].split("; ") for row in team_rows))
+
+    def test_xlsx_is_a_workbook(self):
+        archive = zipfile.ZipFile(io.BytesIO(self.download("teams", format="xlsx")))
+        self.assertIsNone(archive.testzip())
+        sheet = archive.read("xl/worksheets/sheet1.xml").decode()
+        members = Team.members.through.objects.filter(team__department=self.seed.department).count()
+        self.assertEqual(sheet.count("<row>"), members + 1)
+
+    def test_xlsx_drops_characters_xml_cannot_hold(self):
+        Team.objects.filter(id=self.seed.team.id).update(name="Vertical\x0btab\x01")
+        archive = zipfile.ZipFile(io.BytesIO(self.download("teams", format="xlsx")))
+        sheet = ElementTree.fromstring(archive.read("xl/worksheets/sheet1.xml"))
+        self.assertIn("Verticaltab", [t.text for t in sheet.iter(f"{{{XLSX_NS}}}t")])
+
+    def test_filename_is_quoted_for_any_department_name(self):
+        Department.objects.filter(id=self.seed.department.id).update(name='Électronique "A"')
+        self.client.force_login(self.seed.hod.user)
+        response = self.client.get(reverse("hod_export", args=["roster"]))
+        self.assertEqual(
+            response["Content-Disposition"],
+            "attachment; filename*=utf-8''%C3%A9lectronique%20%22a%22-roster.csv",
+        )
+
+    def test_only_hod_can_export(self):
+        self.client.force_login(self.seed.coordinator.user)
+        response = self.client.get(reverse("hod_export", args=["roster"]))
+        self.assertRedirects(response, reverse("dashboard_redirect"), fetch_redirect_response=False)
+        self.client.force_login(self.seed.hod.user)
+        self.assertEqual(self.client.get(reverse("hod_export", args=["payroll"])).status_code, 404)
+
+
+class GatherQueriesTests(SimpleTestCase):
+    def test_calls_run_concurrently_outside_transactions(self):
+        def slow(value):
+            time.sleep(0.2)
+            return value
+
+        def timed(**calls):
+            started = time.monotonic()
+            result = async_to_sync(gather_queries)(**calls)
+            return result, time.monotonic() - started
+
+        with unittest.mock.patch.dict(connection.settings_dict, CONN_MAX_AGE=60):
+            result, elapsed = timed(a=lambda: slow(1), b=lambda: slow(2), c=lambda: slow(3))
+            self.assertEqual(result, {"a": 1, "b": 2, "c": 3})
+            self.assertLess(elapsed, 0.5)
+
+            with override_settings(DASHBOARD_PARALLEL_QUERIES=False):
+                result, elapsed = timed(a=lambda: slow(1), b=lambda: slow(2))
+                self.assertEqual(result, {"a": 1, "b": 2})
+                self.assertGreaterEqual(elapsed, 0.4)
+
+        # without persistent connections every thread would reconnect: run in turn
+        with unittest.mock.patch.dict(connection.settings_dict, CONN_MAX_AGE=0):
+            self.assertGreaterEqual(timed(a=lambda: slow(1), b=lambda: slow(2))[1], 0.4)
+
+
+class AsyncDashboardTests(CacheResetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seed = DepartmentSeeder()
+        cls.loose = cls.seed.make_student()
+        Invitation.objects.create(from_student=cls.seed.student, to_student=cls.loose)
+
+    async def test_dashboards_are_served_under_asgi(self):
+        await self.async_client.aforce_login(self.loose.user)
+        response = await self.async_client.get(reverse("student_dashboard"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["received_invitations"]), 1)
+        self.assertIsNone(response.context["team_card"])
+
+        await self.async_client.aforce_login(self.seed.advisor.user)
+        response = await self.async_client.get(reverse("advisor_dashboard"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["sections"]), 2)
+
+
+@skipUnlessDBFeature("test_db_allows_multiple_connections")
+class BenchmarkDashboardsTests(TransactionTestCase):
+    """The ASGI timings and the worker threads use connections of their own, so the data must be committed."""
+
+    def test_benchmark_command_reports_both_servers(self):
+        DepartmentSeeder()
+        out = io.StringIO()
+        call_command("benchmark_dashboards", "--requests", "2", "--view", "student_dashboard", stdout=out)
+        self.assertEqual(out.getvalue().count("WSGI"), 2)
+        self.assertEqual(out.getvalue().count("ASGI"), 2)
+
+
+class ApiTests(CacheResetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seed = DepartmentSeeder()
+        cls.seed.grow(teams=4)
+        cls.other = DepartmentSeeder(name="ECE")
+
+    def get(self, resource, user=None, **params):
+        self.client.force_login(user or self.seed.coordinator.user)
+        return self.client.get(reverse("api", args=[resource]), params)
+
+    def test_access_follows_the_staff_pages(self):
+        url = reverse("api", args=["teams"])
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.assertEqual(self.get("teams", user=self.seed.student.user).status_code, 403)
+        self.assertEqual(self.get("teams", user=self.seed.mentor.user).status_code, 403)
+        self.assertEqual(self.get("teams", user=self.seed.hod.user).status_code, 200)
+        self.assertEqual(self.get("payroll").status_code, 404)
+        self.assertEqual(self.client.post(url).status_code, 405)
+        response = self.get("teams", fields="id,salary")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("salary", response.json()["error"])
+
+    def test_sparse_fields_query_only_their_columns(self):
+        self.get("proposals")  # warm the profile cache
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.get("proposals", fields="title,status")
+        results = response.json()["results"]
+        self.assertEqual(set(results[0]), {"id", "title", "status"})
+        data_query = ctx.captured_queries[-1]["sql"]
+        self.assertIn("title", data_query)
+        self.assertNotIn("problem_statement", data_query)
+        expected = ProjectProposal.objects.filter(team__department=self.seed.department)
+        self.assertEqual(sorted(r["id"] for r in results), sorted(expected.values_list("id", flat=True)))
+
+    def test_cursor_pages_cover_the_department(self):
+        seen, params = [], {"limit": 2, "fields": "name,members"}
+        while True:
+            page = self.get("teams", **params).json()
+            self.assertLessEqual(len(page["results"]), 2)
+            seen.extend(page["results"])
+            if page["next"] is None:
+                break
+            params["cursor"] = page["next"].split("cursor=")[1]
+        teams = Team.objects.filter(department=self.seed.department).order_by("id")
+        self.assertEqual([t["id"] for t in seen], list(teams.values_list("id", flat=True)))
+        self.assertEqual(
+            set(seen[0]["members"]), set(teams[0].members.values_list("id", flat=True)),
+        )
+
+    def test_invalid_cursor_is_a_bad_request(self):
+        for cursor in (encode_cursor(["x"]), encode_cursor([None]), encode_cursor([1, 2]), "not base64!"):
+            response = self.get("teams", cursor=cursor)
+            self.assertEqual(response.status_code, 400, cursor)
+            self.assertEqual(response.json()["error"], "Invalid cursor.")
+
+    def test_ids_are_fetched_in_one_query(self):
+        students = list(StudentProfile.objects.filter(department=self.seed.department)[:3])
+        ids = ",".join(str(s.id) for s in students + [self.other.student])
+        self.get("students")
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.get("students", ids=ids, fields="roll_number,team")
+        self.assertEqual(
+            response.json()["results"],
+            [{"id": s.id, "roll_number": s.roll_number, "team": s.current_team_id} for s in students],
+        )
+        self.assertEqual(sum("core_studentprofile" in q["sql"] for q in ctx.captured_queries), 1)
+        self.assertEqual(self.get("students", ids="1,x").status_code, 400)
+
+    def test_unchanged_page_is_not_modified(self):
+        response = self.get("reviews")
+        self.assertTrue(any(r["panel"] for r in response.json()["results"]))
+        etag = response["ETag"]
+        self.assertEqual(self.client.get(reverse("api", args=["reviews"]), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Review.objects.filter(team=self.seed.team).update(requirements="Bring a demo")
+        self.assertEqual(self.client.get(reverse("api", args=["reviews"]), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_documents_link_to_the_served_file(self):
+        (document,) = self.get("documents", ids=str(self.seed.team.proposal.documents.get().id)).json()["results"]
+        self.assertEqual(document["url"], reverse("proposal_document", args=[document["id"]]))
+        (department,) = self.get("departments").json()["results"]
+        self.assertEqual(department["name"], self.seed.department.name)
+
+
+class RosterImportTests(CacheResetTestCase):
+    HEADER = "roll_number,username,first_name,last_name,email,department,batch,section,semester,password\n"
+
+    def roster(self, count=3, overrides=None):
+        lines = [self.HEADER]
+        for i in range(count):
+            row = {
+                "roll_number": f"R{i:03d}", "username": f"stu{i}", "first_name": "Stu",
+                "last_name": str(i), "email": f"stu{i}@example.edu", "department": "MECH",
+                "batch": "2025-2026", "section": f"MECH-{'AB'[i % 2]}", "semester": "5",
+                "password": f"pw{i}",
+            }
+            row.update((overrides or {}).get(i, {}))
+            lines.append(",".join(row.values()) + "\n")
+        return io.StringIO("".join(lines))
+
+    def test_creates_lookups_users_and_profiles(self):
+        result = import_roster(self.roster())
+        self.assertEqual((result.created, result.updated, result.unchanged), (3, 0, 0))
+        self.assertEqual(result.new_lookups, {"departments": 1, "batches": 1, "sections": 2})
+        student = StudentProfile.objects.select_related("user", "class_section").get(roll_number="R001")
+        self.assertEqual(student.class_section.name, "MECH-B")
+        self.assertEqual(student.user.user_type, User.UserType.STUDENT)
+        self.assertTrue(student.user.check_password("pw1"))
+
+    def test_reimport_only_writes_changed_rows(self):
+        import_roster(self.roster())
+        with CaptureQueriesContext(connection) as ctx:
+            result = import_roster(self.roster())
+        self.assertEqual((result.created, result.updated, result.unchanged), (0, 0, 3))
+        writes = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith(("INSERT", "UPDATE"))]
+        self.assertEqual(writes, [])
+
+        result = import_roster(self.roster(overrides={2: {"semester": "6", "password": "changed"}}))
+        self.assertEqual((result.created, result.updated, result.unchanged), (0, 1, 2))
+        student = StudentProfile.objects.select_related("user").get(roll_number="R002")
+        self.assertEqual(student.semester, 6)
+        self.assertTrue(student.user.check_password("pw2"))  # existing passwords are kept
+
+    def test_invalid_file_imports_nothing(self):
+        with self.assertRaises(RosterError) as ctx:
+            import_roster(self.roster(overrides={1: {"batch": "next year"}, 2: {"roll_number": "R000"}}))
+        self.assertEqual(len(ctx.exception.errors), 2)
+        self.assertFalse(Department.objects.filter(name="MECH").exists())
+
+    def test_faculty_roles(self):
+        csvfile = io.StringIO(
+            "employee_id,username,first_name,last_name,email,department,is_hod,is_coordinator\n"
+            "E1,head,Head,One,head@example.edu,MECH,yes,\n"
+            "E2,coord,Co,Ord,coord@example.edu,MECH,,1\n"
+        )
+        result = import_roster(csvfile, default_password="secret")
+        self.assertEqual(result.kind, "faculty")
+        head = FacultyProfile.objects.select_related("user").get(employee_id="E1")
+        self.assertTrue(head.is_hod)
+        self.assertEqual(head.user.user_type, User.UserType.HOD)
+        self.assertTrue(FacultyProfile.objects.get(employee_id="E2").is_coordinator)
+        self.assertTrue(head.user.check_password("secret"))
+
+    def test_faculty_reimport_without_role_columns_keeps_roles(self):
+        import_roster(io.StringIO(
+            "employee_id,username,first_name,last_name,email,department,is_hod,is_coordinator,is_advisor\n"
+            "E1,head,Head,One,head@example.edu,MECH,yes,,1\n"
+            "E2,coord,Co,Ord,coord@example.edu,MECH,,1,\n"
+        ))
+        result = import_roster(io.StringIO(
+            "employee_id,username,first_name,last_name,email,department\n"
+            "E1,head,Head,Renamed,head@example.edu,MECH\n"
+            "E2,coord,Co,Ord,coord@example.edu,MECH\n"
+            "E3,new,New,Comer,new@example.edu,MECH\n"
+        ))
+        self.assertEqual((result.created, result.updated, result.unchanged), (1, 1, 1))
+        head = FacultyProfile.objects.select_related("user").get(employee_id="E1")
+        self.assertEqual((head.is_hod, head.is_coordinator, head.is_advisor), (True, False, True))
+        self.assertEqual(head.user.user_type, User.UserType.HOD)
+        self.assertEqual(head.user.last_name, "Renamed")
+        self.assertTrue(FacultyProfile.objects.get(employee_id="E2").is_coordinator)
+        self.assertEqual(User.objects.get(username="new").user_type, User.UserType.FACULTY)
+
+    def test_parallel_hashing_matches_input_order(self):
+        passwords = [f"pw{i}" for i in range(PARALLEL_HASH_THRESHOLD + 8)]
+        hashed = hash_passwords(passwords, workers=2)
+        self.assertEqual(len(hashed), len(passwords))
+        self.assertTrue(all(check_password(p, h) for p, h in zip(passwords, hashed)))
+
+
+class TempMediaTestCase(CacheResetTestCase):
+    """Stores uploaded files in a throwaway MEDIA_ROOT."""
+
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.media = pathlib.Path(media.name)
+
+
+class SeedCollegeTests(TempMediaTestCase):
+    # three mentors and panels of three: any two reviews on a day need different sessions
+    OPTIONS = ["--departments", "1", "--batches", "1", "--sections", "2", "--students", "40", "--faculty", "4"]
+
+    def seed(self, *args):
+        call_command("seed_college", *self.OPTIONS, *args, stdout=io.StringIO())
+        reviews = Review.objects.filter(team__department__name__startswith="SYN")
+        return {
+            "users": sorted(User.objects.filter(username__startswith="syn_").values_list(
+                "username", "first_name", "last_name")),
+            "teams": sorted(
+                (team.name, team.team_leader.roll_number, team.mentor and team.mentor.employee_id,
+                 sorted(m.roll_number for m in team.members.all()), team.proposal.title, team.proposal.status)
+                for team in Team.objects.filter(department__name__startswith="SYN").select_related(
+                    "team_leader", "mentor", "proposal").prefetch_related("members")
+            ),
+            "invitations": sorted(Invitation.objects.filter(from_student__department__name__startswith="SYN")
+                                  .values_list("from_student__roll_number", "to_student__roll_number", "status")),
+            "reviews": sorted(
+                (review.team.name, review.review_type, review.date, review.session,
+                 sorted(f.employee_id for f in review.panel_members.all()))
+                for review in reviews.select_related("team").prefetch_related("panel_members")
+            ),
+        }
+
+    def test_same_seed_gives_same_data(self):
+        first = self.seed()
+        self.assertTrue(first["reviews"])
+        self.assertEqual(self.seed("--clear"), first)
+        self.assertNotEqual(self.seed("--clear", "--seed", "7"), first)
+
+    def test_no_panel_member_is_double_booked(self):
+        self.seed()
+        sittings = Counter(Review.panel_members.through.objects.filter(
+            review__team__department__name__startswith="SYN",
+        ).values_list("facultyprofile_id", "review__date", "review__session"))
+        self.assertTrue(sittings)
+        self.assertEqual([sitting for sitting, count in sittings.items() if count > 1], [])
+        self.assertFalse(Review.objects.filter(session__isnull=True, team__department__name__startswith="SYN"))
+
+
+class DocumentStorageTests(TempMediaTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seed = DepartmentSeeder()
+
+    def upload(self, content, name="proposal.pdf"):
+        self.client.force_login(self.seed.student.user)
+        self.client.post(reverse("proposal"), {
+            "title": "Title",
+            "problem_statement": "Problem",
+            "proposal_pdf": SimpleUploadedFile(name, content, content_type="application/pdf"),
+        })
+        return ProposalDocument.objects.filter(proposal__team=self.seed.team).latest("id")
+
+    def stored_files(self):
+        return sorted(p for p in self.media.rglob("*") if p.is_file())
+
+    def test_identical_uploads_share_one_blob(self):
+        first = self.upload(b"%PDF-1.4 same bytes", "v1.pdf")
+        second = self.upload(b"%PDF-1.4 same bytes", "v2.pdf")
+        self.assertNotEqual(first.id, second.id)
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertEqual(first.digest, hashlib.sha256(b"%PDF-1.4 same bytes").hexdigest())
+        self.assertEqual((first.original_name, second.original_name), ("v1.pdf", "v2.pdf"))
+        self.assertEqual(len(self.stored_files()), 1)
+
+        third = self.upload(b"%PDF-1.4 other bytes")
+        self.assertNotEqual(third.file.name, first.file.name)
+        self.assertEqual(len(self.stored_files()), 2)
+
+    def test_content_is_read_once_and_duplicates_are_not_written(self):
+        with unittest.mock.patch.object(ContentFile, "chunks", autospec=True, side_effect=File.chunks) as chunks:
+            name = document_storage.save("x.pdf", ContentFile(b"%PDF once"))
+            with unittest.mock.patch("os.open", wraps=os.open) as os_open:
+                self.assertEqual(document_storage.save("y.pdf", ContentFile(b"%PDF once")), name)
+        # a stored blob is not written again, not even to a temporary file
+        self.assertFalse([c for c in os_open.call_args_list if str(c.args[0]).startswith(str(self.media))])
+        self.assertEqual(chunks.call_count, 2)  # once per save
+        digest = hashlib.sha256(b"%PDF once").hexdigest()
+        self.assertEqual(name, f"blobs/{digest[:2]}/{digest[2:4]}/{digest}.pdf")
+        self.assertEqual(self.stored_files(), [self.media / name])
+
+    def test_upload_on_disk_is_moved_into_place(self):
+        upload = TemporaryUploadedFile("big.pdf", "application/pdf", 0, None)
+        self.addCleanup(upload.close)
+        upload.write(b"%PDF on disk")
+        upload.flush()
+        name = document_storage.save("big.pdf", upload)
+        self.assertEqual(name, blob_name(hashlib.sha256(b"%PDF on disk").hexdigest(), ".pdf"))
+        self.assertEqual(document_storage.open(name).read(), b"%PDF on disk")
+        self.assertEqual(self.stored_files(), [self.media / name])
+
+    def test_gc_removes_only_old_unreferenced_blobs(self):
+        kept = self.upload(b"%PDF kept").file.name
+        orphan = document_storage.save("x.pdf", ContentFile(b"%PDF orphan"))
+        fresh_orphan = document_storage.save("x.pdf", ContentFile(b"%PDF fresh"))
+        old = time.time() - 48 * 3600
+        for name in (kept, orphan):
+            os.utime(document_storage.path(name), (old, old))
+
+        call_command("gc_document_blobs", stdout=io.StringIO())
+        self.assertTrue(document_storage.exists(kept))
+        self.assertFalse(document_storage.exists(orphan))
+        self.assertTrue(document_storage.exists(fresh_orphan))
+
+    def test_migrate_legacy_moves_old_layout(self):
+        doc = self.seed.team.proposal.documents.get()
+        path = self.media / doc.file.name
+        path.parent.mkdir(parents=True)
+        path.write_bytes(b"%PDF legacy")
+
+        call_command("gc_document_blobs", "--migrate-legacy", stdout=io.StringIO())
+        doc.refresh_from_db()
+        self.assertEqual(doc.digest, hashlib.sha256(b"%PDF legacy").hexdigest())
+        self.assertFalse(path.exists())
+        self.assertEqual(doc.file.read(), b"%PDF legacy")
+
+
+class DocumentServingTests(TempMediaTestCase):
+    CONTENT = b"%PDF-1.4 " + bytes(range(256)) * 4
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seed = DepartmentSeeder()
+        cls.other = DepartmentSeeder(name="ECE")
+
+    def setUp(self):
+        super().setUp()
+        self.document = ProposalDocument.objects.create(
+            proposal=self.seed.team.proposal,
+            file=SimpleUploadedFile("report.pdf", self.CONTENT),
+            original_name="report.pdf",
+            uploaded_by=self.seed.student,
+        )
+        self.url = reverse("proposal_document", args=[self.document.id])
+
+    def get(self, user, **headers):
+        self.client.force_login(user)
+        return self.client.get(self.url, headers=headers)
+
+    def test_access_is_limited_to_team_mentor_coordinator_and_hod(self):
+        allowed = [self.seed.student, self.seed.mentor, self.seed.coordinator, self.seed.hod]
+        denied = [self.seed.advisor, self.other.student, self.other.coordinator, self.other.hod]
+        for profile in allowed:
+            self.assertEqual(self.get(profile.user).status_code, 200, profile)
+        for profile in denied:
+            self.assertEqual(self.get(profile.user).status_code, 404, profile)
+
+    def test_full_download_and_conditional_get(self):
+        response = self.get(self.seed.student.user)
+        self.assertEqual(b"".join(response.streaming_content), self.CONTENT)
+        self.assertEqual(response["ETag"], f'"{self.document.digest}"')
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertEqual(response["Content-Disposition"], 'inline; filename="report.pdf"')
+
+        response = self.get(self.seed.student.user, if_none_match=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_range_requests(self):
+        response = self.get(self.seed.mentor.user, range="bytes=10-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 10-19/{len(self.CONTENT)}")
+        self.assertEqual(b"".join(response.streaming_content), self.CONTENT[10:20])
+
+        response = self.get(self.seed.mentor.user, range="bytes=-5")
+        self.assertEqual(b"".join(response.streaming_content), self.CONTENT[-5:])
+
+        response = self.get(self.seed.mentor.user, range=f"bytes={len(self.CONTENT)}-")
+        self.assertEqual(response.status_code, 416)
+
+        response = self.get(self.seed.mentor.user, range="bytes=0-9", if_range='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_sendfile_offload(self):
+        with self.settings(DOCUMENT_SENDFILE_BACKEND="x-accel-redirect"):
+            response = self.get(self.seed.hod.user)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Accel-Redirect"], f"/protected-media/{self.document.file.name}")
+        self.assertEqual(response.content, b"")
+
+
+def make_pdf(pages):
+    """A minimal valid PDF with one Flate-compressed text line per page."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            b" ".join(b"%d 0 R" % (3 + 2 * i) for i in range(len(pages))), len(pages)
+        ),
+    ]
+    for i, text in enumerate(pages):
+        content = zlib.compress(b"BT /F1 12 Tf 72 720 Td (%s) Tj ET" % text.encode())
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 << /Type /Font /Subtype /Type1 /BaseFont /Helvetica >> >> >> >>" % (4 + 2 * i)
+        )
+        objects.append(b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(content), content))
+    out, offsets = b"%PDF-1.4\n", []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return out
+
+
+class DocumentProcessingTests(TempMediaTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seed = DepartmentSeeder()
+
+    def add_document(self, content, name="proposal.pdf"):
+        return ProposalDocument.objects.create(
+            proposal=self.seed.team.proposal,
+            file=SimpleUploadedFile(name, content),
+            original_name=name,
+        )
+
+    def run_worker(self):
+        out = io.StringIO()
+        call_command("process_documents", "--workers", "0", "--once", stdout=out)
+        return out.getvalue()
+
+    def test_upload_is_only_queued(self):
+        self.client.force_login(self.seed.student.user)
+        self.client.post(reverse("proposal"), {
+            "title": "Title",
+            "problem_statement": "Problem",
+            "proposal_pdf": SimpleUploadedFile("p.pdf", make_pdf(["Hello"])),
+        })
+        document = ProposalDocument.objects.filter(proposal__team=self.seed.team).latest("id")
+        self.assertEqual(document.processing_status, ProposalDocument.ProcessingStatus.PENDING)
+        self.assertIsNone(document.page_count)
+
+    def test_worker_extracts_pages_and_text(self):
+        document = self.add_document(make_pdf(["Smart (campus) energy monitor", "Second page"]))
+        self.run_worker()
+        document.refresh_from_db()
+        self.assertEqual(document.processing_status, ProposalDocument.ProcessingStatus.READY)
+        self.assertEqual(document.page_count, 2)
+        self.assertIn("Smart (campus) energy monitor", document.extracted_text)
+        self.assertIn("Second page", document.extracted_text)
+
+    def test_invalid_file_fails(self):
+        document = self.add_document(b"MZ not a pdf at all", name="virus.pdf")
+        self.run_worker()
+        document.refresh_from_db()
+        self.assertEqual(document.processing_status, ProposalDocument.ProcessingStatus.FAILED)
+        self.assertIn("PDF header", document.processing_error)
+
+    def test_decompression_bomb_fails(self):
+        document = self.add_document(make_pdf(["x" * 5000]))
+        with unittest.mock.patch("core.pdf.MAX_STREAM_BYTES", 4096):
+            self.run_worker()
+        document.refresh_from_db()
+        self.assertEqual(document.processing_status, ProposalDocument.ProcessingStatus.FAILED)
+        self.assertIn("decompresses to more than", document.processing_error)
+
+    def test_content_stream_parsing_is_linear(self):
+        line = b"BT /F1 12 Tf 72 720 Td (Hello world) Tj ET\n"
+        timings = []
+        for repeat in (8000, 32000):
+            started = time.perf_counter()
+            self.assertEqual(_content_text(line * repeat).count("Hello world"), repeat)
+            timings.append(time.perf_counter() - started)
+        # four times the stream, about four times the time (slicing per operator made it ~12x)
+        self.assertLess(timings[1] / timings[0], 8)
+
+    def test_identical_upload_reuses_result(self):
+        first = self.add_document(make_pdf(["Same"]))
+        self.run_worker()
+        second = self.add_document(make_pdf(["Same"]))
+        output = self.run_worker()
+        second.refresh_from_db()
+        self.assertIn("reused", output)
+        self.assertEqual(second.processing_status, ProposalDocument.ProcessingStatus.READY)
+        self.assertEqual(second.extracted_text, ProposalDocument.objects.get(id=first.id).extracted_text)
+
+    def test_claims_are_exclusive_and_stale_claims_expire(self):
+        document = self.add_document(make_pdf(["Claim"]))
+        self.assertEqual([d.id for d in claim_documents(10) if d.id == document.id], [document.id])
+        self.assertFalse(any(d.id == document.id for d in claim_documents(10)))
+
+        ProposalDocument.objects.filter(id=document.id).update(
+            processing_started_at=timezone.now() - STALE_AFTER - datetime.timedelta(minutes=1)
+        )
+        self.assertTrue(any(d.id == document.id for d in claim_documents(10)))
+
+
+ESSAY = (
+    "Students waste time finding free seats in the central library during exam weeks. "
+    "We will place low cost occupancy sensors under each reading table and publish live "
+    "availability on a web dashboard and a mobile app. The system will also record usage "
+    "history so the library can plan opening hours and add seating where demand is highest."
+)
+
+
+class SimilarityTests(TempMediaTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seed = DepartmentSeeder()
+        cls.other = DepartmentSeeder("ECE")
+
+    def write(self, proposal, text, title="Library seat finder"):
+        proposal.title = title
+        proposal.problem_statement = text
+        with self.captureOnCommitCallbacks(execute=True):
+            proposal.save()
+
+    def test_near_duplicate_across_departments(self):
+        original, copy = self.seed.team.proposal, self.other.team.proposal
+        self.write(original, ESSAY)
+        self.write(copy, ESSAY.replace("central library", "main library").replace("mobile app", "phone app"))
+        matches = similar_proposals(original)
+        self.assertEqual([p.id for p in matches], [copy.id])
+        self.assertGreater(matches[0].similarity, 0.5)
+        self.assertEqual([p.id for p in similar_proposals(copy)], [original.id])
+
+    def test_signature_is_computed_after_commit(self):
+        proposal = self.seed.team.proposal
+        proposal.problem_statement = ESSAY
+        with self.captureOnCommitCallbacks() as callbacks:
+            proposal.save()
+            self.assertFalse(ProposalSignature.objects.filter(proposal=proposal).exists())
+        for callback in callbacks:
+            callback()
+        self.assertTrue(ProposalSignature.objects.filter(proposal=proposal).exists())
+
+    def test_unrelated_proposals_do_not_match(self):
+        self.write(self.seed.team.proposal, ESSAY)
+        self.write(self.other.team.proposal, (
+            "A drone survey of crop health using multispectral cameras, with a model that "
+            "predicts irrigation needs for each field from the captured images every week."
+        ), title="Crop drone")
+        self.assertEqual(similar_proposals(self.seed.team.proposal), [])
+
+    def test_edit_updates_matches_incrementally(self):
+        original, copy = self.seed.team.proposal, self.other.team.proposal
+        self.write(original, ESSAY)
+        self.write(copy, ESSAY)
+        self.assertEqual(len(similar_proposals(original)), 1)
+
+        self.write(copy, "Completely different: a compiler for a small teaching language.", title="Compiler")
+        self.assertEqual(similar_proposals(original), [])
+        self.assertFalse(ProposalSimilarity.objects.filter(other=copy).exists())
+
+    def test_processed_pdf_text_is_compared(self):
+        original, copy = self.seed.team.proposal, self.other.team.proposal
+        self.write(original, ESSAY)
+        self.write(copy, "See the attached document.")
+        self.assertEqual(similar_proposals(original), [])
+
+        ProposalDocument.objects.create(proposal=copy, file=SimpleUploadedFile("p.pdf", make_pdf([ESSAY])))
+        call_command("process_documents", "--workers", "0", "--once", stdout=io.StringIO())
+        self.assertEqual([p.id for p in similar_proposals(original)], [copy.id])
+
+    def test_rebuild_matches_incremental_result(self):
+        self.write(self.seed.team.proposal, ESSAY)
+        self.write(self.other.team.proposal, ESSAY.replace("exam weeks", "examinations"))
+        incremental = set(ProposalSimilarity.objects.values_list("proposal", "other", "score"))
+        call_command("rebuild_similarity", stdout=io.StringIO())
+        self.assertEqual(set(ProposalSimilarity.objects.values_list("proposal", "other", "score")), incremental)
+
+    def test_signature_matches_the_hash_definition(self):
+        shingle_set = shingles(ESSAY)
+        expected = [min((a * x + b) % PRIME for x in shingle_set) for a, b in zip(PERM_A, PERM_B)]
+        self.assertEqual([int(v) for v in minhash(shingle_set)], expected)
+
+    def test_coordinator_page_lists_similar_proposals(self):
+        self.write(self.seed.team.proposal, ESSAY)
+        self.write(self.other.team.proposal, ESSAY)
+        self.client.force_login(self.seed.coordinator.user)
+        response = self.client.get(reverse("coordinator_proposal_detail", args=[self.seed.team.proposal.id]))
+        self.assertContains(response, "Similar Proposals")
+        self.assertContains(response, self.other.team.name)
+        self.assertContains(response, "100%")
+
+
+class MentorAssignmentTests(CacheResetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seed = DepartmentSeeder()
+        cls.seed.grow(teams=5)
+        cls.mentors = [cls.seed.mentor, *cls.seed.panel]
+        Team.objects.filter(department=cls.seed.department).update(mentor=None)
+        ProjectProposal.objects.filter(team__department=cls.seed.department).update(
+            status=ProjectProposal.Status.APPROVED, preferred_mentor=None,
+        )
+        # only the three mentors take teams
+        FacultyProfile.objects.filter(department=cls.seed.department).exclude(
+            id__in=[m.id for m in cls.mentors]
+        ).update(mentor_capacity=0)
+
+    def test_solver_is_optimal(self):
+        rng = random.Random(7)
+        for _ in range(20):
+            cost = [[rng.randint(-10, 20) for _ in range(6)] for _ in range(4)]
+            best = min(sum(cost[i][p[i]] for i in range(4)) for p in itertools.permutations(range(6), 4))
+            columns = solve_assignment(cost)
+            self.assertEqual(len(set(columns)), 4)
+            self.assertEqual(sum(cost[i][c] for i, c in enumerate(columns)), best)
+
+    def test_plan_balances_load_and_honours_preferences(self):
+        first = self.seed.team
+        ProjectProposal.objects.filter(team=first).update(preferred_mentor=self.seed.panel[1])
+        FacultyProfile.objects.filter(id=self.seed.panel[0].id).update(expertise="IoT, Robotics")
+        ProjectProposal.objects.filter(team=Team.objects.exclude(id=first.id).filter(
+            department=self.seed.department).first()).update(domain="iot")
+
+        plan = plan_assignment(self.seed.department)
+        by_team = {p.team.id: p for p in plan.placements}
+        self.assertEqual(len(plan.placements), 6)
+        self.assertEqual(by_team[first.id].mentor.id, self.seed.panel[1].id)
+        self.assertTrue(by_team[first.id].preferred)
+        self.assertTrue(any(p.domain_match and p.mentor.id == self.seed.panel[0].id for p in plan.placements))
+        self.assertEqual(sorted(after for m, _, after, _ in plan.loads if m in self.mentors), [2, 2, 2])
+
+    def test_capacity_limits_and_unassigned_teams(self):
+        FacultyProfile.objects.filter(id__in=[m.id for m in self.mentors]).update(mentor_capacity=1)
+        plan = plan_assignment(self.seed.department)
+        self.assertEqual(len(plan.unassigned), 3)
+        self.assertEqual({p.mentor.id for p in plan.placements if p.mentor}, {m.id for m in self.mentors})
+
+    def test_apply_saves_reviewed_assignment(self):
+        other = DepartmentSeeder("ECE")
+        teams = list(Team.objects.filter(department=self.seed.department).order_by("id"))
+        self.client.force_login(self.seed.coordinator.user)
+        response = self.client.get(reverse("coordinator_mentor_assignment"))
+        self.assertContains(response, "Apply 6 changes")
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(reverse("coordinator_mentor_assignment"), {
+                f"mentor_{teams[0].id}": self.seed.mentor.id,
+                f"mentor_{teams[1].id}": other.mentor.id,  # other department: ignored
+                f"mentor_{other.team.id}": self.seed.mentor.id,  # other department's team: ignored
+            })
+        self.assertEqual(sum(
+            "UPDATE" in q["sql"] and "departmentstat" not in q["sql"] for q in ctx.captured_queries
+        ), 1)
+        self.assertEqual(Team.objects.get(id=teams[0].id).mentor_id, self.seed.mentor.id)
+        self.assertIsNone(Team.objects.get(id=teams[1].id).mentor_id)
+        self.assertEqual(Team.objects.get(id=other.team.id).mentor_id, other.mentor.id)
+
+
+class FormationTests(CacheResetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seed = DepartmentSeeder()
+        cls.loose = [cls.seed.make_student() for _ in range(11)]
+        cls.pair = cls.loose[:2]
+        Invitation.objects.create(from_student=cls.pair[0], to_student=cls.pair[1], status="ACCEPTED")
+
+    def test_team_sizes_and_packing(self):
+        for n in range(40):
+            sizes = team_sizes(n)
+            if n in (1, 2, 5):
+                self.assertEqual(sizes, [])
+            else:
+                self.assertEqual(sum(sizes), n)
+                self.assertTrue(all(3 <= size <= 4 for size in sizes))
+        bins = pack([[1, 2, 3], [4, 5], [6], [7, 8, 9, 10, 11]], [4, 4, 3])
+        self.assertEqual(sorted(len(b) for b in bins), [3, 4, 4])
+        self.assertEqual(sorted(itertools.chain(*bins)), list(range(1, 12)))
+        self.assertTrue(any({4, 5} <= set(b) for b in bins))
+
+    def test_plan_keeps_accepted_invitations_together(self):
+        plan = plan_formation(self.seed.department, self.seed.batch)
+        self.assertEqual(sorted(len(t) for t in plan.teams), [3, 4, 4])
+        self.assertEqual(plan.leftover, [])
+        self.assertEqual((plan.kept, plan.preferences), (1, 1))
+        team = next(t for t in plan.teams if self.pair[0] in t)
+        self.assertEqual(team[0], self.pair[0])  # the inviter leads
+        self.assertIn(self.pair[1], team)
+        for members in plan.teams:
+            self.assertTrue(all(can_be_teammates(a, b) for a, b in itertools.combinations(members, 2)))
+
+    @override_settings(ALLOW_CROSS_SECTION_TEAMS=False)
+    def test_plan_respects_sections(self):
+        plan = plan_formation(self.seed.department, self.seed.batch)
+        for members in plan.teams:
+            self.assertEqual(len({s.class_section_id for s in members}), 1)
+        placed = sum(len(t) for t in plan.teams)
+        self.assertEqual(placed + len(plan.leftover), len(self.loose))
+
+    def test_post_creates_teams_in_bulk(self):
+        pending = Invitation.objects.create(from_student=self.loose[5], to_student=self.loose[6])
+        self.client.force_login(self.seed.coordinator.user)
+        url = reverse("coordinator_form_teams")
+        self.assertContains(self.client.get(url), "Create 3 teams")
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(url, {"batch": self.seed.batch.id})
+        self.assertLess(len(ctx.captured_queries), 30)
+        teams = Team.objects.filter(department=self.seed.department).exclude(id=self.seed.team.id)
+        self.assertEqual(teams.count(), 3)
+        for team in teams:
+            members = list(team.members.all())
+            self.assertIn(len(members), (3, 4))
+            self.assertIn(team.team_leader, members)
+            self.assertTrue(all(s.current_team_id == team.id for s in members))
+        self.assertEqual(Invitation.objects.get(id=pending.id).status, "EXPIRED")
+        self.assertEqual(plan_formation(self.seed.department, self.seed.batch).teams, [])
+
+    def test_thousands_of_students_plan_quickly(self):
+        rng = random.Random(3)
+        ids = list(range(3000))
+        links = [(rng.randrange(3000), rng.randrange(3000)) for _ in range(800)]
+        started = time.perf_counter()
+        bins = pack(preference_groups(ids, links), team_sizes(len(ids)))
+        self.assertLess(time.perf_counter() - started, 5)
+        self.assertEqual(sorted(itertools.chain(*bins)), ids)
+        self.assertTrue(all(3 <= len(b) <= 4 for b in bins))
+
+
+def assert_conflict_free(test, timetable, busy=None):
+    seen = {f: set(slots) for f, slots in (busy or {}).items()}
+    for index, panel in timetable.placements.values():
+        slot = timetable.slots[index]
+        test.assertEqual(len(set(panel)), len(panel))
+        for f in panel:
+            test.assertNotIn(slot, seen.setdefault(f, set()))
+            test.assertNotIn((slot[0], None), seen[f])
+            seen[f].add(slot)
+
+
+class ReviewSchedulingTests(CacheResetTestCase):
+    monday = datetime.date(2026, 2, 2)
+
+    def test_large_department_is_conflict_free_and_balanced(self):
+        slots = review_slots(self.monday, self.monday + datetime.timedelta(days=6), 4)
+        self.assertEqual(len(slots), 24)  # Sunday skipped
+        started = time.monotonic()
+        timetable = build_timetable(list(range(300)), list(range(1000, 1080)), slots, panel_size=3)
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(timetable.unscheduled, [])
+        assert_conflict_free(self, timetable)
+        loads = timetable.loads.values()
+        self.assertLessEqual(max(loads) - min(loads), 1)
+
+    def test_busy_faculty_and_room_limits(self):
+        slots = review_slots(self.monday, self.monday, 2)
+        busy = {1: {(self.monday, 1)}, 2: {(self.monday, None)}}
+        timetable = build_timetable([10, 11, 12], [1, 2, 3, 4, 5], slots, panel_size=2, busy=busy, rooms=1)
+        assert_conflict_free(self, timetable, busy)
+        self.assertEqual(len(timetable.placements), 2)
+        self.assertEqual(timetable.unscheduled, [12])
+
+    def test_schedule_is_saved_in_bulk(self):
+        seed = DepartmentSeeder()
+        seed.grow(teams=4)
+        Review.objects.all().delete()
+        self.client.force_login(seed.coordinator.user)
+        params = {
+            "review_type": Review.Type.FIRST, "start": "2026-02-02", "end": "2026-02-03",
+            "sessions": "2", "panel_size": "2",
+        }
+        response = self.client.get(reverse("coordinator_schedule_reviews"), params)
+        self.assertContains(response, "Save timetable")
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(reverse("coordinator_schedule_reviews"), params)
+        self.assertLess(len(ctx.captured_queries), 22)
+        reviews = Review.objects.filter(review_type=Review.Type.FIRST).prefetch_related("panel_members")
+        self.assertEqual(reviews.count(), Team.objects.filter(department=seed.department).count())
+        booked = set()
+        for review in reviews:
+            panel = review.panel_members.all()
+            self.assertEqual(len(panel), 2)
+            for f in panel:
+                self.assertNotIn((f.id, review.date, review.session), booked)
+                booked.add((f.id, review.date, review.session))
+
+    def test_manual_edit_rejects_double_booking(self):
+        seed = DepartmentSeeder()
+        other = seed.make_team()
+        seed.team.reviews.exclude(review_type=Review.Type.FIRST).delete()
+        seed.team.reviews.update(session=1)  # 2026-01-15, session 1
+        self.client.force_login(seed.coordinator.user)
+        url = reverse("coordinator_edit_review", args=[other.id, Review.Type.FIRST])
+        self.client.post(url, {"date": "2026-01-15", "session": "1", "panel_members": [seed.panel[0].id]})
+        self.assertFalse(other.reviews.exists())
+        self.client.post(url, {"date": "2026-01-15", "session": "2", "panel_members": [seed.panel[0].id]})
+        self.assertTrue(other.reviews.exists())
+
+
+class RubricScoringTests(CacheResetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seed = DepartmentSeeder()
+        cls.review = cls.seed.team.reviews.get(review_type=Review.Type.FIRST)
+        cls.review.rubrics.all().delete()
+        cls.presentation = ReviewRubric.objects.create(review=cls.review, name="Presentation", weight=40, max_score=10)
+        cls.implementation = ReviewRubric.objects.create(review=cls.review, name="Implementation", weight=60, max_score=20)
+
+    def score(self, panelist, presentation, implementation):
+        self.client.force_login(panelist.user)
+        return self.client.post(reverse("panel_score_review", args=[self.review.id]), {
+            f"score_{self.presentation.id}": presentation,
+            f"score_{self.implementation.id}": implementation,
+        })
+
+    def test_weighted_total_updates_incrementally(self):
+        first, second = self.seed.panel
+        self.score(first, "8", "10")  # 0.8 and 0.5
+        result = ReviewResult.objects.get(review=self.review)
+        self.assertAlmostEqual(result.score, 62.0)  # (40*0.8 + 60*0.5) / 100
+        self.assertEqual((result.panelists, result.complete), (1, False))
+
+        self.score(second, "6", "20")  # means 0.7 and 0.75
+        result.refresh_from_db()
+        self.assertAlmostEqual(result.score, 73.0)
+        self.assertTrue(result.complete)
+
+    def test_scores_are_validated_and_limited_to_the_panel(self):
+        response = self.score(self.seed.panel[0], "11", "10")
+        self.assertRedirects(response, reverse("panel_score_review", args=[self.review.id]))
+        self.assertFalse(RubricScore.objects.exists())
+        self.assertEqual(self.score(self.seed.mentor, "5", "5").status_code, 404)
+
+    def test_totals_match_the_formula(self):
+        rng = random.Random(3)
+        rows = [
+            (review, review * 10 + rubric, (review * 10 + rubric) * 7 % 51, 10, panelist, rng.randint(0, 10))
+            for review in range(1, 40)
+            for rubric in range(rng.randint(1, 4))
+            for panelist in range(rng.randint(1, 3))
+        ]
+        rows += [(99, 991, 0, 10, 1, 4), (99, 992, 0, 10, 1, 8)]  # all weights 0: plain mean
+        totals = scoring.review_totals(rows)
+        self.assertAlmostEqual(totals[99][0], 60.0)
+        self.assertEqual(totals.keys(), {row[0] for row in rows})
+        for review, (total, panelists, entries) in totals.items():
+            own = [row for row in rows if row[0] == review]
+            weights = {rubric: weight for _, rubric, weight, _, _, _ in own}
+            means = {
+                rubric: statistics.mean(score / max_score for _, r, _, max_score, _, score in own if r == rubric)
+                for rubric in weights
+            }
+            if sum(weights.values()):
+                expected = sum(weights[r] * means[r] for r in weights) / sum(weights.values()) * 100
+            else:
+                expected = statistics.mean(means.values()) * 100
+            self.assertAlmostEqual(total, expected)
+            self.assertEqual(panelists, len({row[4] for row in own}))
+            self.assertEqual(entries, len(own))
+
+        overall = scoring.overall_scores([(1, Review.Type.FIRST, 60), (1, Review.Type.FINAL, 90), (2, Review.Type.SECOND, 70)])
+        self.assertEqual(overall, {1: 80.0, 2: 70.0})  # weights 25 / 50
+
+    def test_rubric_edit_keeps_scores_and_panel_change_prunes_them(self):
+        first, second = self.seed.panel
+        self.score(first, "8", "10")
+        self.score(second, "6", "20")
+        self.client.force_login(self.seed.coordinator.user)
+        self.client.post(reverse("coordinator_edit_review", args=[self.seed.team.id, Review.Type.FIRST]), {
+            "date": "2026-01-20",  # the seeder's other reviews book this panel on the 15th
+            "panel_members": [first.id],
+            "rubric_name": ["Presentation", "Implementation"],
+            "rubric_weight": ["50", "50"],
+            "rubric_max_score": ["10", "20"],
+        })
+        self.assertEqual(set(RubricScore.objects.values_list("panelist", flat=True)), {first.id})
+        result = ReviewResult.objects.get(review=self.review)
+        self.assertAlmostEqual(result.score, 65.0)  # (50*0.8 + 50*0.5) / 100
+        self.assertTrue(result.complete)
+
+    def test_leaderboards_rank_teams(self):
+        other = self.seed.make_team()
+        other_review = Review.objects.create(team=other, review_type=Review.Type.FIRST, date=datetime.date(2026, 1, 16))
+        other_review.panel_members.set(self.seed.panel)
+        rubric = ReviewRubric.objects.create(review=other_review, name="Overall", weight=100)
+        RubricScore.objects.create(rubric=rubric, panelist=self.seed.panel[0], score=9)
+        self.score(self.seed.panel[0], "8", "10")
+        call_command("rebuild_leaderboards", stdout=io.StringIO())
+
+        self.client.force_login(self.seed.coordinator.user)
+        response = self.client.get(reverse("review_leaderboard"), {"review": "FIRST"})
+        self.assertEqual([(r.rank, r.team.id) for r in response.context["results"]], [(1, other.id), (2, self.seed.team.id)])
+        response = self.client.get(reverse("review_leaderboard"))
+        self.assertEqual([(rank, team.id) for rank, team, _, _ in response.context["overall"]],
+                         [(1, other.id), (2, self.seed.team.id)])
+
+
+class DepartmentStatsTests(CacheResetTestCase):
+    maxDiff = None
+    """The incrementally maintained counters must always equal a full recount."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seed = DepartmentSeeder()
+        cls.seed.grow(teams=2)
+        cls.other = DepartmentSeeder("ECE")
+
+    def assertStatsCurrent(self):
+        stored = {
+            (d, b, key): value
+            for d, b, key, value in DepartmentStat.objects.values_list("department_id", "batch_id", "key", "value")
+            if value
+        }
+        self.assertEqual(stored, compute_stats())
+
+    def test_signals_keep_counters_current(self):
+        seed = self.seed
+        self.assertStatsCurrent()
+
+        team = seed.make_team()
+        proposal = team.proposal
+        proposal.status = ProjectProposal.Status.REJECTED
+        proposal.save()
+        team.mentor = seed.panel[0]
+        team.class_section = seed.sections[1 - seed.sections.index(team.class_section)]
+        team.save()
+        self.assertStatsCurrent()
+
+        leaver = team.members.exclude(id=team.team_leader_id).first()
+        team.members.remove(leaver)
+        leaver.teams.add(seed.team)
+        Review.objects.create(team=team, review_type=Review.Type.FIRST, date=datetime.date(2026, 1, 20))
+        self.assertStatsCurrent()
+
+        loose = [seed.make_student() for _ in range(3)]
+        with transaction.atomic():
+            for sender in loose[1:]:
+                send_invitation(sender, loose[0])
+        first, second = Invitation.objects.filter(to_student=loose[0], status="PENDING")
+        self.assertStatsCurrent()
+        self.assertTrue(reject_invitation(first.id, loose[0]))
+        self.assertFalse(accept_invitation(first.id, loose[0]))
+        self.assertStatsCurrent()
+        send_invitation(loose[2], loose[1])
+        self.assertTrue(accept_invitation(second.id, loose[0]))
+        self.assertStatsCurrent()
+
+        team.delete()
+        loose[1].delete()
+        self.assertStatsCurrent()
+
+    def test_bulk_writers_keep_counters_current(self):
+        seed = self.seed
+        loose = [seed.make_student() for _ in range(5)]
+        Invitation.objects.create(from_student=loose[0], to_student=loose[1])
+        Invitation.objects.create(from_student=seed.student, to_student=loose[2])
+        create_teams(seed.department, seed.batch, seed.coordinator)
+        self.assertStatsCurrent()
+
+        teams = Team.objects.filter(department=seed.department).order_by("id")
+        apply_assignment(seed.department, {team.id: seed.panel[1].id for team in teams})
+        self.assertStatsCurrent()
+
+        slots = review_slots(datetime.date(2026, 3, 2), datetime.date(2026, 3, 4), 2)
+        faculty = list(FacultyProfile.objects.filter(department=seed.department).values_list("id", flat=True))
+        timetable = build_timetable([t.id for t in teams], faculty, slots, panel_size=2)
+        save_timetable(timetable, Review.Type.FIRST, seed.coordinator)
+        self.assertStatsCurrent()
+
+        review = seed.team.reviews.get(review_type=Review.Type.SECOND)
+        for panelist in review.panel_members.all():
+            for rubric in review.rubrics.all():
+                RubricScore.objects.create(rubric=rubric, panelist=panelist, score=5)
+        scoring.refresh_review(review.id)
+        self.assertTrue(ReviewResult.objects.get(review=review).complete)
+        self.assertStatsCurrent()
+        RubricScore.objects.filter(rubric__review=review).delete()
+        scoring.refresh_review(review.id)
+        self.assertStatsCurrent()
+
+        Invitation.objects.create(from_student=loose[0], to_student=seed.student)
+        Invitation.objects.filter(status="PENDING").update(created_at=timezone.now() - datetime.timedelta(days=30))
+        self.assertTrue(expire_stale_invitations(batch_size=1))
+        self.assertStatsCurrent()
+
+    def test_rebuild_fixes_drift(self):
+        DepartmentStat.objects.filter(key="teams").update(value=99)
+        DepartmentStat.objects.create(department=self.seed.department, batch=self.seed.batch, key="mentor.0", value=3)
+        Team.objects.filter(id=self.seed.team.id).update(mentor=None)  # .update() skips the signals
+        call_command("rebuild_stats", stdout=io.StringIO())
+        self.assertStatsCurrent()
+        self.assertFalse(DepartmentStat.objects.filter(key="mentor.0").exists())
+
+    def test_hod_dashboard_shows_department_counts(self):
+        self.client.force_login(self.seed.hod.user)
+        response = self.client.get(reverse("hod_dashboard"))
+        self.assertContains(response, "Department Statistics")
+        (stats,) = response.context["batch_stats"]
+        teams = Team.objects.filter(department=self.seed.department)
+        self.assertEqual(stats.batch, self.seed.batch)
+        self.assertEqual(stats.teams, teams.count())
+        self.assertEqual(stats.students, StudentProfile.objects.filter(department=self.seed.department).count())
+        self.assertEqual(stats.unteamed, 2)
+        self.assertEqual(sum(n for _, n, _ in stats.sections), teams.count())
+        self.assertEqual(dict(stats.proposals)["Approved"], teams.filter(proposal__status="APPROVED").count())
+        self.assertEqual(response.context["mentor_loads"], [(self.seed.mentor, teams.count())])
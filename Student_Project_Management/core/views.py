@@ -3,7 +3,8 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.urls import reverse
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Prefetch
 from .models import (
     User,
     StudentProfile,
@@ -11,8 +12,18 @@ from .models import (
     Team,
     ProjectProposal,
     ProposalDocument,
+    Review,
 )
 from django.conf import settings
+from django.http import Http404
+from asgiref.sync import sync_to_async
+from .cards import render_team_cards
+from .invitations import InvitationError, accept_invitation, reject_invitation, send_invitation
+from .parallel import gather_queries
+from .profiles import get_profile, get_student_profile
+from .serving import can_view_document, serve_document
+from .stats import department_summary
+from .teams import claim_students
 
 def can_be_teammates(s1: StudentProfile, s2: StudentProfile) -> bool:
     """
@@ -67,78 +78,87 @@ def dashboard_redirect(request):
 
 
 @login_required
-def student_dashboard(request):
-    user: User = request.user
+async def student_dashboard(request):
+    user: User = await request.auser()
 
     if user.user_type != User.UserType.STUDENT:
         return redirect("dashboard_redirect")
 
     # get this student's profile
-    try:
-        student = StudentProfile.objects.select_related(
-            "department", "batch", "class_section", "user"
-        ).get(user=user)
-    except StudentProfile.DoesNotExist:
+    student = await sync_to_async(get_student_profile)(user)
+    if student is None:
         return redirect("dashboard_redirect")
 
-    # find a team where this student is leader or member
-    team = None
-    is_leader = Team.objects.filter(team_leader=student).exists()
-    is_member = Team.objects.filter(members=student).exists()
-    already_in_team = is_leader or is_member
-
-    first_review = second_review = final_review = None
-    if team:
-        first_review = team.reviews.filter(review_type=Review.Type.FIRST).first()
-        second_review = team.reviews.filter(review_type=Review.Type.SECOND).first()
-        final_review = team.reviews.filter(review_type=Review.Type.FINAL).first()
-
+    # current_team is maintained from Team.members (see core.teams)
+    already_in_team = student.current_team_id is not None
 
-    if already_in_team:
-        team = Team.objects.select_related(
-            "department", "batch", "class_section", "proposal"
+    def load_teams(team_ids):
+        teams = Team.objects.select_related(
+            "department", "batch", "class_section", "proposal", "mentor__user"
         ).prefetch_related(
-            "members",
+            "members__user",
             "reviews",
-            "proposal__documents",
-        ).filter(
-            models.Q(team_leader=student) | models.Q(members=student)
-        ).distinct().first()
-
-    # invitations received by this student
-    received_invitations = Invitation.objects.filter(
-        to_student=student
-    ).order_by("-created_at")
-
-    # invitations sent by this student
-    sent_invitations = Invitation.objects.filter(
-        from_student=student
-    ).order_by("-created_at")
-
-     # How many of MY sent invites are accepted?
-    accepted_invites_count = Invitation.objects.filter(
-        from_student=student,
-        status="ACCEPTED",
-    ).count()
+            # extracted_text can be large and the dashboard only links the files
+            Prefetch("proposal__documents", queryset=ProposalDocument.objects.defer("extracted_text")),
+        ).filter(id__in=team_ids)
+        for team in teams:
+            reviews = {r.review_type: r for r in team.reviews.all()}
+            team.first_review = reviews.get(Review.Type.FIRST)
+            team.second_review = reviews.get(Review.Type.SECOND)
+            team.final_review = reviews.get(Review.Type.FINAL)
+        return teams
+
+    # the card is cached per team version, so an unchanged team costs no queries
+    def team_card():
+        if not already_in_team:
+            return None
+        cards = render_team_cards(
+            request,
+            "dashboards/cards/student_team.html",
+            [student.current_team_id],
+            load_teams,
+            {"student": student},
+            viewer=student.id,
+        )
+        return cards[0] if cards else None
+
+    # none of these depend on each other: run them at the same time (core.parallel)
+    page = await gather_queries(
+        team_card=team_card,
+        # invitations received by this student
+        received_invitations=lambda: list(
+            Invitation.objects.select_related("from_student__user")
+            .filter(to_student=student).order_by("-created_at")
+        ),
+        # invitations sent by this student
+        sent_invitations=lambda: list(
+            Invitation.objects.select_related("to_student__user")
+            .filter(from_student=student).order_by("-created_at")
+        ),
+        # How many of MY sent invites are accepted?
+        accepted_invites_count=lambda: Invitation.objects.filter(
+            from_student=student,
+            status="ACCEPTED",
+        ).count(),
+    )
 
     # TL can create team only if:
     # - not already in a team
     # - has 2 or 3 accepted invites (so team size = 3 or 4 including TL)
+    accepted_invites_count = page["accepted_invites_count"]
     can_create_team = (not already_in_team) and (2 <= accepted_invites_count <= 3)
 
     context = {
         "student": student,
-        "team": team,
+        "team_id": student.current_team_id,
+        "team_card": page["team_card"],
         "already_in_team": already_in_team,
-        "received_invitations": received_invitations,
-        "sent_invitations": sent_invitations,
-        "first_review": first_review,
-        "second_review": second_review,
-        "final_review": final_review,
+        "received_invitations": page["received_invitations"],
+        "sent_invitations": page["sent_invitations"],
         "accepted_invites_count": accepted_invites_count,
         "can_create_team": can_create_team,
     }
-    return render(request, "dashboards/student_dashboard.html", context)
+    return await sync_to_async(render)(request, "dashboards/student_dashboard.html", context)
 
 
 
@@ -154,7 +174,11 @@ def faculty_dashboard(request):
 def hod_dashboard(request):
     user: User = request.user
     if user.user_type == User.UserType.HOD:
-        return render(request, "dashboards/hod_dashboard.html")
+        context = {}
+        department_id = getattr(get_profile(user), "department_id", None)
+        if department_id is not None:
+            context["batch_stats"], context["mentor_loads"] = department_summary(department_id)
+        return render(request, "dashboards/hod_dashboard.html", context)
     else:
         return redirect(reverse("dashboard_redirect"))
     
@@ -164,60 +188,48 @@ def send_invite(request):
     if user.user_type != User.UserType.STUDENT:
         return redirect("dashboard_redirect")
 
-    student = StudentProfile.objects.select_related(
-        "department", "batch", "class_section"
-    ).get(user=user)
+    student = get_student_profile(user)
+    if student is None:
+        return redirect("dashboard_redirect")
 
     if request.method == "POST":
         roll = (request.POST.get("roll_number") or "").strip().upper()
 
-        try:
-            # Look up by roll only; department/batch/section will be checked by can_be_teammates
-            target = StudentProfile.objects.select_related(
-                "department", "batch", "class_section"
-            ).get(roll_number=roll)
-        except StudentProfile.DoesNotExist:
-            messages.error(request, "Student with that roll number does not exist.")
-            return redirect("student_dashboard")
-
-        # Cannot invite yourself
-        if target == student:
-            messages.error(request, "You cannot invite yourself.")
-            return redirect("student_dashboard")
-
-        # Enforce department+batch and optional section rule
-        if not can_be_teammates(student, target):
-            messages.error(
-                request,
-                "You can invite only students in your department and batch "
-                "(section rule depends on department policy).",
-            )
-            return redirect("student_dashboard")
-
-        # Limit pending invitations *to that target*
-        pending_count = Invitation.objects.filter(
-            to_student=target,
-            status="PENDING",
-        ).count()
-        if pending_count >= 5:
-            messages.error(request, "This student already has 5 pending invitations.")
-            return redirect("student_dashboard")
-
-        # Avoid duplicate pending invite from same student to same target
-        existing = Invitation.objects.filter(
-            from_student=student,
-            to_student=target,
-            status="PENDING",
-        ).exists()
-        if existing:
-            messages.info(request, "You already sent an invitation to this student.")
-            return redirect("student_dashboard")
+        with transaction.atomic():
+            try:
+                # Look up by roll only; department/batch/section will be checked by can_be_teammates.
+                # The row stays locked until commit, so invitations to one student are sent one at a time
+                target = StudentProfile.objects.select_for_update(of=("self",)).select_related(
+                    "department", "batch", "class_section"
+                ).get(roll_number=roll)
+            except StudentProfile.DoesNotExist:
+                messages.error(request, "Student with that roll number does not exist.")
+                return redirect("student_dashboard")
+
+            # Cannot invite yourself
+            if target == student:
+                messages.error(request, "You cannot invite yourself.")
+                return redirect("student_dashboard")
+
+            # Enforce department+batch and optional section rule
+            if not can_be_teammates(student, target):
+                messages.error(
+                    request,
+                    "You can invite only students in your department and batch "
+                    "(section rule depends on department policy).",
+                )
+                return redirect("student_dashboard")
 
-        Invitation.objects.create(
-            from_student=student,
-            to_student=target,
-        )
-        messages.success(request, "Invitation sent.")
+            try:
+                sent = send_invitation(student, target)
+            except InvitationError as e:
+                messages.error(request, str(e))
+                return redirect("student_dashboard")
+
+        if sent:
+            messages.success(request, "Invitation sent.")
+        else:
+            messages.info(request, "You already sent an invitation to this student.")
         return redirect("student_dashboard")
 
     return redirect("student_dashboard")
@@ -228,29 +240,19 @@ def respond_invite(request, invite_id, action):
     if user.user_type != User.UserType.STUDENT:
         return redirect("dashboard_redirect")
 
-    student = StudentProfile.objects.get(user=user)
-    invite = get_object_or_404(
-        Invitation,
-        id=invite_id,
-        to_student=student,
-    )
-
-    if invite.status != "PENDING":
-        messages.info(request, "This invitation is already processed.")
-        return redirect("student_dashboard")
+    student = get_student_profile(user)
+    if student is None:
+        return redirect("dashboard_redirect")
 
-    if action == "accept":
-        Invitation.objects.filter(
-            to_student=student,
-            status="PENDING",
-        ).exclude(id=invite.id).update(status="EXPIRED")
-        invite.status = "ACCEPTED"
-        invite.save()
+    # each transition is a conditional UPDATE; only look the invite up when it did not apply
+    if action == "accept" and accept_invitation(invite_id, student):
         messages.success(request, "Invitation accepted.")
-    elif action == "reject":
-        invite.status = "REJECTED"
-        invite.save()
+    elif action == "reject" and reject_invitation(invite_id, student):
         messages.info(request, "Invitation rejected.")
+    else:
+        get_object_or_404(Invitation, id=invite_id, to_student=student)
+        if action in ("accept", "reject"):
+            messages.info(request, "This invitation is already processed.")
 
     return redirect("student_dashboard")
 
@@ -260,12 +262,11 @@ def create_team_view(request):
     if user.user_type != User.UserType.STUDENT:
         return redirect("dashboard_redirect")
 
-    student = StudentProfile.objects.get(user=user)
+    student = get_student_profile(user)
+    if student is None:
+        return redirect("dashboard_redirect")
 
-    # same checks as dashboard
-    is_leader = Team.objects.filter(team_leader=student).exists()
-    is_member = Team.objects.filter(members=student).exists()
-    already_in_team = is_leader or is_member
+    already_in_team = student.current_team_id is not None
 
     accepted_invites_count = Invitation.objects.filter(
         from_student=student,
@@ -303,23 +304,22 @@ def create_team_view(request):
             return redirect("create_team")
 
 
-        conflict = Team.objects.filter(
-            models.Q(team_leader__in=members) | models.Q(members__in=members)
-        ).exists()
-        if conflict:
-            messages.error(request, "One of the selected members is already in another team.")
-            return redirect("create_team")
-
-        team = Team.objects.create(
-            name=team_name,
-            team_leader=student,
-            department=student.department,
-            batch=student.batch,
-            class_section=student.class_section,
-        )
-        # include leader plus 3 members
-        team.members.set(list(members) + [student])
-        team.save()
+        with transaction.atomic():
+            team = Team.objects.create(
+                name=team_name,
+                team_leader=student,
+                department=student.department,
+                batch=student.batch,
+                class_section=student.class_section,
+            )
+            # claim leader + members in one conditional UPDATE; fails if any
+            # of them joined another team meanwhile
+            if not claim_students(team, [m.id for m in members] + [student.id]):
+                transaction.set_rollback(True)
+                messages.error(request, "One of the selected members is already in another team.")
+                return redirect("create_team")
+            # include leader plus 3 members
+            team.members.set(list(members) + [student])
 
         messages.success(request, "Team created successfully.")
         return redirect("student_dashboard")
@@ -338,12 +338,12 @@ def proposal_view(request):
     if user.user_type != User.UserType.STUDENT:
         return redirect("dashboard_redirect")
 
-    student = StudentProfile.objects.get(user=user)
+    student = get_student_profile(user)
+    if student is None:
+        return redirect("dashboard_redirect")
 
     # must be in a team
-    team = Team.objects.filter(team_leader=student).first()
-    if team is None:
-        team = Team.objects.filter(members=student).first()
+    team = Team.objects.filter(id=student.current_team_id).first()
 
     if team is None:
         messages.error(request, "You must be in a team to submit a proposal.")
@@ -390,9 +390,11 @@ def proposal_view(request):
 
         pdf_file = request.FILES.get("proposal_pdf")
         if pdf_file:
+            # identical re-uploads share one stored file (see core.storage)
             ProposalDocument.objects.create(
                 proposal=proposal,
                 file=pdf_file,
+                original_name=pdf_file.name[:255],
                 uploaded_by=student,
             )
 
@@ -407,3 +409,33 @@ def proposal_view(request):
         "is_leader": is_leader,
     }
     return render(request, "dashboards/proposal.html", context)
+
+
+@login_required
+def proposal_document(request, document_id):
+    """
+    Serve an uploaded proposal document to the team, its mentor, the
+    department coordinators and the HOD (404 for everyone else).
+    ?download=1 asks the browser to save it instead of previewing it.
+    """
+    document = _viewable_document(request, document_id)
+    return serve_document(request, document, as_attachment=bool(request.GET.get("download")))
+
+
+@login_required
+def proposal_document_thumbnail(request, document_id):
+    """First-page preview rendered by the process_documents worker (same access rules)."""
+    document = _viewable_document(request, document_id)
+    if not document.thumbnail:
+        raise Http404("No preview for this document.")
+    return serve_document(request, document, thumbnail=True)
+
+
+def _viewable_document(request, document_id):
+    document = get_object_or_404(
+        ProposalDocument.objects.select_related("proposal__team").defer("extracted_text"),
+        id=document_id,
+    )
+    if not can_view_document(request.user, get_profile(request.user), document):
+        raise Http404("No such document.")
+    return document